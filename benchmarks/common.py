@@ -0,0 +1,111 @@
+"""
+Helpers shared by the benchmark scripts: percentiles, latency summaries,
+result files and run-to-run comparisons.
+"""
+
+import json
+import os
+import subprocess
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Relative change past which compare_results flags a regression
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+# Latency changes smaller than this many milliseconds are noise, whatever the ratio
+MIN_LATENCY_DELTA_MS = 1.0
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of samples, in the samples' unit"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize_latencies(latencies: List[float], elapsed: float, errors: int = 0) -> dict:
+    """Count, error count, throughput and p50/p95/p99/max in milliseconds of latencies in seconds"""
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 2),
+    }
+
+
+def git_commit() -> Optional[str]:
+    """Commit the working tree is at, if it is a git checkout"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPOSITORY_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata(**config) -> dict:
+    """When, on which commit and with which settings a benchmark ran"""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "config": config,
+    }
+
+
+def write_results(path: str, results: dict) -> None:
+    with open(path, "w") as output:
+        json.dump(results, output, indent=2)
+    print(f"✅ Results written to {path}")
+
+
+def read_results(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_results(baseline: Dict[str, dict], current: Dict[str, dict],
+                    threshold: float = DEFAULT_REGRESSION_THRESHOLD, latency_key: str = "p95_ms",
+                    throughput_key: Optional[str] = "throughput_rps",
+                    min_delta_ms: float = MIN_LATENCY_DELTA_MS) -> List[str]:
+    """
+    Print a side-by-side table of two runs' summaries and return the
+    regressions: latency_key up (by at least min_delta_ms), or
+    throughput_key down, by more than threshold (a fraction). Entries
+    missing from either run are skipped.
+    """
+    regressions = []
+    header = f"{'name':<44} {'before':>10} {'after':>10} {'change':>8}"
+    if throughput_key:
+        header += f" {'rps before':>11} {'rps after':>10} {'change':>8}"
+    print(f"{header}   ({latency_key})")
+    for name in sorted(set(baseline) & set(current)):
+        before, after = baseline[name], current[name]
+        latency_change = _change(before[latency_key], after[latency_key])
+        flags = []
+        if latency_change > threshold and after[latency_key] - before[latency_key] >= min_delta_ms:
+            flags.append(latency_key)
+            regressions.append(
+                f"{name}: {latency_key} {before[latency_key]} -> {after[latency_key]} ({latency_change:+.0%})"
+            )
+        line = f"{name:<44} {before[latency_key]:>10} {after[latency_key]:>10} {latency_change:>+8.0%}"
+        if throughput_key:
+            throughput_change = _change(before[throughput_key], after[throughput_key])
+            if throughput_change < -threshold:
+                flags.append("rps")
+                regressions.append(
+                    f"{name}: throughput {before[throughput_key]} -> {after[throughput_key]} rps "
+                    f"({throughput_change:+.0%})"
+                )
+            line += f" {before[throughput_key]:>11} {after[throughput_key]:>10} {throughput_change:>+8.0%}"
+        print(line + (f"  ⚠️ {', '.join(flags)}" if flags else ""))
+    return regressions
+
+
+def _change(before: float, after: float) -> float:
+    return (after - before) / before if before else 0.0
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Load Test Script
+Drives a weighted mix of realistic sessions against the API for a fixed
+time and reports p50/p95/p99 latency and throughput per endpoint:
+
+    browse  anonymous: a question listing (random feed order), then a
+            question's detail page and its answers
+    search  anonymous: full-text search, sometimes narrowed by a tag, or a
+            tag listing
+    post    authenticated: ask a question, answer another, vote on a third
+    login   a burst of concurrent logins (bcrypt bound)
+
+The database is seeded first with benchmarks/seed.py at the requested
+scale (skipped when already seeded). Results are saved as JSON; pass a
+previous run as --baseline to flag endpoints whose p95 latency rose, or
+whose throughput fell, by more than --threshold (exit status 1).
+
+Usage (from the repository root, database configured as for the API):
+    python -m benchmarks.load_test --questions 20000 --duration 60 --output after.json --baseline before.json
+        runs the app in-process (client and server share one event loop,
+        so absolute numbers are pessimistic; compare runs made the same way)
+    python -m benchmarks.load_test --url http://localhost:8000 --concurrency 64 --output run.json
+        loads a running server; the seed goes straight to the database it uses
+    python -m benchmarks.load_test --compare before.json after.json
+        compares two saved runs without running anything
+
+Requires httpx (pip install httpx).
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import (
+    summarize_latencies, run_metadata, write_results, read_results, compare_results, DEFAULT_REGRESSION_THRESHOLD
+)
+from benchmarks.seed import (
+    SeedScale, BENCH_PASSWORD, TAGS, WORDS, bench_email, bench_question_id, seed_dataset,
+    add_scale_arguments, scale_from_arguments
+)
+
+DEFAULT_MIX = "browse=70,search=15,post=10,login=5"
+# Feed orders a browsing session picks from
+LISTING_SORTS = ("newest", "hot", "active", "most_voted", "unanswered")
+PAGE_SIZE = 20
+# Concurrent logins per login session
+LOGIN_BURST_SIZE = 5
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Scenario weights from "browse=70,search=15,..." """
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in VirtualUser.SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r} ({', '.join(VirtualUser.SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("the mix needs a scenario with a positive weight")
+    return mix
+
+
+class Recorder:
+    """Latencies and statuses per endpoint; requests sent while not recording (warm-up) are dropped"""
+
+    def __init__(self):
+        self.recording = False
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.sessions: Dict[str, int] = defaultdict(int)
+
+    async def request(self, client: httpx.AsyncClient, endpoint: str, method: str, url: str,
+                      **kwargs) -> Optional[httpx.Response]:
+        """Send a request, recording it under endpoint; None when it failed without a response"""
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = str(response.status_code)
+        except httpx.HTTPError:
+            response, status = None, "failed"
+        if self.recording:
+            self.latencies[endpoint].append(time.perf_counter() - start)
+            self.statuses[endpoint][status] += 1
+            if response is None or response.status_code >= 400:
+                self.errors[endpoint] += 1
+        return response
+
+    def summary(self, elapsed: float) -> dict:
+        endpoints = {}
+        for endpoint in sorted(self.latencies):
+            endpoints[endpoint] = summarize_latencies(self.latencies[endpoint], elapsed, self.errors[endpoint])
+            endpoints[endpoint]["statuses"] = dict(self.statuses[endpoint])
+        every_latency = [latency for latencies in self.latencies.values() for latency in latencies]
+        return {
+            "endpoints": endpoints,
+            "total": summarize_latencies(every_latency, elapsed, sum(self.errors.values())),
+            "sessions": dict(self.sessions),
+        }
+
+
+class VirtualUser:
+    """One simulated client running sessions of the mix back to back"""
+
+    SCENARIOS = ("browse", "search", "post", "login")
+
+    def __init__(self, number: int, client: httpx.AsyncClient, recorder: Recorder, scale: SeedScale, seed: int):
+        self.client = client
+        self.recorder = recorder
+        self.scale = scale
+        self.rng = random.Random(seed * 100003 + number)
+        self.email = bench_email(number % scale.users)
+        self.headers: Optional[dict] = None
+
+    def random_question_id(self) -> str:
+        return str(bench_question_id(self.rng.randrange(self.scale.questions)))
+
+    async def log_in(self) -> None:
+        """Get a token for posting (not recorded)"""
+        response = await self.client.post("/api/users/login", json={"email": self.email, "password": BENCH_PASSWORD})
+        response.raise_for_status()
+        self.headers = {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
+
+    async def browse(self) -> None:
+        sort = self.rng.choice(LISTING_SORTS)
+        response = await self.recorder.request(
+            self.client, f"GET /api/questions/?sort={sort}", "GET", "/api/questions/",
+            params={"limit": PAGE_SIZE, "sort": sort}
+        )
+        page = response.json().get("data") if response is not None and response.status_code == 200 else None
+        question_id = self.rng.choice(page)["question_id"] if page else self.random_question_id()
+        await self.recorder.request(
+            self.client, "GET /api/questions/{question_id}/detail", "GET", f"/api/questions/{question_id}/detail"
+        )
+        await self.recorder.request(
+            self.client, "GET /api/answers/question/{question_id}", "GET", f"/api/answers/question/{question_id}",
+            params={"limit": PAGE_SIZE}
+        )
+
+    async def search(self) -> None:
+        if self.rng.random() < 0.2:
+            await self.recorder.request(
+                self.client, "GET /api/questions/?tags", "GET", "/api/questions/",
+                params={"tags": self.rng.choice(TAGS), "limit": PAGE_SIZE}
+            )
+            return
+        params = {"search": " ".join(self.rng.sample(WORDS, self.rng.randint(1, 3))), "limit": PAGE_SIZE}
+        if self.rng.random() < 0.25:
+            params["tags"] = self.rng.choice(TAGS)
+        await self.recorder.request(self.client, "GET /api/questions/?search", "GET", "/api/questions/", params=params)
+
+    async def post(self) -> None:
+        words = " ".join(self.rng.sample(WORDS, 6))
+        await self.recorder.request(
+            self.client, "POST /api/questions/", "POST", "/api/questions/", headers=self.headers,
+            json={"title": f"Load test: {words}?", "description": f"Seen while load testing: {words}.",
+                  "tags": self.rng.sample(TAGS, 2)}
+        )
+        await self.recorder.request(
+            self.client, "POST /api/answers/", "POST", "/api/answers/", headers=self.headers,
+            json={"question_id": self.random_question_id(), "content": f"Try checking the {words}."}
+        )
+        await self.recorder.request(
+            self.client, "POST /api/questions/{question_id}/vote", "POST",
+            f"/api/questions/{self.random_question_id()}/vote", headers=self.headers,
+            json={"vote_type": self.rng.choice(("upvote", "upvote", "downvote"))}
+        )
+
+    async def login(self) -> None:
+        await asyncio.gather(*(
+            self.recorder.request(
+                self.client, "POST /api/users/login", "POST", "/api/users/login",
+                json={"email": bench_email(self.rng.randrange(self.scale.users)), "password": BENCH_PASSWORD}
+            )
+            for _ in range(LOGIN_BURST_SIZE)
+        ))
+
+    async def run(self, mix: Dict[str, float], deadline: float) -> None:
+        names, weights = list(mix), list(mix.values())
+        while time.perf_counter() < deadline:
+            scenario = self.rng.choices(names, weights)[0]
+            await getattr(self, scenario)()
+            if self.recorder.recording:
+                self.recorder.sessions[scenario] += 1
+
+
+async def run_load(client: httpx.AsyncClient, args, scale: SeedScale) -> dict:
+    """Warm up, then run the mix for the configured duration"""
+    recorder = Recorder()
+    users = [VirtualUser(number, client, recorder, scale, args.seed) for number in range(args.concurrency)]
+    print(f"🔑 Logging in {len(users)} virtual users...")
+    for user in users:
+        await user.log_in()
+
+    if args.warmup > 0:
+        print(f"🔥 Warming up for {args.warmup:g}s...")
+        deadline = time.perf_counter() + args.warmup
+        await asyncio.gather(*(user.run(args.mix, deadline) for user in users))
+
+    print(f"🚀 Running for {args.duration:g}s with {args.concurrency} virtual users...")
+    recorder.recording = True
+    started = time.perf_counter()
+    await asyncio.gather(*(user.run(args.mix, started + args.duration) for user in users))
+    elapsed = time.perf_counter() - started
+    recorder.recording = False
+    return recorder.summary(elapsed)
+
+
+async def load_test_in_process(args, scale: SeedScale) -> dict:
+    """Seed and load the app inside this process"""
+    from main import app
+    from utils.response_cache import response_cache, ALL_TAG
+
+    async with app.router.lifespan_context(app):
+        if not args.skip_seed:
+            await seed_dataset(scale)
+            # Listings cached before the seed no longer match the database
+            await response_cache.invalidate(ALL_TAG)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            return await run_load(client, args, scale)
+
+
+async def load_test_server(args, scale: SeedScale) -> dict:
+    """Seed the database and load a running server"""
+    if not args.skip_seed:
+        await seed_dataset(scale)
+    limits = httpx.Limits(max_connections=args.concurrency * LOGIN_BURST_SIZE)
+    async with httpx.AsyncClient(base_url=args.url, timeout=30, limits=limits) as client:
+        return await run_load(client, args, scale)
+
+
+def print_summary(results: dict) -> None:
+    print(f"📊 {'endpoint':<44} {'requests':>9} {'errors':>7} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    rows = list(results["endpoints"].items()) + [("total", results["total"])]
+    for name, summary in rows:
+        print(f"   {name:<44} {summary['requests']:>9} {summary['errors']:>7} {summary['throughput_rps']:>9} "
+              f"{summary['p50_ms']:>8} {summary['p95_ms']:>8} {summary['p99_ms']:>8}")
+
+
+def report_regressions(baseline: dict, current: dict, threshold: float) -> int:
+    """Compare two runs' endpoints, printing the regressions; returns the exit status"""
+    print(f"🔍 Comparing with baseline ({baseline['meta'].get('git_commit')}, {baseline['meta'].get('timestamp')})")
+    regressions = compare_results(baseline["endpoints"], current["endpoints"], threshold)
+    if regressions:
+        print(f"❌ {len(regressions)} regressions over {threshold:.0%}:")
+        for regression in regressions:
+            print(f"   {regression}")
+        return 1
+    print(f"✅ No regressions over {threshold:.0%}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the API with a mix of realistic sessions")
+    parser.add_argument("--url", help="Base URL of a running server; omit to run the app in-process")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Unmeasured seconds before the measurement")
+    parser.add_argument("--concurrency", type=int, default=16, help="Virtual users")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Scenario weights (default {DEFAULT_MIX})")
+    parser.add_argument("--skip-seed", action="store_true", help="Use the database as it is (same scale flags)")
+    add_scale_arguments(parser)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Results of an earlier run to compare against")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="Only compare two saved runs")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="Relative change flagged as a regression")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return report_regressions(read_results(args.compare[0]), read_results(args.compare[1]), args.threshold)
+
+    scale = scale_from_arguments(args)
+    print("🏋️ Starting load test...")
+    results = asyncio.run(load_test_server(args, scale) if args.url else load_test_in_process(args, scale))
+    results = {
+        "meta": run_metadata(
+            target=args.url or "in-process", duration_s=args.duration, warmup_s=args.warmup,
+            concurrency=args.concurrency, mix=args.mix, scale=vars(scale)
+        ),
+        **results,
+    }
+    print_summary(results)
+
+    if args.output:
+        write_results(args.output, results)
+    if args.baseline:
+        return report_regressions(read_results(args.baseline), results, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
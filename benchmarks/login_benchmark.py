@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Login Benchmark Script
+Measures concurrent POST /api/users/login throughput and latency, together
+with the latency of GET /health probes sent during the burst. When bcrypt
+runs on the event loop the probes stall behind every login; with the
+password executor they stay flat.
+
+Usage (from the repository root, database configured as for the API):
+    python -m benchmarks.login_benchmark
+        runs the app in-process and compares inline hashing (before)
+        with the password executor (after)
+    python -m benchmarks.login_benchmark --url http://localhost:8000
+        benchmarks a running server; start it once with
+        PASSWORD_HASH_WORKERS=0 and once with the default to compare
+
+Requires httpx (pip install httpx).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from typing import List, Optional
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import percentile
+
+
+async def ensure_user(client: httpx.AsyncClient, email: str, password: str) -> None:
+    """Register the benchmark user, ignoring 'already registered' errors"""
+    username = "bench_" + uuid.uuid4().hex[:8]
+    await client.post("/api/users/register", json={"username": username, "email": email, "password": password})
+
+
+async def run_burst(client: httpx.AsyncClient, email: str, password: str, requests: int, concurrency: int) -> dict:
+    """Send requests logins with the given concurrency while probing /health"""
+    login_latencies: List[float] = []
+    probe_latencies: List[float] = []
+    statuses: dict = {}
+    remaining = iter(range(requests))
+    done = asyncio.Event()
+
+    async def login_worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.post("/api/users/login", json={"email": email, "password": password})
+            login_latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await client.get("/health")
+            probe_latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0.01)
+
+    probe_task = asyncio.create_task(probe())
+    started = time.perf_counter()
+    await asyncio.gather(*(login_worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe_task
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2),
+        "login_p50_ms": round(percentile(login_latencies, 50) * 1000, 1),
+        "login_p99_ms": round(percentile(login_latencies, 99) * 1000, 1),
+        "probe_p50_ms": round(percentile(probe_latencies, 50) * 1000, 1),
+        "probe_p99_ms": round(percentile(probe_latencies, 99) * 1000, 1),
+        "probe_max_ms": round(max(probe_latencies, default=0.0) * 1000, 1),
+        "statuses": statuses
+    }
+
+
+def print_result(label: str, result: dict) -> None:
+    print(f"📊 {label}")
+    for key, value in result.items():
+        print(f"   {key:>15}: {value}")
+
+
+async def benchmark_in_process(args) -> dict:
+    """Compare inline hashing with the password executor inside one process"""
+    from main import app
+    from utils.password_executor import password_executor
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            await ensure_user(client, args.email, args.password)
+            configured_workers = password_executor.workers
+            for label, workers in (("before (inline bcrypt)", 0), ("after (password executor)", configured_workers)):
+                password_executor.workers = workers
+                result = await run_burst(client, args.email, args.password, args.requests, args.concurrency)
+                print_result(label, result)
+                results[label] = result
+            password_executor.workers = configured_workers
+    return results
+
+
+async def benchmark_server(args) -> dict:
+    """Benchmark a running server"""
+    async with httpx.AsyncClient(base_url=args.url, timeout=None) as client:
+        await ensure_user(client, args.email, args.password)
+        result = await run_burst(client, args.email, args.password, args.requests, args.concurrency)
+    print_result(args.url, result)
+    return {args.url: result}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark concurrent logins")
+    parser.add_argument("--url", help="Base URL of a running server; omit to run the app in-process")
+    parser.add_argument("--requests", type=int, default=200, help="Number of logins to send")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent login clients")
+    parser.add_argument("--email", default="login-benchmark@example.com")
+    parser.add_argument("--password", default="benchmark-password")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    print("🔐 Starting login benchmark...")
+    results = asyncio.run(benchmark_server(args) if args.url else benchmark_in_process(args))
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark Seed Script
+This script fills the database with a deterministic synthetic dataset for
+the load tests: users, questions with tags drawn from a fixed vocabulary
+(so searches and tag filters match), and answers. Rows go through the
+import_data.py COPY pipeline, so search vectors, counters, tag counts and
+feed scores are computed as for a real import.
+
+Every seeded user logs in with BENCH_PASSWORD as bench-user-<n>@example.com.
+Ids are derived from the row numbers, so seeding twice at the same scale
+adds nothing, and a larger scale only adds the missing rows.
+
+Usage (from the repository root, tables created by starting the API once):
+    python -m benchmarks.seed --users 1000 --questions 20000 --answers-per-question 3
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterator, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from import_data import import_rows, map_id
+from utils.auth_helper import get_password_hash
+from utils.database_helper import async_engine
+
+# Password of every seeded user
+BENCH_PASSWORD = "benchmark-password"
+
+TAGS = [
+    "python", "javascript", "typescript", "java", "c#", "c++", "go", "rust", "sql", "postgresql",
+    "react", "node.js", "django", "fastapi", "docker", "kubernetes", "git", "linux", "bash", "css",
+    "html", "aws", "redis", "api", "testing", "performance", "security", "async", "regex", "json",
+]
+WORDS = [
+    "error", "function", "return", "value", "list", "array", "string", "object", "class", "method",
+    "database", "query", "index", "table", "join", "transaction", "connection", "timeout", "server", "client",
+    "request", "response", "header", "cookie", "session", "token", "login", "password", "hash", "cache",
+    "memory", "leak", "thread", "process", "loop", "event", "promise", "callback", "exception", "stack",
+    "trace", "debug", "deploy", "build", "compile", "import", "module", "package", "version", "dependency",
+    "config", "environment", "variable", "container", "image", "volume", "network", "port", "proxy", "socket",
+    "file", "upload", "download", "stream", "buffer", "encoding", "unicode", "parse", "format", "date",
+    "timezone", "sort", "filter", "map", "reduce", "iterate", "recursion", "pointer", "reference", "null",
+    "undefined", "type", "interface", "generic", "template", "component", "state", "props", "render", "hook",
+    "route", "endpoint", "middleware", "migration", "schema", "model", "field", "validation", "test", "mock",
+]
+
+
+@dataclass
+class SeedScale:
+    """Size and shape of the synthetic dataset"""
+    users: int = 200
+    questions: int = 2000
+    answers_per_question: float = 2.0
+    days: int = 365
+    seed: int = 42
+
+
+def bench_email(number: int) -> str:
+    return f"bench-user-{number}@example.com"
+
+
+def bench_question_id(number: int):
+    """Id of the number-th seeded question"""
+    return map_id("questions", f"bench-q-{number}")
+
+
+def _sentence(rng: random.Random, low: int, high: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+def generate_rows(scale: SeedScale) -> Iterator[Tuple[str, str, dict]]:
+    """Yield (table, source, row) for the whole dataset, parents first; the same scale yields the same rows"""
+    rng = random.Random(scale.seed)
+    password = get_password_hash(BENCH_PASSWORD)
+    now = datetime.utcnow()
+    start = now - timedelta(days=scale.days)
+
+    for number in range(scale.users):
+        yield "users", f"user {number}", {
+            "user_id": f"bench-{number}", "username": f"bench_user_{number}", "email": bench_email(number),
+            "password": password, "created_at": start.isoformat(),
+        }
+
+    question_times = []
+    for number in range(scale.questions):
+        created_at = start + timedelta(seconds=rng.uniform(0, scale.days * 86400))
+        question_times.append(created_at)
+        yield "questions", f"question {number}", {
+            "question_id": f"bench-q-{number}", "user_id": f"bench-{rng.randrange(scale.users)}",
+            "title": f"How to fix {_sentence(rng, 4, 9)}?",
+            "description": _sentence(rng, 30, 120),
+            "tags": rng.sample(TAGS, rng.randint(1, 3)),
+            "created_at": created_at.isoformat(),
+        }
+
+    answer_number = 0
+    for number, asked_at in enumerate(question_times):
+        for position in range(rng.randint(0, round(scale.answers_per_question * 2))):
+            yield "answers", f"answer {answer_number}", {
+                "answer_id": f"bench-a-{answer_number}", "question_id": f"bench-q-{number}",
+                "user_id": f"bench-{rng.randrange(scale.users)}", "content": _sentence(rng, 20, 80),
+                "is_accepted": position == 0 and rng.random() < 0.3,
+                "created_at": (asked_at + timedelta(minutes=rng.uniform(1, 10000))).isoformat(),
+            }
+            answer_number += 1
+
+
+async def is_seeded(scale: SeedScale) -> bool:
+    """Whether the last user and question of this scale are already in the database"""
+    async with async_engine.connect() as conn:
+        result = await conn.execute(
+            text("SELECT (SELECT count(*) FROM users WHERE user_id = :user_id)"
+                 " + (SELECT count(*) FROM questions WHERE question_id = :question_id)"),
+            {"user_id": map_id("users", f"bench-{scale.users - 1}"),
+             "question_id": bench_question_id(scale.questions - 1)}
+        )
+        return result.scalar() == 2
+
+
+async def seed_dataset(scale: SeedScale, force: bool = False) -> None:
+    """Load the dataset unless this scale is already seeded"""
+    if not force and await is_seeded(scale):
+        print(f"✅ Dataset already seeded ({scale.users} users, {scale.questions} questions)")
+        return
+    print(f"🌱 Seeding {scale.users} users, {scale.questions} questions, "
+          f"~{scale.answers_per_question:g} answers per question...")
+    await import_rows(generate_rows(scale))
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = SeedScale()
+    parser.add_argument("--users", type=int, default=defaults.users, help="Seeded users")
+    parser.add_argument("--questions", type=int, default=defaults.questions, help="Seeded questions")
+    parser.add_argument("--answers-per-question", type=float, default=defaults.answers_per_question,
+                        help="Average answers per question")
+    parser.add_argument("--days", type=int, default=defaults.days, help="Questions are spread over this many days")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Random seed of the dataset")
+
+
+def scale_from_arguments(args) -> SeedScale:
+    return SeedScale(args.users, args.questions, args.answers_per_question, args.days, args.seed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed a synthetic dataset for the benchmarks")
+    add_scale_arguments(parser)
+    parser.add_argument("--force", action="store_true", help="Run the import even if the scale looks seeded")
+    args = parser.parse_args()
+
+    asyncio.run(seed_dataset(scale_from_arguments(args), args.force))
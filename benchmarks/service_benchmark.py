@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Service Benchmark Script
+Splits the time a list endpoint spends into its stages, for each service
+method backing one, at several page sizes:
+
+    fetch      the method's SQL, replayed on a bare connection (round trip
+               and row decoding, no ORM)
+    orm        the method call minus fetch: building ORM objects and the
+               session's identity map
+    pydantic   Response.from_orm per row and the create_response envelope,
+               as the routes do
+    encode     what FastAPI then does with the envelope: jsonable_encoder
+               and JSONResponse rendering
+    dump_json  the envelope's model_dump_json, as the cached listings used to
+    rows_path  what the list routes do now, end to end: the method selecting
+               plain rows of the response columns, encoded by render_list
+
+Each stage is the median of --repeat runs. Everything runs in-process on
+the database the API is configured with; it is seeded with
+benchmarks/seed.py plus one author owning 1000 questions, one of which has
+1000 answers, so every size is a full page. Pass an earlier run as
+--baseline to flag methods whose total (model path) or rows_path time rose
+by more than --threshold (exit status 1).
+
+Usage (from the repository root, tables created by starting the API once):
+    python -m benchmarks.service_benchmark
+    python -m benchmarks.service_benchmark --sizes 10 100 1000 --repeat 20 --output after.json --baseline before.json
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import warnings
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Type
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic.warnings import PydanticDeprecatedSince20
+from sqlalchemy import event, text
+
+from benchmarks.common import run_metadata, write_results, read_results, compare_results, DEFAULT_REGRESSION_THRESHOLD
+from benchmarks.seed import (
+    SeedScale, BENCH_PASSWORD, WORDS, seed_dataset, add_scale_arguments, scale_from_arguments
+)
+from database.answer_service import AnswerService
+from database.question_service import QuestionService, FEED_SORTS
+from database.users import UserService
+from import_data import import_rows, map_id
+from models import Question, Answer, User
+from schemas.answer_schemas import AnswerResponse
+from schemas.question_schemas import QuestionResponse, QuestionSearchResult
+from schemas.response_schemas import create_response
+from schemas.user_schemas import UserResponse
+from utils.auth_helper import get_password_hash
+from utils.database_helper import async_engine, AsyncSessionLocal
+from utils.serialization import schema_columns, row_items, render_list
+
+DEFAULT_SIZES = (10, 100, 1000)
+DEFAULT_REPEAT = 10
+# Rows of the author whose questions and answers fill the largest pages
+WIDE_ROWS = 1000
+WIDE_USER_ID = map_id("users", "bench-wide")
+WIDE_QUESTION_ID = map_id("questions", "bench-wide-q-0")
+STAGES = ("fetch", "orm", "pydantic", "encode", "dump_json", "rows_path")
+# Total time changes smaller than this are timer noise
+MIN_TOTAL_DELTA_MS = 0.2
+
+# The routes' from_orm calls warn; the benchmark mirrors them on purpose
+warnings.filterwarnings("ignore", category=PydanticDeprecatedSince20)
+
+
+@dataclass
+class ServiceCase:
+    """A service method behind a list route, how models are built from its results, and its row columns"""
+    name: str
+    call: Callable[..., Awaitable[list]]
+    convert: Callable[[list], list]
+    schema: Type[BaseModel]
+    columns: list
+
+
+def _search_results(results: List[dict]) -> list:
+    return [
+        QuestionSearchResult(
+            **QuestionResponse.from_orm(result["question"]).dict(), rank=result["rank"],
+            title_highlight=result["title_highlight"], snippet=result["snippet"]
+        )
+        for result in results
+    ]
+
+
+QUESTION_COLUMNS = schema_columns(Question, QuestionResponse)
+ANSWER_COLUMNS = schema_columns(Answer, AnswerResponse)
+
+CASES = [
+    ServiceCase(
+        "QuestionService.get_all_questions(newest)",
+        lambda db, limit, columns=None: QuestionService(db).get_all_questions(limit=limit, columns=columns),
+        lambda rows: [QuestionResponse.from_orm(question) for question in rows],
+        QuestionResponse, QUESTION_COLUMNS
+    ),
+    ServiceCase(
+        "QuestionService.get_all_questions(hot)",
+        lambda db, limit, columns=None: QuestionService(db).get_all_questions(limit=limit, sort="hot", columns=columns),
+        lambda rows: [QuestionResponse.from_orm(question) for question in rows],
+        QuestionResponse, schema_columns(Question, QuestionResponse, *FEED_SORTS["hot"][0])
+    ),
+    ServiceCase(
+        "QuestionService.get_questions_by_user",
+        lambda db, limit, columns=None: QuestionService(db).get_questions_by_user(
+            WIDE_USER_ID, limit=limit, columns=columns
+        ),
+        lambda rows: [QuestionResponse.from_orm(question) for question in rows],
+        QuestionResponse, QUESTION_COLUMNS
+    ),
+    ServiceCase(
+        "QuestionService.search_questions",
+        lambda db, limit, columns=None: QuestionService(db).search_questions(
+            "error OR query OR server", limit=limit, columns=columns
+        ),
+        _search_results,
+        QuestionSearchResult, QUESTION_COLUMNS
+    ),
+    ServiceCase(
+        "AnswerService.get_answers_by_question",
+        lambda db, limit, columns=None: AnswerService(db).get_answers_by_question(
+            WIDE_QUESTION_ID, limit=limit, columns=columns
+        ),
+        lambda rows: [AnswerResponse.from_orm(answer) for answer in rows],
+        AnswerResponse, ANSWER_COLUMNS
+    ),
+    ServiceCase(
+        "AnswerService.get_answers_by_user",
+        lambda db, limit, columns=None: AnswerService(db).get_answers_by_user(
+            WIDE_USER_ID, limit=limit, columns=columns
+        ),
+        lambda rows: [AnswerResponse.from_orm(answer) for answer in rows],
+        AnswerResponse, ANSWER_COLUMNS
+    ),
+    ServiceCase(
+        "UserService.get_all_users",
+        lambda db, limit, columns=None: UserService(db).get_all_users(limit=limit, columns=columns),
+        lambda rows: [UserResponse.from_orm(user) for user in rows],
+        UserResponse, schema_columns(User, UserResponse)
+    ),
+]
+
+
+def generate_wide_rows():
+    """One author with WIDE_ROWS questions, the first of which has WIDE_ROWS answers by them"""
+    yield "users", "wide user", {
+        "user_id": "bench-wide", "username": "bench_wide", "email": "bench-wide@example.com",
+        "password": get_password_hash(BENCH_PASSWORD),
+    }
+    for number in range(WIDE_ROWS):
+        yield "questions", f"wide question {number}", {
+            "question_id": f"bench-wide-q-{number}", "user_id": "bench-wide",
+            "title": f"Wide question {number} about {WORDS[number % len(WORDS)]}",
+            "description": " ".join(WORDS[(number + offset) % len(WORDS)] for offset in range(40)),
+            "tags": ["performance"],
+        }
+    for number in range(WIDE_ROWS):
+        yield "answers", f"wide answer {number}", {
+            "answer_id": f"bench-wide-a-{number}", "question_id": "bench-wide-q-0", "user_id": "bench-wide",
+            "content": " ".join(WORDS[(number + offset) % len(WORDS)] for offset in range(30)),
+        }
+
+
+async def seed_fixtures(scale: SeedScale) -> None:
+    """Seed the dataset and the wide author, each only once"""
+    await seed_dataset(scale)
+    async with async_engine.connect() as conn:
+        answers = await conn.execute(
+            text("SELECT count(*) FROM answers WHERE question_id = :question_id"), {"question_id": WIDE_QUESTION_ID}
+        )
+        if answers.scalar() >= WIDE_ROWS:
+            return
+    print(f"🌱 Seeding an author with {WIDE_ROWS} questions and answers...")
+    await import_rows(generate_wide_rows())
+
+
+class StatementRecorder:
+    """Collects the statements and parameters the engine sends while recording"""
+
+    def __init__(self):
+        self.recording = False
+        self.statements: List[tuple] = []
+        event.listen(async_engine.sync_engine, "before_cursor_execute", self.before_cursor_execute)
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.recording:
+            self.statements.append((statement, parameters))
+
+    def start(self) -> None:
+        self.statements = []
+        self.recording = True
+
+    def stop(self) -> List[tuple]:
+        self.recording = False
+        return self.statements
+
+
+async def measure_once(case: ServiceCase, limit: int, recorder: StatementRecorder) -> Dict[str, Any]:
+    """Seconds spent in each stage of one page of case"""
+    async with AsyncSessionLocal() as db:
+        recorder.start()
+        started = time.perf_counter()
+        rows = await case.call(db, limit)
+        service = time.perf_counter() - started
+        statements = recorder.stop()
+
+        started = time.perf_counter()
+        envelope = create_response(data=case.convert(rows))
+        pydantic = time.perf_counter() - started
+
+    started = time.perf_counter()
+    JSONResponse(jsonable_encoder(envelope))
+    encode = time.perf_counter() - started
+
+    started = time.perf_counter()
+    envelope.model_dump_json()
+    dump_json = time.perf_counter() - started
+
+    async with async_engine.connect() as conn:
+        started = time.perf_counter()
+        for statement, parameters in statements:
+            (await conn.exec_driver_sql(statement, parameters)).all()
+        fetch = time.perf_counter() - started
+
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        render_list(row_items(await case.call(db, limit, case.columns), case.schema))
+        rows_path = time.perf_counter() - started
+
+    return {
+        "rows": len(rows), "fetch": fetch, "orm": max(service - fetch, 0.0), "pydantic": pydantic,
+        "encode": encode, "dump_json": dump_json, "rows_path": rows_path,
+    }
+
+
+async def benchmark_case(case: ServiceCase, limit: int, repeat: int, recorder: StatementRecorder) -> dict:
+    """Median milliseconds per stage over repeat runs, after one warm-up run"""
+    await measure_once(case, limit, recorder)
+    runs = [await measure_once(case, limit, recorder) for _ in range(repeat)]
+    result = {"rows": runs[0]["rows"]}
+    for stage in STAGES:
+        result[f"{stage}_ms"] = round(statistics.median(run[stage] for run in runs) * 1000, 3)
+    result["total_ms"] = round(sum(result[f"{stage}_ms"] for stage in ("fetch", "orm", "pydantic", "encode")), 3)
+    result["us_per_row"] = round(result["total_ms"] * 1000 / result["rows"], 1) if result["rows"] else 0.0
+    return result
+
+
+async def run_benchmarks(args, scale: SeedScale) -> Dict[str, dict]:
+    if not args.skip_seed:
+        await seed_fixtures(scale)
+    recorder = StatementRecorder()
+    results = {}
+    try:
+        print(f"📊 {'method':<44} {'size':>5} {'rows':>5} " + " ".join(f"{stage:>9}" for stage in STAGES)
+              + f" {'total':>9} {'us/row':>8}")
+        for case in CASES:
+            for size in args.sizes:
+                result = await benchmark_case(case, size, args.repeat, recorder)
+                results[f"{case.name}@{size}"] = result
+                print(f"   {case.name:<44} {size:>5} {result['rows']:>5} "
+                      + " ".join(f"{result[f'{stage}_ms']:>9}" for stage in STAGES)
+                      + f" {result['total_ms']:>9} {result['us_per_row']:>8}")
+    finally:
+        await async_engine.dispose()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time the stages of the service methods behind list routes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Page sizes")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Runs per method and size")
+    parser.add_argument("--skip-seed", action="store_true", help="Use the database as it is")
+    add_scale_arguments(parser)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="Relative change flagged as a regression")
+    parser.set_defaults(users=1000)
+    args = parser.parse_args(argv)
+
+    scale = scale_from_arguments(args)
+    print("⏱️ Starting service benchmark (times in ms)...")
+    results = {
+        "meta": run_metadata(sizes=args.sizes, repeat=args.repeat, scale=vars(scale)),
+        "methods": asyncio.run(run_benchmarks(args, scale)),
+    }
+
+    if args.output:
+        write_results(args.output, results)
+    if args.baseline:
+        baseline = read_results(args.baseline)
+        # Single stages of small pages are too noisy to flag; the per-stage numbers are in the table
+        meta = baseline["meta"]
+        print(f"🔍 Comparing with baseline ({meta.get('git_commit')}, {meta.get('timestamp')})")
+        regressions = []
+        for latency_key in ("total_ms", "rows_path_ms"):
+            regressions += compare_results(
+                baseline["methods"], results["methods"], args.threshold, latency_key=latency_key,
+                throughput_key=None, min_delta_ms=MIN_TOTAL_DELTA_MS
+            )
+        if regressions:
+            print(f"❌ {len(regressions)} regressions over {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"   {regression}")
+            return 1
+        print(f"✅ No regressions over {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,10 +7,14 @@ This script checks the actual database schema to see what columns exist
 import asyncio
 from sqlalchemy import text
 from utils.database_helper import async_engine
+from migrations import schema_version, LATEST_VERSION
 
 async def check_schema():
     """Check the actual database schema"""
     
+    version = await schema_version(async_engine)
+    print(f"📋 Schema version: {version or 0} (latest {LATEST_VERSION}; python migrations.py --status lists them)")
+    
     async with async_engine.begin() as conn:
         # Check if users table exists and what columns it has
         result = await conn.execute(text("""
@@ -5,4 +5,26 @@ class UserTypeEnum(str, Enum):
     user = "user"
     admin = "admin"
 
+class VoteTypeEnum(str, Enum):
+    upvote = "upvote"
+    downvote = "downvote"
 
+# Value stored per vote and added to the voted item's score
+VOTE_VALUES = {
+    VoteTypeEnum.upvote: 1,
+    VoteTypeEnum.downvote: -1,
+}
+
+# Tags are lowercase words of letters, digits and + # . - (e.g. c++, c#, node.js)
+TAG_PATTERN = r"^[a-z0-9][a-z0-9+#.\-]{0,34}$"
+MAX_TAGS_PER_QUESTION = 5
+
+class NotificationTypeEnum(str, Enum):
+    answer = "answer"
+    accepted = "accepted"
+    comment = "comment"
+    mention = "mention"
+    vote = "vote"
+
+# Most items a batch create or batch fetch request may carry
+MAX_BATCH_ITEMS = 100
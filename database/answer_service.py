@@ -1,11 +1,31 @@
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import update, delete
+from sqlalchemy import insert, update, delete, or_, case, values, column, Integer
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import aliased
 from models import Answer, User, Question
 from utils.exception_handler import raise_exception
-from schemas.answer_schemas import AnswerCreate, AnswerUpdate
-from typing import List, Optional
-from uuid import UUID
+from utils.pagination import paginate
+from utils.batch import matches_any
+from utils.serialization import select_columns
+from utils.broker import broker, question_topic
+from utils.response_cache import response_cache, QUESTIONS_TAG, user_questions_tag, user_answers_tag
+from consts import NotificationTypeEnum
+from database.feed_service import FeedService
+from database.notification_service import NotificationService
+from schemas.answer_schemas import AnswerCreate, AnswerUpdate, AnswerResponse
+from typing import List, Optional, Tuple
+from collections import Counter
+from uuid import UUID, uuid4
+from datetime import datetime
+
+# Answers are ordered on (created_at, answer_id): oldest first under a question,
+# newest first for a user, each served by its own composite index
+ANSWER_SORT_KEY = (Answer.created_at, Answer.answer_id)
+ANSWER_SORT_TYPES = (datetime, UUID)
+# Highest score first under a question, ties broken by the date order
+ANSWER_SCORE_SORT_KEY = (Answer.score, Answer.created_at, Answer.answer_id)
+ANSWER_SCORE_SORT_TYPES = (int, datetime, UUID)
 
 class AnswerService:
     """Service class for answer-related database operations"""
@@ -13,92 +33,239 @@ class AnswerService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    def _publish(self, event: str, answer: Answer):
+        """Publish committed answer activity to watchers of its question"""
+        broker.publish(question_topic(answer.question_id), event, AnswerResponse.from_orm(answer).model_dump(mode="json"))
+
+    async def _raise_for_failed_write(self, answer_id: UUID, user_id: UUID, message: str,
+                                      accepting: bool = False):
+        """Explain why an ownership-guarded write matched no row"""
+        result = await self.db.execute(
+            select(Answer.user_id, Question.user_id)
+            .join(Question, Answer.question_id == Question.question_id)
+            .filter(Answer.answer_id == answer_id)
+        )
+        row = result.first()
+        raise_exception(row is None, "Answer not found")
+        answer_author_id, question_author_id = row
+        raise_exception(answer_author_id != user_id, message)
+        raise_exception(accepting and question_author_id != user_id, "Only question author can mark answers as accepted")
+
     async def get_answer_by_id(self, answer_id: UUID) -> Optional[Answer]:
         """Get answer by ID"""
         result = await self.db.execute(select(Answer).filter(Answer.answer_id == answer_id))
         return result.scalar_one_or_none()
 
-    async def get_answers_by_question(self, question_id: UUID, skip: int = 0, limit: int = 100) -> List[Answer]:
-        """Get all answers for a specific question"""
-        result = await self.db.execute(
-            select(Answer)
-            .filter(Answer.question_id == question_id)
-            .order_by(Answer.created_at.asc())
-            .offset(skip)
-            .limit(limit)
-        )
-        return result.scalars().all()
+    async def get_answers_by_question(self, question_id: UUID, skip: int = 0, limit: int = 100,
+                                      after: Optional[str] = None, sort: str = "oldest",
+                                      columns: Optional[list] = None) -> List[Answer]:
+        """Get all answers for a specific question, oldest first or by score (plain rows of columns when given)"""
+        query = select(Answer).filter(Answer.question_id == question_id)
+        if sort == "score":
+            query = paginate(query, ANSWER_SCORE_SORT_KEY, ANSWER_SCORE_SORT_TYPES, skip, limit, after)
+        else:
+            query = paginate(query, ANSWER_SORT_KEY, ANSWER_SORT_TYPES, skip, limit, after, descending=False)
+        return await self._fetch(query, columns)
 
-    async def get_answers_by_user(self, user_id: UUID, skip: int = 0, limit: int = 100) -> List[Answer]:
-        """Get all answers by a specific user"""
-        result = await self.db.execute(
-            select(Answer)
-            .filter(Answer.user_id == user_id)
-            .order_by(Answer.created_at.desc())
-            .offset(skip)
-            .limit(limit)
+    async def get_answers_by_user(self, user_id: UUID, skip: int = 0, limit: int = 100,
+                                  after: Optional[str] = None, columns: Optional[list] = None) -> List[Answer]:
+        """Get all answers by a specific user (plain rows of columns when given)"""
+        return await self._fetch(
+            paginate(
+                select(Answer).filter(Answer.user_id == user_id),
+                ANSWER_SORT_KEY, ANSWER_SORT_TYPES, skip, limit, after
+            ),
+            columns
         )
-        return result.scalars().all()
+
+    async def _fetch(self, query, columns: Optional[list] = None) -> list:
+        """Answers selected by query, or plain rows of columns when given"""
+        if columns is None:
+            return (await self.db.execute(query)).scalars().all()
+        return (await self.db.execute(select_columns(query, columns))).all()
 
     async def create_answer(self, answer_data: AnswerCreate, user_id: UUID) -> Answer:
         """Create a new answer"""
-        # Check if question exists
-        question_result = await self.db.execute(
-            select(Question).filter(Question.question_id == answer_data.question_id)
+        # Counting the answer on its question also checks the question exists and
+        # serializes concurrent answers to it until commit
+        result = await self.db.execute(
+            update(Question)
+            .where(Question.question_id == answer_data.question_id)
+            .values(answer_count=Question.answer_count + 1, **Question.bump_version())
+            .returning(Question.user_id, Question.title)
         )
-        question = question_result.scalar_one_or_none()
+        question = result.first()
         raise_exception(question is None, "Question not found")
         
-        new_answer = Answer(
-            question_id=answer_data.question_id,
-            user_id=user_id,
-            content=answer_data.content
+        result = await self.db.execute(
+            insert(Answer)
+            .values(
+                question_id=answer_data.question_id,
+                user_id=user_id,
+                content=answer_data.content
+            )
+            .returning(Answer)
+        )
+        new_answer = result.scalar_one()
+        await FeedService(self.db).record_activity(answer_data.question_id)
+        question_author_id, question_title = question
+        if question_author_id != user_id:
+            await NotificationService(self.db).notify(
+                question_author_id, NotificationTypeEnum.answer, "New answer",
+                f'Your question "{question_title}" has a new answer', related_id=answer_data.question_id
+            )
+        await self.db.commit()
+        self._publish("answer_created", new_answer)
+        
+        await response_cache.invalidate(QUESTIONS_TAG, user_questions_tag(question_author_id), user_answers_tag(user_id))
+        return new_answer
+
+    async def create_answers(self, answers: List[AnswerCreate], user_id: UUID) -> List[Optional[Answer]]:
+        """
+        Create several answers in one transaction: one UPDATE counts them on their
+        questions and one multi-row INSERT adds them. Returns them in the given
+        order, None for answers to questions that do not exist.
+        """
+        counts = Counter(answer.question_id for answer in answers)
+        question_counts = values(
+            column("question_id", PG_UUID(as_uuid=True)), column("answers", Integer), name="question_counts"
+        ).data(sorted(counts.items()))
+        result = await self.db.execute(
+            update(Question)
+            .where(Question.question_id == question_counts.c.question_id)
+            .values(answer_count=Question.answer_count + question_counts.c.answers, **Question.bump_version())
+            .returning(Question.question_id, Question.user_id, Question.title)
+            .execution_options(synchronize_session=False)
         )
+        questions = {question_id: (author_id, title) for question_id, author_id, title in result.all()}
         
-        self.db.add(new_answer)
+        rows = [
+            {"answer_id": uuid4(), "question_id": answer.question_id, "user_id": user_id, "content": answer.content}
+            if answer.question_id in questions else None
+            for answer in answers
+        ]
+        created = {}
+        if questions:
+            result = await self.db.execute(insert(Answer).values([row for row in rows if row]).returning(Answer))
+            created = {answer.answer_id: answer for answer in result.scalars().all()}
+            await FeedService(self.db).rescore_questions(list(questions), active=True)
+        notification_service = NotificationService(self.db)
+        # In recipient order, so concurrent batches take the inbox locks in the same order
+        for question_id, (author_id, title) in sorted(questions.items(), key=lambda item: item[1][0]):
+            if author_id != user_id:
+                count = counts[question_id]
+                await notification_service.notify(
+                    author_id, NotificationTypeEnum.answer, "New answer",
+                    f'Your question "{title}" has a new answer' if count == 1
+                    else f'Your question "{title}" has {count} new answers',
+                    related_id=question_id
+                )
         await self.db.commit()
-        await self.db.refresh(new_answer)
-        return new_answer
+        
+        new_answers = [created[row["answer_id"]] if row else None for row in rows]
+        for answer in created.values():
+            self._publish("answer_created", answer)
+        await response_cache.invalidate(
+            QUESTIONS_TAG, user_answers_tag(user_id),
+            *(user_questions_tag(author_id) for author_id, _ in questions.values())
+        )
+        return new_answers
+
+    async def get_answers_with_authors(self, answer_ids: List[UUID]) -> List[tuple]:
+        """Get (answer, author username) for every existing id in one query"""
+        result = await self.db.execute(
+            select(Answer, User.username)
+            .join(User, Answer.user_id == User.user_id)
+            .filter(matches_any(Answer.answer_id, answer_ids))
+        )
+        return result.all()
 
     async def update_answer(self, answer_id: UUID, answer_data: AnswerUpdate, user_id: UUID) -> Optional[Answer]:
         """Update answer (only by the author)"""
-        answer = await self.get_answer_by_id(answer_id)
-        raise_exception(answer is None, "Answer not found")
-        raise_exception(answer.user_id != user_id, "You can only update your own answers")
-        
         # Update fields
         update_data = {}
         if answer_data.content is not None:
             update_data["content"] = answer_data.content
         if answer_data.is_accepted is not None:
+            update_data["is_accepted"] = answer_data.is_accepted
+        
+        if not update_data:
+            answer = await self.get_answer_by_id(answer_id)
+            raise_exception(answer is None, "Answer not found")
+            raise_exception(answer.user_id != user_id, "You can only update your own answers")
+            return answer
+        
+        conditions = [Answer.answer_id == answer_id, Answer.user_id == user_id]
+        if answer_data.is_accepted:
             # Only question author can mark answer as accepted
-            question_result = await self.db.execute(
-                select(Question).filter(Question.question_id == answer.question_id)
+            conditions.append(
+                select(Question.question_id)
+                .where(Question.question_id == Answer.question_id, Question.user_id == user_id)
+                .exists()
             )
-            question = question_result.scalar_one_or_none()
-            raise_exception(
-                question.user_id != user_id and answer_data.is_accepted,
-                "Only question author can mark answers as accepted"
+        
+        result = await self.db.execute(
+            update(Answer)
+            .where(*conditions)
+            .values(**update_data)
+            .returning(Answer)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        answer = result.scalar_one_or_none()
+        if answer is None:
+            await self._raise_for_failed_write(
+                answer_id, user_id, "You can only update your own answers", accepting=bool(answer_data.is_accepted)
             )
-            update_data["is_accepted"] = answer_data.is_accepted
         
-        if update_data:
+        question_title = None
+        stale_tags = [user_answers_tag(user_id)]
+        if answer_data.is_accepted is not None:
+            question_title, acceptance_tags = await self._set_accepted_answer(answer, answer_data.is_accepted)
+            stale_tags.extend(acceptance_tags)
+        else:
             await self.db.execute(
-                update(Answer).where(Answer.answer_id == answer_id).values(**update_data)
+                update(Question)
+                .where(Question.question_id == answer.question_id)
+                .values(**Question.bump_version())
+                .execution_options(synchronize_session=False)
             )
-            await self.db.commit()
-            await self.db.refresh(answer)
+            # The edit moves the question up the recently active feed
+            stale_tags.append(QUESTIONS_TAG)
+        await FeedService(self.db).record_activity(answer.question_id)
+        if question_title is not None:
+            await self._notify_accepted(answer, question_title, user_id)
         
+        await self.db.commit()
+        self._publish("answer_accepted" if question_title is not None else "answer_updated", answer)
+        await response_cache.invalidate(*stale_tags)
         return answer
 
     async def delete_answer(self, answer_id: UUID, user_id: UUID) -> bool:
         """Delete an answer (only by the author)"""
-        answer = await self.get_answer_by_id(answer_id)
-        raise_exception(answer is None, "Answer not found")
-        raise_exception(answer.user_id != user_id, "You can only delete your own answers")
+        # Delete and uncount in one statement; the accepted_answer_id foreign key
+        # clears the question's pointer if this was its accepted answer
+        deleted = (
+            delete(Answer)
+            .where(Answer.answer_id == answer_id, Answer.user_id == user_id)
+            .returning(Answer.question_id)
+            .cte("deleted_answer")
+        )
+        result = await self.db.execute(
+            update(Question)
+            .where(Question.question_id == deleted.c.question_id)
+            .values(answer_count=Question.answer_count - 1, **Question.bump_version())
+            .returning(Question.question_id, Question.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        question = result.first()
+        if question is None:
+            await self._raise_for_failed_write(answer_id, user_id, "You can only delete your own answers")
+        question_id, question_author_id = question
+        await FeedService(self.db).record_activity(question_id, active=False)
         
-        await self.db.execute(delete(Answer).where(Answer.answer_id == answer_id))
         await self.db.commit()
+        broker.publish(question_topic(question_id), "answer_deleted", {"answer_id": answer_id, "question_id": question_id})
+        await response_cache.invalidate(QUESTIONS_TAG, user_questions_tag(question_author_id), user_answers_tag(user_id))
         return True
 
     async def get_answer_with_author(self, answer_id: UUID) -> Optional[dict]:
@@ -120,39 +287,106 @@ class AnswerService:
     async def get_accepted_answer_for_question(self, question_id: UUID) -> Optional[Answer]:
         """Get the accepted answer for a question"""
         result = await self.db.execute(
-            select(Answer).filter(
-                Answer.question_id == question_id,
-                Answer.is_accepted == True
-            )
+            select(Answer)
+            .join(Question, Question.accepted_answer_id == Answer.answer_id)
+            .filter(Question.question_id == question_id)
         )
         return result.scalar_one_or_none()
 
+    async def _notify_accepted(self, answer: Answer, question_title: str, accepted_by: UUID):
+        """Tell an answer's author it was accepted, unless they accepted it themselves (caller commits)"""
+        if answer.user_id != accepted_by:
+            await NotificationService(self.db).notify(
+                answer.user_id, NotificationTypeEnum.accepted, "Answer accepted",
+                f'Your answer to "{question_title}" was accepted', related_id=answer.question_id
+            )
+
+    async def _set_accepted_answer(self, answer: Answer, is_accepted: bool) -> Tuple[Optional[str], List[str]]:
+        """
+        Keep the question's accepted answer (flags and pointer) consistent after an update.
+        Returns the question's title when the answer was accepted, and the response cache
+        tags of the listings the change shows up in.
+        """
+        tags = [QUESTIONS_TAG]
+        if is_accepted:
+            result = await self.db.execute(
+                update(Answer)
+                .where(
+                    Answer.question_id == answer.question_id,
+                    Answer.answer_id != answer.answer_id,
+                    Answer.is_accepted == True
+                )
+                .values(is_accepted=False)
+                .returning(Answer.user_id)
+                .execution_options(synchronize_session=False)
+            )
+            tags.extend(user_answers_tag(author_id) for author_id in result.scalars().all())
+            result = await self.db.execute(
+                update(Question)
+                .where(Question.question_id == answer.question_id)
+                .values(accepted_answer_id=answer.answer_id, **Question.bump_version())
+                .returning(Question.title, Question.user_id)
+                .execution_options(synchronize_session=False)
+            )
+            question_title, question_author_id = result.one()
+            tags.append(user_questions_tag(question_author_id))
+            return question_title, tags
+        else:
+            result = await self.db.execute(
+                update(Question)
+                .where(Question.question_id == answer.question_id)
+                .values(
+                    accepted_answer_id=case(
+                        (Question.accepted_answer_id == answer.answer_id, None),
+                        else_=Question.accepted_answer_id
+                    ),
+                    **Question.bump_version()
+                )
+                .returning(Question.user_id)
+                .execution_options(synchronize_session=False)
+            )
+            tags.append(user_questions_tag(result.scalar_one()))
+            return None, tags
+
     async def mark_answer_as_accepted(self, answer_id: UUID, user_id: UUID) -> Optional[Answer]:
         """Mark an answer as accepted (only by question author)"""
-        answer = await self.get_answer_by_id(answer_id)
-        raise_exception(answer is None, "Answer not found")
-        
-        # Check if user is the question author
-        question_result = await self.db.execute(
-            select(Question).filter(Question.question_id == answer.question_id)
-        )
-        question = question_result.scalar_one_or_none()
-        raise_exception(question.user_id != user_id, "Only question author can mark answers as accepted")
-        
-        # Unmark any previously accepted answers for this question
-        await self.db.execute(
+        # One UPDATE ... FROM questions flips the target answer on and any previously
+        # accepted answer off, but only when the caller wrote the question
+        target = aliased(Answer)
+        result = await self.db.execute(
             update(Answer)
-            .where(Answer.question_id == answer.question_id)
-            .values(is_accepted=False)
+            .where(
+                Answer.question_id == Question.question_id,
+                Question.user_id == user_id,
+                Question.question_id == (
+                    select(target.question_id).where(target.answer_id == answer_id).scalar_subquery()
+                ),
+                or_(Answer.answer_id == answer_id, Answer.is_accepted == True)
+            )
+            .values(is_accepted=(Answer.answer_id == answer_id))
+            .returning(Answer)
+            .execution_options(synchronize_session=False, populate_existing=True)
         )
+        flipped = result.scalars().all()
+        answer = next((row for row in flipped if row.answer_id == answer_id), None)
+        if answer is None:
+            answer_exists = await self.get_answer_by_id(answer_id)
+            raise_exception(answer_exists is None, "Answer not found")
+            raise_exception(True, "Only question author can mark answers as accepted")
         
-        # Mark this answer as accepted
-        await self.db.execute(
-            update(Answer)
-            .where(Answer.answer_id == answer_id)
-            .values(is_accepted=True)
+        result = await self.db.execute(
+            update(Question)
+            .where(Question.question_id == answer.question_id)
+            .values(accepted_answer_id=answer_id, **Question.bump_version())
+            .returning(Question.title)
+            .execution_options(synchronize_session=False)
         )
-        
+        question_title = result.scalar_one()
+        await FeedService(self.db).record_activity(answer.question_id)
+        await self._notify_accepted(answer, question_title, user_id)
         await self.db.commit()
-        await self.db.refresh(answer)
-        return answer 
\ No newline at end of file
+        self._publish("answer_accepted", answer)
+        await response_cache.invalidate(
+            QUESTIONS_TAG, user_questions_tag(user_id), *(user_answers_tag(row.user_id) for row in flipped)
+        )
+        return answer
@@ -0,0 +1,43 @@
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert
+from models import Question, QuestionScore
+from utils.ranking import hot_score, refresh_hot_scores
+from typing import List
+from uuid import UUID
+from datetime import datetime
+
+class FeedService:
+    """Service class keeping the question_scores feed rankings current"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def add_questions(self, question_ids: List[UUID]):
+        """Rank newly created questions (caller commits)"""
+        await self.db.execute(
+            insert(QuestionScore).from_select(
+                ["question_id", "hot_score", "last_activity_at"],
+                select(Question.question_id, hot_score(), Question.created_at)
+                .where(Question.question_id.in_(question_ids))
+            )
+        )
+
+    async def record_activity(self, question_id: UUID, active: bool = True):
+        """
+        Rescore a question after it or its answers changed (caller commits).
+        active moves it to the top of the recently active feed.
+        """
+        statement = refresh_hot_scores(QuestionScore.question_id == question_id)
+        if active:
+            statement = statement.values(last_activity_at=datetime.utcnow())
+        await self.db.execute(statement)
+
+    async def rescore_questions(self, question_ids: List[UUID], active: bool = False):
+        """Rescore several questions whose counters changed, optionally as activity (caller commits)"""
+        if not question_ids:
+            return
+        statement = refresh_hot_scores(QuestionScore.question_id.in_(sorted(question_ids)))
+        if active:
+            statement = statement.values(last_activity_at=datetime.utcnow())
+        await self.db.execute(statement)
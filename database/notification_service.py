@@ -0,0 +1,125 @@
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, update, delete, func, text
+from models import Notification
+from consts import NotificationTypeEnum
+from schemas.notification_schemas import NotificationResponse
+from utils.notifications import (
+    send_notification_event, NOTIFICATION_INBOX_SIZE, NOTIFICATION_EVENT, UNREAD_EVENT
+)
+from typing import List, Optional
+from uuid import UUID
+
+class NotificationService:
+    """Service class for notification-related database operations"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def notify(self, user_id: UUID, type: NotificationTypeEnum, title: str, message: str,
+                     related_id: Optional[UUID] = None) -> Notification:
+        """
+        Add a notification to a user's inbox, dropping those beyond the inbox
+        size, and announce it to their open streams once committed (caller commits).
+
+        seq comes from an identity column, so it is drawn at INSERT, not at
+        commit. Writers to one inbox take a transaction-level lock on it first,
+        so its seqs commit in order and streams can resume after the last one
+        they sent. Callers notifying several users do it in user_id order.
+        """
+        await self.db.execute(
+            text("SELECT pg_advisory_xact_lock(hashtextextended(:inbox, 0))"), {"inbox": f"notifications:{user_id}"}
+        )
+        result = await self.db.execute(
+            insert(Notification)
+            .values(user_id=user_id, type=type, title=title, message=message, related_id=related_id)
+            .returning(Notification)
+        )
+        notification = result.scalar_one()
+        kept = (
+            select(Notification.id)
+            .where(Notification.user_id == user_id)
+            .order_by(Notification.seq.desc())
+            .limit(NOTIFICATION_INBOX_SIZE)
+        )
+        await self.db.execute(
+            delete(Notification)
+            .where(Notification.user_id == user_id, Notification.id.not_in(kept))
+            .execution_options(synchronize_session=False)
+        )
+        await send_notification_event(
+            self.db, NOTIFICATION_EVENT, user_id,
+            notification=self.event_data(notification), unread=await self.unread_count(user_id)
+        )
+        return notification
+
+    @staticmethod
+    def event_data(notification: Notification) -> dict:
+        """A notification as streams send it"""
+        return {**NotificationResponse.from_orm(notification).model_dump(mode="json"), "seq": notification.seq}
+
+    async def get_notifications(self, user_id: UUID, limit: int = NOTIFICATION_INBOX_SIZE) -> List[Notification]:
+        """Get a user's notifications, newest first"""
+        result = await self.db.execute(
+            select(Notification)
+            .where(Notification.user_id == user_id)
+            .order_by(Notification.seq.desc())
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    async def get_notifications_after(self, user_id: UUID, after_seq: int) -> List[Notification]:
+        """Get a user's notifications newer than after_seq, oldest first"""
+        result = await self.db.execute(
+            select(Notification)
+            .where(Notification.user_id == user_id, Notification.seq > after_seq)
+            .order_by(Notification.seq)
+        )
+        return result.scalars().all()
+
+    async def last_seq(self, user_id: UUID) -> int:
+        """Sequence number of a user's newest notification, 0 when there is none"""
+        result = await self.db.execute(
+            select(func.max(Notification.seq)).where(Notification.user_id == user_id)
+        )
+        return result.scalar() or 0
+
+    async def unread_count(self, user_id: UUID) -> int:
+        """Number of unread notifications in a user's inbox"""
+        result = await self.db.execute(
+            select(func.count()).select_from(Notification)
+            .where(Notification.user_id == user_id, Notification.is_read.is_(False))
+        )
+        return result.scalar()
+
+    async def mark_read(self, user_id: UUID, notification_id: UUID) -> Optional[Notification]:
+        """Mark one notification read, returning it, or None when it is not in the user's inbox"""
+        result = await self.db.execute(
+            update(Notification)
+            .where(Notification.id == notification_id, Notification.user_id == user_id)
+            .values(is_read=True)
+            .returning(Notification)
+            .execution_options(synchronize_session=False)
+        )
+        notification = result.scalar_one_or_none()
+        if notification is not None:
+            await self._send_unread_count(user_id)
+        await self.db.commit()
+        return notification
+
+    async def mark_all_read(self, user_id: UUID) -> int:
+        """Mark every notification read, returning how many were unread"""
+        result = await self.db.execute(
+            update(Notification)
+            .where(Notification.user_id == user_id, Notification.is_read.is_(False))
+            .values(is_read=True)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            await self._send_unread_count(user_id)
+        await self.db.commit()
+        return result.rowcount
+
+    async def _send_unread_count(self, user_id: UUID):
+        """Tell the user's open streams their new unread count once committed"""
+        await send_notification_event(self.db, UNREAD_EVENT, user_id, unread=await self.unread_count(user_id))
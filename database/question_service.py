@@ -1,88 +1,309 @@
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import update, delete
-from models import Question, User
+from sqlalchemy import insert, update, delete, func, union, Float, literal_column
+from sqlalchemy.dialects.postgresql import JSON, aggregate_order_by
+from sqlalchemy.orm import aliased, contains_eager
+from models import Question, Answer, User, QuestionTag, QuestionScore
 from utils.exception_handler import raise_exception
+from utils.pagination import paginate
+from utils.batch import matches_any
+from utils.serialization import select_columns
+from utils.response_cache import response_cache, QUESTIONS_TAG, user_questions_tag
+from database.answer_service import ANSWER_SORT_KEY, ANSWER_SORT_TYPES
+from database.tag_service import TagService
+from database.feed_service import FeedService
+from utils.search import build_search_vector, build_search_query, highlight, TITLE_HEADLINE_OPTIONS
 from schemas.question_schemas import QuestionCreate, QuestionUpdate
-from typing import List, Optional
-from uuid import UUID
+from typing import List, Optional, Tuple
+from uuid import UUID, uuid4
 from datetime import datetime
 
+# Listings are ordered newest first on (created_at, question_id), which the
+# composite indexes on questions serve for both offset and cursor pages
+QUESTION_SORT_KEY = (Question.created_at, Question.question_id)
+QUESTION_SORT_TYPES = (datetime, UUID)
+
+# Tag listings walk question_tags in the same order, off ix_question_tags_tag_id_created_at
+TAG_SORT_KEY = (QuestionTag.question_created_at, QuestionTag.question_id)
+
+# Feed orders: sort key, cursor value types and whether the highest value comes
+# first. Each is read off its own index: the created_at ones for newest/oldest,
+# ix_questions_score / ix_questions_answer_count, and the question_scores ones.
+FEED_SORTS = {
+    "newest": (QUESTION_SORT_KEY, QUESTION_SORT_TYPES, True),
+    "oldest": (QUESTION_SORT_KEY, QUESTION_SORT_TYPES, False),
+    "hot": ((QuestionScore.hot_score, QuestionScore.question_id), (float, UUID), True),
+    "active": ((QuestionScore.last_activity_at, QuestionScore.question_id), (datetime, UUID), True),
+    "most_voted": ((Question.score, Question.created_at, Question.question_id), (int, datetime, UUID), True),
+    "most_answered": ((Question.answer_count, Question.created_at, Question.question_id), (int, datetime, UUID), True),
+}
+
+def feed_cursor_attributes(sort: str, rows: bool = False) -> Tuple[str, ...]:
+    """Attributes of a listed Question (or of a plain row, selecting the sort key) that make up its cursor"""
+    sort_key = FEED_SORTS[sort][0]
+    return tuple(
+        f"feed_score.{column.key}" if column.class_ is QuestionScore and not rows else column.key
+        for column in sort_key
+    )
+
+# Search results are ordered by relevance, ties broken by the listing order
+SEARCH_SORT_TYPES = (float, datetime, UUID)
+
+def answer_json(answer, author_username):
+    """json_build_object expression shaped like AnswerWithAuthor"""
+    return func.json_build_object(
+        "answer_id", answer.answer_id,
+        "question_id", answer.question_id,
+        "user_id", answer.user_id,
+        "content", answer.content,
+        "is_accepted", answer.is_accepted,
+        "score", answer.score,
+        "created_at", answer.created_at,
+        "author_username", author_username
+    )
+
 class QuestionService:
     """Service class for question-related database operations"""
     
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    async def _raise_for_missing_or_foreign(self, question_id: UUID, user_id: UUID, message: str):
+        """Explain why an ownership-guarded write matched no row: missing question or not the author"""
+        result = await self.db.execute(select(Question.user_id).filter(Question.question_id == question_id))
+        owner_id = result.scalar_one_or_none()
+        raise_exception(owner_id is None, "Question not found")
+        raise_exception(owner_id != user_id, message)
+
     async def get_question_by_id(self, question_id: UUID) -> Optional[Question]:
         """Get question by ID"""
         result = await self.db.execute(select(Question).filter(Question.question_id == question_id))
         return result.scalar_one_or_none()
 
-    async def get_all_questions(self, skip: int = 0, limit: int = 100) -> List[Question]:
-        """Get all questions with pagination"""
-        result = await self.db.execute(
-            select(Question).order_by(Question.created_at.desc()).offset(skip).limit(limit)
-        )
-        return result.scalars().all()
+    async def get_all_questions(self, skip: int = 0, limit: int = 100, after: Optional[str] = None,
+                                unanswered: bool = False, tags: Optional[List[str]] = None,
+                                match_all_tags: bool = True, sort: str = "newest",
+                                columns: Optional[list] = None) -> List[Question]:
+        """
+        Get all questions with offset or cursor pagination in one of the FEED_SORTS
+        orders, optionally only unanswered or tagged ones.
+        Hot and active listings come with feed_score loaded. With columns, plain
+        rows of those columns are returned instead (include the sort key for cursors).
+        """
+        if tags and sort == "newest":
+            return await self._get_tagged_questions(tags, match_all_tags, skip, limit, after, unanswered, columns)
+        
+        sort_key, sort_types, descending = FEED_SORTS[sort]
+        query = select(Question)
+        if sort_key[0].class_ is QuestionScore:
+            query = query.join(Question.feed_score)
+            if columns is None:
+                query = query.options(contains_eager(Question.feed_score))
+        if unanswered:
+            # Served by the partial index ix_questions_unanswered in date order
+            query = query.filter(Question.answer_count == 0)
+        if tags:
+            # Other orders check the copied tag names on the rows they walk
+            query = query.filter(Question.tags.contains(tags) if match_all_tags else Question.tags.overlap(tags))
+        query = paginate(query, sort_key, sort_types, skip, limit, after, descending=descending)
+        return await self._fetch(query, columns)
 
-    async def get_questions_by_user(self, user_id: UUID, skip: int = 0, limit: int = 100) -> List[Question]:
-        """Get questions by user ID"""
-        result = await self.db.execute(
+    async def _fetch(self, query, columns: Optional[list] = None) -> list:
+        """Questions selected by query, or plain rows of columns when given"""
+        if columns is None:
+            return (await self.db.execute(query)).scalars().all()
+        return (await self.db.execute(select_columns(query, columns))).all()
+
+    async def _get_tagged_questions(self, tags: List[str], match_all: bool, skip: int, limit: int,
+                                    after: Optional[str], unanswered: bool,
+                                    columns: Optional[list] = None) -> List[Question]:
+        """
+        Get a page of questions carrying all (or any) of tags, newest first.
+
+        Pages are read off each tag's (tag_id, question_created_at, question_id)
+        index and only the page's questions are fetched. For all tags the least
+        used tag's index is walked and the others are probed by primary key; for
+        any tag each tag's index contributes at most one page and UNION merges them.
+        """
+        found = await TagService(self.db).get_tags_by_name(tags)
+        if not found or (match_all and len(found) < len(set(tags))):
+            return []
+
+        def tagged(tag):
+            query = select(QuestionTag.question_id, QuestionTag.question_created_at).where(QuestionTag.tag_id == tag.tag_id)
+            if unanswered:
+                query = query.join(Question, Question.question_id == QuestionTag.question_id).where(Question.answer_count == 0)
+            return query
+
+        if match_all or len(found) == 1:
+            driving, *others = sorted(found, key=lambda tag: tag.usage_count)
+            query = tagged(driving)
+            for other in others:
+                other_tag = aliased(QuestionTag)
+                query = query.where(
+                    select(other_tag.question_id)
+                    .where(other_tag.question_id == QuestionTag.question_id, other_tag.tag_id == other.tag_id)
+                    .exists()
+                )
+            page = paginate(query, TAG_SORT_KEY, QUESTION_SORT_TYPES, skip, limit, after).subquery("page")
+        else:
+            branch_limit = limit if after else skip + limit
+            merged = union(*(
+                paginate(tagged(tag), TAG_SORT_KEY, QUESTION_SORT_TYPES, 0, branch_limit, after) for tag in found
+            )).subquery("merged")
+            page = (
+                select(merged)
+                .order_by(merged.c.question_created_at.desc(), merged.c.question_id.desc())
+                .offset(0 if after else skip)
+                .limit(limit)
+                .subquery("page")
+            )
+
+        return await self._fetch(
             select(Question)
-            .filter(Question.user_id == user_id)
-            .order_by(Question.created_at.desc())
-            .offset(skip)
-            .limit(limit)
+            .join(page, Question.question_id == page.c.question_id)
+            .order_by(page.c.question_created_at.desc(), page.c.question_id.desc()),
+            columns
+        )
+
+    async def get_questions_by_user(self, user_id: UUID, skip: int = 0, limit: int = 100,
+                                    after: Optional[str] = None, columns: Optional[list] = None) -> List[Question]:
+        """Get questions by user ID (plain rows of columns when given)"""
+        return await self._fetch(
+            paginate(
+                select(Question).filter(Question.user_id == user_id),
+                QUESTION_SORT_KEY, QUESTION_SORT_TYPES, skip, limit, after
+            ),
+            columns
         )
-        return result.scalars().all()
 
     async def create_question(self, question_data: QuestionCreate, user_id: UUID) -> Question:
         """Create a new question"""
-        new_question = Question(
-            user_id=user_id,
-            title=question_data.title,
-            description=question_data.description
+        result = await self.db.execute(
+            insert(Question)
+            .values(
+                user_id=user_id,
+                title=question_data.title,
+                description=question_data.description,
+                tags=question_data.tags,
+                search_vector=build_search_vector(question_data.title, question_data.description)
+            )
+            .returning(Question)
         )
-        
-        self.db.add(new_question)
+        new_question = result.scalar_one()
+        await TagService(self.db).add_question_tags(new_question.question_id, new_question.created_at, question_data.tags)
+        await FeedService(self.db).add_questions([new_question.question_id])
         await self.db.commit()
-        await self.db.refresh(new_question)
+        await response_cache.invalidate(QUESTIONS_TAG, user_questions_tag(user_id))
         return new_question
 
+    async def create_questions(self, questions: List[QuestionCreate], user_id: UUID) -> List[Question]:
+        """Create several questions in one transaction with a multi-row INSERT, in the given order"""
+        rows = [
+            {
+                "question_id": uuid4(),
+                "user_id": user_id,
+                "title": question.title,
+                "description": question.description,
+                "tags": question.tags,
+                "search_vector": build_search_vector(question.title, question.description)
+            }
+            for question in questions
+        ]
+        result = await self.db.execute(insert(Question).values(rows).returning(Question))
+        created = {question.question_id: question for question in result.scalars().all()}
+        new_questions = [created[row["question_id"]] for row in rows]
+        await TagService(self.db).add_tags_to_questions(
+            [(question.question_id, question.created_at, question.tags) for question in new_questions]
+        )
+        await FeedService(self.db).add_questions(list(created))
+        await self.db.commit()
+        await response_cache.invalidate(QUESTIONS_TAG, user_questions_tag(user_id))
+        return new_questions
+
     async def update_question(self, question_id: UUID, question_data: QuestionUpdate, user_id: UUID) -> Optional[Question]:
         """Update question (only by the author)"""
-        question = await self.get_question_by_id(question_id)
-        raise_exception(question is None, "Question not found")
-        raise_exception(question.user_id != user_id, "You can only update your own questions")
-        
         # Update fields
         update_data = {}
         if question_data.title is not None:
             update_data["title"] = question_data.title
         if question_data.description is not None:
             update_data["description"] = question_data.description
+        if question_data.tags is not None:
+            update_data["tags"] = question_data.tags
         
-        if update_data:
-            update_data["updated_at"] = datetime.utcnow()
-            await self.db.execute(
-                update(Question).where(Question.question_id == question_id).values(**update_data)
+        if not update_data:
+            question = await self.get_question_by_id(question_id)
+            raise_exception(question is None, "Question not found")
+            raise_exception(question.user_id != user_id, "You can only update your own questions")
+            return question
+        
+        previous_tags = None
+        if question_data.tags is not None:
+            # Lock the row so concurrent tag edits diff against the tags they replace
+            result = await self.db.execute(
+                select(Question.tags)
+                .where(Question.question_id == question_id, Question.user_id == user_id)
+                .with_for_update()
             )
-            await self.db.commit()
-            await self.db.refresh(question)
+            previous_tags = result.scalar_one_or_none()
+            if previous_tags is None:
+                await self._raise_for_missing_or_foreign(question_id, user_id, "You can only update your own questions")
+        
+        update_data["updated_at"] = datetime.utcnow()
+        update_data.update(Question.bump_version())
+        update_data["search_vector"] = build_search_vector(
+            update_data.get("title", Question.title),
+            update_data.get("description", Question.description)
+        )
+        # Ownership is part of the WHERE clause; no row back means missing or not the author
+        result = await self.db.execute(
+            update(Question)
+            .where(Question.question_id == question_id, Question.user_id == user_id)
+            .values(**update_data)
+            .returning(Question)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        question = result.scalar_one_or_none()
+        if question is None:
+            await self._raise_for_missing_or_foreign(question_id, user_id, "You can only update your own questions")
         
+        if previous_tags is not None:
+            tag_service = TagService(self.db)
+            await tag_service.remove_question_tags(question_id, [tag for tag in previous_tags if tag not in question.tags])
+            await tag_service.add_question_tags(
+                question_id, question.created_at, [tag for tag in question.tags if tag not in previous_tags]
+            )
+        await FeedService(self.db).record_activity(question_id)
+        
+        await self.db.commit()
+        await response_cache.invalidate(QUESTIONS_TAG, user_questions_tag(user_id))
         return question
 
     async def delete_question(self, question_id: UUID, user_id: UUID) -> bool:
         """Delete a question (only by the author)"""
-        question = await self.get_question_by_id(question_id)
-        raise_exception(question is None, "Question not found")
-        raise_exception(question.user_id != user_id, "You can only delete your own questions")
+        await TagService(self.db).uncount_deleted_questions(
+            Question.question_id == question_id, Question.user_id == user_id
+        )
+        result = await self.db.execute(
+            delete(Question)
+            .where(Question.question_id == question_id, Question.user_id == user_id)
+            .returning(Question.question_id)
+        )
+        if result.scalar_one_or_none() is None:
+            await self._raise_for_missing_or_foreign(question_id, user_id, "You can only delete your own questions")
         
-        await self.db.execute(delete(Question).where(Question.question_id == question_id))
         await self.db.commit()
+        await response_cache.invalidate(QUESTIONS_TAG, user_questions_tag(user_id))
         return True
 
+    async def get_question_validators(self, question_id: UUID) -> Optional[tuple]:
+        """Get a question's (version, modified_at) without loading it, or None when it does not exist"""
+        result = await self.db.execute(
+            select(Question.version, Question.modified_at).filter(Question.question_id == question_id)
+        )
+        return result.first()
+
     async def get_question_with_author(self, question_id: UUID) -> Optional[dict]:
         """Get question with author information"""
         result = await self.db.execute(
@@ -99,16 +320,114 @@ class QuestionService:
             }
         return None
 
-    async def search_questions(self, search_term: str, skip: int = 0, limit: int = 100) -> List[Question]:
-        """Search questions by title or description"""
+    async def get_questions_with_authors(self, question_ids: List[UUID]) -> List[tuple]:
+        """Get (question, author username) for every existing id in one query"""
         result = await self.db.execute(
-            select(Question)
-            .filter(
-                (Question.title.ilike(f"%{search_term}%")) |
-                (Question.description.ilike(f"%{search_term}%"))
+            select(Question, User.username)
+            .join(User, Question.user_id == User.user_id)
+            .filter(matches_any(Question.question_id, question_ids))
+        )
+        return result.all()
+
+    async def get_question_detail(self, question_id: UUID, answers_skip: int = 0, answers_limit: int = 100,
+                                  answers_after: Optional[str] = None) -> Optional[dict]:
+        """
+        Get a question with its author, a page of answers with their authors and the
+        accepted answer, all in one SQL statement.
+
+        Answers are aggregated with json_agg in scalar subqueries, so the page is
+        loaded with the question instead of one lookup per answer author.
+        """
+        answer_author = aliased(User)
+        answers_page = paginate(
+            select(
+                Answer.answer_id, Answer.question_id, Answer.user_id, Answer.content,
+                Answer.is_accepted, Answer.score, Answer.created_at, answer_author.username.label("author_username")
+            )
+            .join(answer_author, Answer.user_id == answer_author.user_id)
+            .filter(Answer.question_id == question_id),
+            ANSWER_SORT_KEY, ANSWER_SORT_TYPES, answers_skip, answers_limit, answers_after, descending=False
+        ).subquery("answers_page")
+        answers = select(
+            func.coalesce(
+                func.json_agg(aggregate_order_by(
+                    answer_json(answers_page.c, answers_page.c.author_username),
+                    answers_page.c.created_at, answers_page.c.answer_id
+                )),
+                literal_column("'[]'::json"),
+                type_=JSON
+            )
+        ).scalar_subquery()
+
+        accepted_author = aliased(User)
+        accepted_answer = (
+            select(answer_json(Answer, accepted_author.username))
+            .join(accepted_author, Answer.user_id == accepted_author.user_id)
+            .filter(Answer.answer_id == Question.accepted_answer_id)
+            .scalar_subquery()
+        )
+
+        result = await self.db.execute(
+            select(Question, User.username, answers, accepted_answer.cast(JSON))
+            .join(User, Question.user_id == User.user_id)
+            .filter(Question.question_id == question_id)
+        )
+        row = result.first()
+        if row is None:
+            return None
+        question, author_username, answer_rows, accepted = row
+        return {
+            "question": question,
+            "author_username": author_username,
+            "answers": answer_rows,
+            "accepted_answer": accepted
+        }
+
+    async def search_questions(self, search_term: str, skip: int = 0, limit: int = 100,
+                               after: Optional[str] = None, tags: Optional[List[str]] = None,
+                               match_all_tags: bool = True, columns: Optional[list] = None) -> List[dict]:
+        """
+        Full-text search over question titles and descriptions.
+
+        Matches are found through the GIN index on search_vector and ranked with
+        ts_rank (title hits weigh more than description hits). Highlighting runs
+        only on the rows of the requested page. With columns, plain rows of
+        those columns plus rank, title_highlight and snippet are returned.
+        """
+        query = build_search_query(search_term)
+        if query is None:
+            return []
+
+        rank = func.ts_rank(Question.search_vector, query, type_=Float)
+        matches = select(Question.question_id, Question.created_at, rank.label("rank")).filter(
+            Question.search_vector.op("@@")(query)
+        )
+        if tags:
+            # Checked on the matching rows' copied tag names
+            matches = matches.filter(Question.tags.contains(tags) if match_all_tags else Question.tags.overlap(tags))
+        page = paginate(
+            matches,
+            (rank, Question.created_at, Question.question_id), SEARCH_SORT_TYPES, skip, limit, after
+        ).subquery()
+
+        result = await self.db.execute(
+            select(
+                *(columns if columns is not None else [Question]),
+                page.c.rank.label("rank"),
+                highlight(Question.title, query, TITLE_HEADLINE_OPTIONS).label("title_highlight"),
+                highlight(Question.description, query).label("snippet")
             )
-            .order_by(Question.created_at.desc())
-            .offset(skip)
-            .limit(limit)
+            .join(page, Question.question_id == page.c.question_id)
+            .order_by(page.c.rank.desc(), page.c.created_at.desc(), page.c.question_id.desc())
         )
-        return result.scalars().all() 
\ No newline at end of file
+        if columns is not None:
+            return result.all()
+        return [
+            {
+                "question": question,
+                "rank": question_rank,
+                "title_highlight": title_highlight,
+                "snippet": snippet
+            }
+            for question, question_rank, title_highlight, snippet in result.all()
+        ]
@@ -0,0 +1,87 @@
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import update, delete, func
+from models import Tag, QuestionTag, Question
+from typing import List, Tuple
+from collections import Counter
+from uuid import UUID
+from datetime import datetime
+
+class TagService:
+    """Service class for tag-related database operations"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def add_question_tags(self, question_id: UUID, question_created_at: datetime, names: List[str]):
+        """Attach tags to a question, creating missing tags and counting the use (caller commits)"""
+        await self.add_tags_to_questions([(question_id, question_created_at, names)])
+
+    async def add_tags_to_questions(self, questions: List[Tuple[UUID, datetime, List[str]]]):
+        """Attach tags to several (question_id, created_at, names) questions in two statements (caller commits)"""
+        uses = Counter(name for _, _, names in questions for name in names)
+        if not uses:
+            return
+        # Tags are upserted in name order so concurrent writers lock tag rows in the same order
+        stmt = insert(Tag).values([{"name": name, "usage_count": uses[name]} for name in sorted(uses)])
+        result = await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[Tag.name],
+                set_={"usage_count": Tag.usage_count + stmt.excluded.usage_count}
+            ).returning(Tag.name, Tag.tag_id)
+        )
+        tag_ids = dict(result.all())
+        await self.db.execute(
+            insert(QuestionTag).values([
+                {"question_id": question_id, "tag_id": tag_ids[name], "question_created_at": created_at}
+                for question_id, created_at, names in questions for name in names
+            ])
+        )
+
+    async def remove_question_tags(self, question_id: UUID, names: List[str]):
+        """Detach tags from a question and uncount the use (caller commits)"""
+        if not names:
+            return
+        result = await self.db.execute(
+            update(Tag)
+            .where(Tag.name.in_(sorted(names)))
+            .values(usage_count=Tag.usage_count - 1)
+            .returning(Tag.tag_id)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.execute(
+            delete(QuestionTag)
+            .where(QuestionTag.question_id == question_id, QuestionTag.tag_id.in_(result.scalars().all()))
+        )
+
+    async def uncount_deleted_questions(self, *conditions):
+        """Uncount the tags of the questions matching conditions, before they are deleted (caller commits)"""
+        used = (
+            select(QuestionTag.tag_id, func.count().label("uses"))
+            .join(Question, Question.question_id == QuestionTag.question_id)
+            .where(*conditions)
+            .group_by(QuestionTag.tag_id)
+            .subquery()
+        )
+        await self.db.execute(
+            update(Tag)
+            .where(Tag.tag_id == used.c.tag_id)
+            .values(usage_count=Tag.usage_count - used.c.uses)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def get_tags_by_name(self, names: List[str]) -> List[Tag]:
+        """Get the existing tags among names"""
+        result = await self.db.execute(select(Tag).where(Tag.name.in_(names)))
+        return result.scalars().all()
+
+    async def get_popular_tags(self, limit: int = 20) -> List[Tag]:
+        """Get the most used tags, read off the maintained usage counts"""
+        result = await self.db.execute(
+            select(Tag)
+            .where(Tag.usage_count > 0)
+            .order_by(Tag.usage_count.desc(), Tag.name)
+            .limit(limit)
+        )
+        return result.scalars().all()
@@ -1,15 +1,40 @@
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import update, delete
-from models import User
+from sqlalchemy import insert, update, delete, case, or_, func
+from sqlalchemy.exc import IntegrityError
+from models import User, Question, Answer, QuestionVote, AnswerVote
 from consts import UserTypeEnum
 from consts import UserTypeEnum as UserRole
-from utils.auth_helper import get_password_hash, verify_password
+from utils.auth_helper import get_password_hash_async, verify_password_async, token_versions, announce_user_change
 from utils.exception_handler import raise_exception
+from utils.batch import matches_any
+from utils.serialization import select_columns
+from utils.user_cache import user_cache
+from utils.vote_aggregator import vote_aggregator
+from utils.response_cache import response_cache, ALL_TAG
+from database.tag_service import TagService
+from database.feed_service import FeedService
 from schemas.user_schemas import UserCreate, UserUpdate
 from typing import List, Optional
 from uuid import UUID
 
+# Unique constraints PostgreSQL names for the unique columns on users
+DUPLICATE_MESSAGES = {
+    "users_email_key": "Email already registered",
+    "users_username_key": "Username already taken",
+}
+
+def duplicate_message(error: IntegrityError) -> Optional[str]:
+    """Map a unique violation on users to the message the API reports for it"""
+    constraint = getattr(getattr(error.orig, "__cause__", None), "constraint_name", None)
+    if constraint in DUPLICATE_MESSAGES:
+        return DUPLICATE_MESSAGES[constraint]
+    error_text = str(error.orig)
+    for constraint, message in DUPLICATE_MESSAGES.items():
+        if constraint in error_text:
+            return message
+    return None
+
 class UserService:
     """Service class for user-related database operations"""
     
@@ -21,6 +46,11 @@ class UserService:
         result = await self.db.execute(select(User).filter(User.user_id == user_id))
         return result.scalar_one_or_none()
 
+    async def get_users_by_ids(self, user_ids: List[UUID]) -> List[User]:
+        """Get every existing user among user_ids in one query"""
+        result = await self.db.execute(select(User).filter(matches_any(User.user_id, user_ids)))
+        return result.scalars().all()
+
     async def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email"""
         result = await self.db.execute(select(User).filter(User.email == email))
@@ -31,53 +61,43 @@ class UserService:
         result = await self.db.execute(select(User).filter(User.username == username))
         return result.scalar_one_or_none()
 
-    async def get_all_users(self, skip: int = 0, limit: int = 100) -> List[User]:
-        """Get all users with pagination"""
-        result = await self.db.execute(select(User).offset(skip).limit(limit))
-        return result.scalars().all()
+    async def get_all_users(self, skip: int = 0, limit: int = 100, columns: Optional[list] = None) -> List[User]:
+        """Get all users with pagination (plain rows of columns when given)"""
+        query = select(User).offset(skip).limit(limit)
+        if columns is None:
+            return (await self.db.execute(query)).scalars().all()
+        return (await self.db.execute(select_columns(query, columns))).all()
 
     async def create_user(self, user_data: UserCreate) -> User:
         """Create a new user"""
-        # Check if email already exists
-        existing_user = await self.get_user_by_email(user_data.email)
-        raise_exception(existing_user is not None, "Email already registered")
-        
-        # Check if username already exists
-        existing_username = await self.get_user_by_username(user_data.username)
-        raise_exception(existing_username is not None, "Username already taken")
-        
         # Hash the password
-        hashed_password = get_password_hash(user_data.password)
-        
-        # Create new user
-        new_user = User(
-            username=user_data.username,
-            email=user_data.email,
-            password=hashed_password,
-            # role=user_data.role
-            role= UserRole(user_data.role)
-        )
+        hashed_password = await get_password_hash_async(user_data.password)
         
-        self.db.add(new_user)
+        # Create new user; the unique constraints on email and username reject duplicates
+        try:
+            result = await self.db.execute(
+                insert(User)
+                .values(
+                    username=user_data.username,
+                    email=user_data.email,
+                    password=hashed_password,
+                    # role=user_data.role
+                    role=UserRole(user_data.role)
+                )
+                .returning(User)
+            )
+        except IntegrityError as error:
+            await self.db.rollback()
+            message = duplicate_message(error)
+            if message is None:
+                raise
+            raise_exception(True, message)
+        new_user = result.scalar_one()
         await self.db.commit()
-        await self.db.refresh(new_user)
         return new_user
 
     async def update_user(self, user_id: UUID, user_data: UserUpdate) -> Optional[User]:
         """Update user information"""
-        user = await self.get_user_by_id(user_id)
-        raise_exception(user is None, "User not found")
-        
-        # Check if new email already exists (if email is being updated)
-        if user_data.email and user_data.email != user.email:
-            existing_user = await self.get_user_by_email(user_data.email)
-            raise_exception(existing_user is not None, "Email already registered")
-        
-        # Check if new username already exists (if username is being updated)
-        if user_data.username and user_data.username != user.username:
-            existing_username = await self.get_user_by_username(user_data.username)
-            raise_exception(existing_username is not None, "Username already taken")
-        
         # Update fields
         update_data = {}
         if user_data.username is not None:
@@ -87,22 +107,96 @@ class UserService:
         if user_data.role is not None:
             update_data["role"] = user_data.role
         
-        if update_data:
-            await self.db.execute(
-                update(User).where(User.user_id == user_id).values(**update_data)
+        if not update_data:
+            user = await self.get_user_by_id(user_id)
+            raise_exception(user is None, "User not found")
+            return user
+        
+        # Outstanding tokens carry email and role, so changing either makes them stale
+        claims_changed = []
+        if user_data.email is not None:
+            claims_changed.append(User.email != user_data.email)
+        if user_data.role is not None:
+            claims_changed.append(User.role != user_data.role)
+        if claims_changed:
+            update_data["token_version"] = case(
+                (or_(*claims_changed), User.token_version + 1), else_=User.token_version
             )
-            await self.db.commit()
-            await self.db.refresh(user)
+        
+        try:
+            result = await self.db.execute(
+                update(User)
+                .where(User.user_id == user_id)
+                .values(**update_data)
+                .returning(User)
+                .execution_options(synchronize_session=False, populate_existing=True)
+            )
+        except IntegrityError as error:
+            await self.db.rollback()
+            message = duplicate_message(error)
+            if message is None:
+                raise
+            raise_exception(True, message)
+        user = result.scalar_one_or_none()
+        raise_exception(user is None, "User not found")
+        await announce_user_change(self.db, user_id, token_version=user.token_version if claims_changed else None)
+        
+        await self.db.commit()
+        # Applied here at once; the other workers apply the announcement on commit
+        user_cache.invalidate_user(user_id)
+        if claims_changed:
+            token_versions.record(user_id, user.token_version)
         
         return user
 
     async def delete_user(self, user_id: UUID) -> bool:
         """Delete a user"""
-        user = await self.get_user_by_id(user_id)
-        raise_exception(user is None, "User not found")
+        # The user's answers go with them by cascade; uncount them on the questions they answered
+        answered = (
+            select(Answer.question_id, func.count().label("answers"))
+            .filter(Answer.user_id == user_id)
+            .group_by(Answer.question_id)
+            .subquery()
+        )
+        result = await self.db.execute(
+            update(Question)
+            .where(Question.question_id == answered.c.question_id)
+            .values(answer_count=Question.answer_count - answered.c.answers, **Question.bump_version())
+            .returning(Question.question_id)
+            .execution_options(synchronize_session=False)
+        )
+        await FeedService(self.db).rescore_questions(result.scalars().all())
+        # Their questions go the same way; uncount the tags on them
+        await TagService(self.db).uncount_deleted_questions(Question.user_id == user_id)
+        
+        # Take the user's votes back out of the scores they were counted in
+        question_votes = await self.db.execute(
+            delete(QuestionVote).where(QuestionVote.user_id == user_id)
+            .returning(QuestionVote.question_id, QuestionVote.value)
+        )
+        question_votes = question_votes.all()
+        answer_votes = await self.db.execute(
+            delete(AnswerVote).where(AnswerVote.user_id == user_id)
+            .returning(AnswerVote.answer_id, AnswerVote.value)
+        )
+        answer_votes = answer_votes.all()
+        
+        
+        result = await self.db.execute(
+            delete(User).where(User.user_id == user_id).returning(User.user_id)
+        )
+        raise_exception(result.scalar_one_or_none() is None, "User not found")
+        await announce_user_change(self.db, user_id, deleted=True)
         
-        await self.db.execute(delete(User).where(User.user_id == user_id))
         await self.db.commit()
+        user_cache.invalidate_user(user_id)
+        token_versions.record_deleted(user_id)
+        for question_id, value in question_votes:
+            vote_aggregator.add("question", question_id, -value)
+        for answer_id, value in answer_votes:
+            vote_aggregator.add("answer", answer_id, -value)
+        # Their questions and answers leave listings everywhere
+        await response_cache.invalidate(ALL_TAG)
         return True
 
     async def authenticate_user(self, email: str, password: str) -> Optional[User]:
@@ -110,7 +204,7 @@ class UserService:
         user = await self.get_user_by_email(email)
         if not user:
             return None
-        if not verify_password(password, user.password):
+        if not await verify_password_async(password, user.password):
             return None
         return user
 
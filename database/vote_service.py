@@ -0,0 +1,81 @@
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import delete, literal_column
+from models import Question, Answer, QuestionVote, AnswerVote
+from utils.exception_handler import raise_exception
+from utils.vote_aggregator import vote_aggregator
+from consts import VoteTypeEnum, VOTE_VALUES
+from uuid import UUID
+
+# Per kind: vote table, its item column, the item's score column and the missing-item message
+VOTE_TARGETS = {
+    "question": (QuestionVote, QuestionVote.question_id, Question.score, Question.question_id, "Question not found"),
+    "answer": (AnswerVote, AnswerVote.answer_id, Answer.score, Answer.answer_id, "Answer not found"),
+}
+
+class VoteService:
+    """Service class for vote-related database operations"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def current_score(self, kind: str, item_id: UUID) -> int:
+        """Stored score of an item plus the deltas not yet flushed to it"""
+        _, _, score_column, id_column, missing_message = VOTE_TARGETS[kind]
+        result = await self.db.execute(select(score_column).where(id_column == item_id))
+        score = result.scalar_one_or_none()
+        raise_exception(score is None, missing_message)
+        return score + vote_aggregator.pending(kind, item_id)
+
+    async def cast_vote(self, kind: str, item_id: UUID, user_id: UUID, vote_type: VoteTypeEnum) -> int:
+        """Record or change a user's vote on a question or answer, returning the item's score"""
+        vote_model, item_column, _, _, missing_message = VOTE_TARGETS[kind]
+        value = VOTE_VALUES[vote_type]
+        
+        # The upsert only touches the row when the direction changes; xmax = 0 tells a
+        # fresh vote (+value) from a flipped one (+2 * value), no row means an unchanged vote
+        stmt = insert(vote_model).values({vote_model.user_id: user_id, item_column: item_id, vote_model.value: value})
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[vote_model.user_id, item_column],
+            set_={"value": stmt.excluded.value},
+            where=vote_model.value != stmt.excluded.value
+        ).returning(literal_column("xmax = 0").label("inserted"))
+        try:
+            result = await self.db.execute(stmt)
+        except IntegrityError:
+            await self.db.rollback()
+            raise_exception(True, missing_message)
+        inserted = result.scalar_one_or_none()
+        delta = 0 if inserted is None else value if inserted else 2 * value
+        
+        score = await self.current_score(kind, item_id)
+        await self.db.commit()
+        vote_aggregator.add(kind, item_id, delta)
+        return score + delta
+
+    async def retract_vote(self, kind: str, item_id: UUID, user_id: UUID) -> int:
+        """Remove a user's vote on a question or answer, returning the item's score"""
+        vote_model, item_column, _, _, _ = VOTE_TARGETS[kind]
+        result = await self.db.execute(
+            delete(vote_model)
+            .where(vote_model.user_id == user_id, item_column == item_id)
+            .returning(vote_model.value)
+        )
+        value = result.scalar_one_or_none()
+        delta = -value if value is not None else 0
+        
+        score = await self.current_score(kind, item_id)
+        await self.db.commit()
+        vote_aggregator.add(kind, item_id, delta)
+        return score + delta
+
+    async def get_user_vote(self, kind: str, item_id: UUID, user_id: UUID):
+        """Get a user's vote direction on a question or answer, or None"""
+        vote_model, item_column, _, _, _ = VOTE_TARGETS[kind]
+        result = await self.db.execute(
+            select(vote_model.value).where(vote_model.user_id == user_id, item_column == item_id)
+        )
+        value = result.scalar_one_or_none()
+        return next((vote_type for vote_type, vote_value in VOTE_VALUES.items() if vote_value == value), None)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Export Data Script
+This script dumps users, questions and answers as NDJSON (one
+{"type": ..., "data": ...} object per line) from one consistent snapshot,
+optionally gzip or zstd compressed. Progress is checkpointed next to the
+output file, so an interrupted export picks up where it stopped when run
+again with --resume; the checkpoint keeps the first run's start time, and
+rows created after it are left out of every run.
+
+Usage:
+    python export_data.py dump.ndjson.gz
+    python export_data.py dump.ndjson.gz --resume
+    python export_data.py questions.ndjson --tables questions --compression none
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import List, Optional
+
+from utils.export import ExportFramer, export_records, EXPORT_TABLES, EXPORT_COMPRESSIONS
+
+# Rows written between checkpoints
+CHECKPOINT_EVERY = 10000
+
+
+def guess_compression(path: str) -> str:
+    """Compression implied by the output file's suffix"""
+    if path.endswith(".gz"):
+        return "gzip"
+    if path.endswith(".zst"):
+        return "zstd"
+    return "none"
+
+
+def read_checkpoint(path: str) -> Optional[dict]:
+    """Saved checkpoint of an interrupted export, if any"""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_checkpoint(path: str, checkpoint: dict):
+    """Replace the checkpoint file atomically"""
+    temporary = path + ".tmp"
+    with open(temporary, "w") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+async def export_data(output: str, compression: str, tables: Optional[List[str]], resume: bool,
+                      checkpoint_every: int = CHECKPOINT_EVERY):
+    """Write the export to output, checkpointing every checkpoint_every rows"""
+    checkpoint_path = output + ".checkpoint"
+    checkpoint = read_checkpoint(checkpoint_path) if resume else None
+    if checkpoint:
+        # Cut off whatever was written after the last complete frame
+        with open(output, "r+b") as f:
+            f.truncate(checkpoint["offset"])
+        print(f"🔄 Resuming after {checkpoint['records']} rows ({checkpoint['token']})")
+    else:
+        # Every run of this export stops at rows created before it first started
+        checkpoint = {"token": None, "offset": 0, "records": 0, "started_at": datetime.utcnow().isoformat()}
+
+    framer = ExportFramer(compression)
+    records = checkpoint["records"]
+    token = checkpoint["token"]
+    # Checkpoints written before the cutoff was recorded resume without one
+    started_at = datetime.fromisoformat(checkpoint["started_at"]) if checkpoint.get("started_at") else None
+    with open(output, "ab" if checkpoint["offset"] else "wb") as f:
+        def save():
+            f.write(framer.end_frame())
+            f.flush()
+            os.fsync(f.fileno())
+            write_checkpoint(checkpoint_path, {
+                "token": token, "offset": f.tell(), "records": records,
+                "started_at": started_at.isoformat() if started_at else None
+            })
+
+        async for token, line in export_records(tables, checkpoint["token"], started_at):
+            f.write(framer.write(line))
+            records += 1
+            if records % checkpoint_every == 0:
+                save()
+        f.write(framer.end_frame())
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    print(f"✅ Exported {records} rows to {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export StackIt data as NDJSON")
+    parser.add_argument("output", help="File to write (.gz / .zst suffixes select compression)")
+    parser.add_argument("--compression", choices=EXPORT_COMPRESSIONS, help="Override the compression")
+    parser.add_argument("--tables", nargs="+", choices=list(EXPORT_TABLES), help="Tables to export (default all)")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted export from its checkpoint")
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY, help="Rows between checkpoints")
+    args = parser.parse_args()
+
+    print("📦 Exporting data...")
+    asyncio.run(export_data(
+        args.output, args.compression or guess_compression(args.output), args.tables, args.resume,
+        args.checkpoint_every
+    ))
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Import Data Script
+This script bulk loads users, questions and answers from NDJSON or CSV
+dumps with Postgres COPY, for migrating an existing Q&A site.
+
+Input files:
+    users.csv / questions.ndjson / answers.csv.gz ...
+        one table per file, named after the table
+    dump.ndjson.gz
+        any other NDJSON file holds {"type": <table>, "data": {...}} lines,
+        as written by export_data.py
+
+Columns: users (user_id, username, email, password, role, created_at),
+questions (question_id, user_id, title, description, tags, created_at,
+updated_at), answers (answer_id, question_id, user_id, content, is_accepted,
+created_at). Legacy ids of any kind are mapped to stable UUIDs (UUIDs are
+kept), so foreign keys between the files still line up and importing the
+same dump twice skips rows already loaded. Passwords are kept only when
+they are bcrypt hashes; other users must reset theirs.
+
+Rows are validated with the API schemas, copied into a staging table a
+batch at a time and inserted from there when their author / question
+exist. Search vectors, counters, tags and feed scores are computed
+afterwards in bulk. Rejected rows are reported, and written to --rejects.
+Run it while the API is stopped.
+
+Usage:
+    python import_data.py users.csv questions.csv answers.csv --rejects rejects.ndjson
+    python import_data.py dump.ndjson.gz --defer-indexes
+"""
+
+import argparse
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import secrets
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import text
+
+from consts import UserTypeEnum
+from schemas.user_schemas import UserCreate
+from schemas.question_schemas import QuestionCreate
+from schemas.answer_schemas import AnswerBase
+from utils.auth_helper import pwd_context, get_password_hash
+from utils.database_helper import async_engine
+from utils.batch import describe_validation_error
+from repair_counters import (
+    backfill_search_vectors, repair_question_counters, repair_tag_counts, repair_question_scores
+)
+
+# Rows validated and copied per transaction
+IMPORT_BATCH_SIZE = 5000
+# Namespace of the UUIDs legacy ids are mapped to
+IMPORT_NAMESPACE = uuid.UUID("6f1c8b52-3d0e-4c4b-9a51-2f7d0c3e8a19")
+
+# Tables in load order: parents before the rows referencing them
+IMPORT_TABLES = ("users", "questions", "answers")
+# Columns copied into each table's staging table
+IMPORT_COLUMNS = {
+    "users": ("user_id", "username", "email", "password", "role", "created_at"),
+    "questions": ("question_id", "user_id", "title", "description", "tags", "created_at", "updated_at"),
+    "answers": ("answer_id", "question_id", "user_id", "content", "is_accepted", "created_at"),
+}
+# Moves a batch out of staging; rows whose parents are missing, or which
+# collide with existing rows, are left behind and reported
+IMPORT_STATEMENTS = {
+    "users": """
+        INSERT INTO users (user_id, username, email, password, role, created_at)
+        SELECT user_id, username, email, password, role, created_at FROM import_users
+        ON CONFLICT DO NOTHING
+        RETURNING user_id
+    """,
+    "questions": """
+        INSERT INTO questions (question_id, user_id, title, description, tags, created_at, updated_at, modified_at)
+        SELECT s.question_id, s.user_id, s.title, s.description, s.tags, s.created_at, s.updated_at,
+               coalesce(s.updated_at, s.created_at)
+        FROM import_questions s JOIN users u ON u.user_id = s.user_id
+        ON CONFLICT DO NOTHING
+        RETURNING question_id
+    """,
+    "answers": """
+        INSERT INTO answers (answer_id, question_id, user_id, content, is_accepted, created_at)
+        SELECT s.answer_id, s.question_id, s.user_id, s.content, s.is_accepted, s.created_at
+        FROM import_answers s
+        JOIN questions q ON q.question_id = s.question_id
+        JOIN users u ON u.user_id = s.user_id
+        ON CONFLICT DO NOTHING
+        RETURNING answer_id
+    """,
+}
+# Links imported questions to their tags; usage counts are recomputed at the end
+TAG_STATEMENTS = [
+    """
+        INSERT INTO tags (tag_id, name, created_at)
+        SELECT gen_random_uuid(), name, now() AT TIME ZONE 'utc'
+        FROM (SELECT DISTINCT unnest(tags) AS name FROM questions WHERE question_id = ANY(:ids)) names
+        ON CONFLICT (name) DO NOTHING
+    """,
+    """
+        INSERT INTO question_tags (question_id, tag_id, question_created_at)
+        SELECT q.question_id, t.tag_id, q.created_at
+        FROM questions q CROSS JOIN unnest(q.tags) AS tag(name) JOIN tags t ON t.name = tag.name
+        WHERE q.question_id = ANY(:ids)
+        ON CONFLICT DO NOTHING
+    """,
+]
+# Tables whose secondary indexes --defer-indexes drops during the load
+DEFERRABLE_INDEX_TABLES = ("questions", "answers", "question_tags", "question_scores")
+
+
+def map_id(table: str, value) -> Optional[uuid.UUID]:
+    """Stable UUID for a legacy id: UUIDs are kept, anything else is hashed into IMPORT_NAMESPACE"""
+    if value in (None, ""):
+        return None
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return uuid.uuid5(IMPORT_NAMESPACE, f"{table}:{value}")
+
+
+def parse_datetime(value) -> Optional[datetime]:
+    """Timestamp from an ISO 8601 string, stored as naive UTC like the rest of the schema"""
+    if value in (None, ""):
+        return None
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_tags(value) -> List[str]:
+    """Tags from a JSON array, or a comma separated CSV cell"""
+    if value in (None, ""):
+        return []
+    if isinstance(value, list):
+        return value
+    value = str(value)
+    return json.loads(value) if value.startswith("[") else value.split(",")
+
+
+class RowConverter:
+    """Validates input rows with the API schemas and turns them into staging records"""
+
+    def __init__(self):
+        # One unguessable hash shared by users whose password cannot be carried over
+        self.locked_password = get_password_hash(secrets.token_urlsafe(32))
+
+    def users(self, data: dict) -> tuple:
+        password = data.get("password") or ""
+        user = UserCreate(
+            username=data.get("username"), email=data.get("email"), password=password,
+            role=data.get("role") or UserTypeEnum.user
+        )
+        if not pwd_context.identify(password):
+            password = self.locked_password
+        return (
+            map_id("users", data.get("user_id")) or uuid.uuid4(), user.username, user.email, password,
+            user.role.value, parse_datetime(data.get("created_at")) or datetime.utcnow()
+        )
+
+    def questions(self, data: dict) -> tuple:
+        question = QuestionCreate(
+            title=data.get("title"), description=data.get("description"), tags=parse_tags(data.get("tags"))
+        )
+        user_id = map_id("users", data.get("user_id"))
+        if user_id is None:
+            raise ValueError("user_id is required")
+        return (
+            map_id("questions", data.get("question_id")) or uuid.uuid4(), user_id, question.title,
+            question.description, question.tags, parse_datetime(data.get("created_at")) or datetime.utcnow(),
+            parse_datetime(data.get("updated_at"))
+        )
+
+    def answers(self, data: dict) -> tuple:
+        answer = AnswerBase(content=data.get("content"))
+        question_id = map_id("questions", data.get("question_id"))
+        user_id = map_id("users", data.get("user_id"))
+        if question_id is None or user_id is None:
+            raise ValueError("question_id and user_id are required")
+        is_accepted = data.get("is_accepted") in (True, "true", "True", "1", 1, "t")
+        return (
+            map_id("answers", data.get("answer_id")) or uuid.uuid4(), question_id, user_id, answer.content,
+            is_accepted, parse_datetime(data.get("created_at")) or datetime.utcnow()
+        )
+
+
+def open_text(path: str) -> io.TextIOBase:
+    """Open an input file, decompressing .gz and .zst"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    if path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("zstd input needs the zstandard package (pip install zstandard)")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb")), encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def file_table(path: str) -> Optional[str]:
+    """Table a file holds, from its name (users.csv, answers.ndjson.gz), or None for mixed dumps"""
+    stem = os.path.basename(path).split(".")[0]
+    return stem if stem in IMPORT_TABLES else None
+
+
+def read_rows(path: str) -> Iterator[Tuple[str, int, dict]]:
+    """Yield (table, line number, row) from an NDJSON or CSV file"""
+    table = file_table(path)
+    with open_text(path) as f:
+        if ".csv" in os.path.basename(path):
+            if table is None:
+                raise RuntimeError(f"{path}: CSV files must be named after their table ({', '.join(IMPORT_TABLES)})")
+            for line_number, row in enumerate(csv.DictReader(f), start=2):
+                yield table, line_number, row
+            return
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if table is None:
+                yield record.get("type"), line_number, record.get("data") or {}
+            else:
+                yield table, line_number, record
+
+
+class Importer:
+    """Buffers validated rows per table and loads them in COPY batches"""
+
+    def __init__(self, conn, rejects: Optional[io.TextIOBase], batch_size: int = IMPORT_BATCH_SIZE):
+        self.conn = conn
+        self.rejects = rejects
+        self.batch_size = batch_size
+        self.converter = RowConverter()
+        self.buffers: Dict[str, List[Tuple[str, tuple, dict]]] = {table: [] for table in IMPORT_TABLES}
+        self.stats = {table: {"read": 0, "imported": 0, "invalid": 0, "skipped": 0, "seconds": 0.0}
+                      for table in IMPORT_TABLES}
+
+    async def create_staging_tables(self):
+        """Session-local staging tables emptied at every commit"""
+        for table, columns in IMPORT_COLUMNS.items():
+            await self.conn.execute(text(
+                f"CREATE TEMP TABLE IF NOT EXISTS import_{table} ON COMMIT DELETE ROWS AS "
+                f"SELECT {', '.join(columns)} FROM {table} WITH NO DATA"
+            ))
+        await self.conn.commit()
+
+    def reject(self, table: str, source: str, reason: str, data):
+        if self.rejects is not None:
+            self.rejects.write(json.dumps({"type": table, "source": source, "reason": reason, "data": data},
+                                          default=str) + "\n")
+
+    async def add(self, table: str, source: str, data: dict):
+        """Validate a row and queue it, loading its table's batch when full"""
+        if table not in IMPORT_TABLES:
+            self.reject(str(table), source, "unknown type", data)
+            return
+        stats = self.stats[table]
+        stats["read"] += 1
+        try:
+            record = getattr(self.converter, table)(data)
+        except (ValidationError, ValueError) as e:
+            stats["invalid"] += 1
+            self.reject(table, source, describe_validation_error(e), data)
+            return
+        self.buffers[table].append((source, record, data))
+        if len(self.buffers[table]) >= self.batch_size:
+            # Parents queued so far are loaded first, so this batch finds them
+            await self.flush(upto=table)
+
+    async def flush(self, upto: str = IMPORT_TABLES[-1]):
+        """Load every queued batch of upto and the tables before it"""
+        for table in IMPORT_TABLES[:IMPORT_TABLES.index(upto) + 1]:
+            if self.buffers[table]:
+                await self.load(table, self.buffers[table])
+                self.buffers[table] = []
+
+    async def load(self, table: str, batch: List[Tuple[str, tuple, dict]]):
+        """COPY one batch into staging and move the rows that fit into the table"""
+        started = time.perf_counter()
+        async with self.conn.begin():
+            # A crash loses at most the last batches, which a rerun loads again
+            await self.conn.execute(text("SET LOCAL synchronous_commit = off"))
+            raw = await self.conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                f"import_{table}", records=[record for _, record, _ in batch], columns=IMPORT_COLUMNS[table]
+            )
+            result = await self.conn.execute(text(IMPORT_STATEMENTS[table]))
+            imported = set(result.scalars().all())
+            if table == "questions" and imported:
+                for statement in TAG_STATEMENTS:
+                    await self.conn.execute(text(statement), {"ids": list(imported)})
+
+        stats = self.stats[table]
+        stats["imported"] += len(imported)
+        stats["skipped"] += len(batch) - len(imported)
+        stats["seconds"] += time.perf_counter() - started
+        for source, record, data in batch:
+            if record[0] not in imported:
+                parent = "author" if table != "answers" else "question or author"
+                reason = "already imported" if table == "users" else f"already imported, or {parent} missing"
+                self.reject(table, source, reason, data)
+        print(f"   {table}: {stats['imported']} imported, {stats['invalid'] + stats['skipped']} rejected")
+
+
+async def drop_secondary_indexes(conn) -> List[str]:
+    """Drop the non-constraint indexes of DEFERRABLE_INDEX_TABLES, returning their definitions"""
+    result = await conn.execute(text("""
+        SELECT i.indexname, i.indexdef FROM pg_indexes i
+        WHERE i.schemaname = current_schema() AND i.tablename = ANY(:tables)
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conname = i.indexname)
+    """), {"tables": list(DEFERRABLE_INDEX_TABLES)})
+    indexes = result.all()
+    for name, _ in indexes:
+        await conn.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
+    await conn.commit()
+    print(f"⏸️ Dropped {len(indexes)} indexes until the load finishes")
+    return [definition for _, definition in indexes]
+
+
+def read_files(paths: List[str]) -> Iterator[Tuple[str, str, dict]]:
+    """Yield (table, source, row) from every file, table files in load order"""
+    # Table files go in load order; mixed dumps are already ordered
+    paths = sorted(paths, key=lambda path: IMPORT_TABLES.index(file_table(path)) if file_table(path) else -1)
+    for path in paths:
+        print(f"📥 Reading {path}")
+        for table, line_number, data in read_rows(path):
+            yield table, f"{os.path.basename(path)}:{line_number}", data
+
+
+async def import_rows(rows: Iterable[Tuple[str, str, dict]], rejects_path: Optional[str] = None,
+                      defer_indexes: bool = False, batch_size: int = IMPORT_BATCH_SIZE):
+    """Import (table, source, row) tuples, parents first, then compute the derived columns"""
+    rejects = open(rejects_path, "w") if rejects_path else None
+    started = time.perf_counter()
+    try:
+        async with async_engine.connect() as conn:
+            deferred_indexes = await drop_secondary_indexes(conn) if defer_indexes else []
+            try:
+                importer = Importer(conn, rejects, batch_size)
+                await importer.create_staging_tables()
+                for table, source, data in rows:
+                    await importer.add(table, source, data)
+                await importer.flush()
+            finally:
+                for definition in deferred_indexes:
+                    await conn.execute(text(definition))
+                await conn.commit()
+                if deferred_indexes:
+                    print(f"✅ Rebuilt {len(deferred_indexes)} indexes")
+    finally:
+        if rejects is not None:
+            rejects.close()
+
+    print("🔧 Computing derived columns...")
+    await backfill_search_vectors()
+    await repair_question_counters()
+    await repair_tag_counts()
+    await repair_question_scores()
+
+    elapsed = time.perf_counter() - started
+    print(f"{'table':<10} {'read':>10} {'imported':>10} {'invalid':>8} {'skipped':>8} {'rows/s':>10}")
+    for table, stats in importer.stats.items():
+        rate = stats["imported"] / stats["seconds"] if stats["seconds"] else 0
+        print(f"{table:<10} {stats['read']:>10} {stats['imported']:>10} {stats['invalid']:>8} "
+              f"{stats['skipped']:>8} {rate:>10.0f}")
+    total = sum(stats["imported"] for stats in importer.stats.values())
+    print(f"✅ Imported {total} rows in {elapsed:.1f}s ({total / elapsed:.0f} rows/s overall)")
+    if rejects_path:
+        print(f"📝 Rejected rows written to {rejects_path}")
+
+
+async def import_data(paths: List[str], rejects_path: Optional[str] = None, defer_indexes: bool = False,
+                      batch_size: int = IMPORT_BATCH_SIZE):
+    """Import every file, then compute the derived columns"""
+    await import_rows(read_files(paths), rejects_path, defer_indexes, batch_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import StackIt data from NDJSON or CSV dumps")
+    parser.add_argument("paths", nargs="+", help="Input files (.ndjson / .jsonl / .csv, optionally .gz or .zst)")
+    parser.add_argument("--rejects", help="Write rejected rows and the reasons to this NDJSON file")
+    parser.add_argument("--defer-indexes", action="store_true",
+                        help="Drop secondary listing indexes during the load and rebuild them afterwards")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="Rows per COPY batch")
+    args = parser.parse_args()
+
+    print("📦 Importing data...")
+    asyncio.run(import_data(args.paths, args.rejects, args.defer_indexes, args.batch_size))
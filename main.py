@@ -1,37 +1,59 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
+import asyncio
+import fastapi.routing
 import uvicorn
-from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
 
-from routes import user_routes, question_routes, answer_routes
-from utils.database_helper import engine, async_engine
-from models import Base
+from routes import user_routes, question_routes, answer_routes, notification_routes, admin_routes
+from utils.database_helper import async_engine
+from utils.replicas import replica_router, ReplicaStickinessMiddleware
+from utils.password_executor import password_executor
+from utils.vote_aggregator import vote_aggregator
+from utils.ranking import feed_rescorer
+from utils.notifications import notification_listener
+from utils.auth_helper import user_change_listener
+from utils.response_cache import response_cache, RESPONSE_CACHE_WARM_PAGES
+from utils.metrics import (
+    metrics, MetricsMiddleware, instrument_engine, timed_serialization, loop_lag_monitor, METRICS_ENABLED
+)
+from migrations import ensure_schema
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
-    try:
-        async with async_engine.begin() as conn:
-            # Drop existing enum types to avoid conflicts
-            await conn.execute(text("DROP TYPE IF EXISTS usertypeenum CASCADE"))
-            await conn.execute(text("DROP TYPE IF EXISTS user_role CASCADE"))
-            # Create tables
-            await conn.run_sync(Base.metadata.create_all)
-        print("✅ Database initialized successfully")
-    except Exception as e:
-        print(f"⚠️ Database initialization warning: {e}")
-        # Try to create tables anyway
-        try:
-            async with async_engine.begin() as conn:
-                await conn.run_sync(Base.metadata.create_all)
-            print("✅ Tables created successfully")
-        except Exception as e2:
-            print(f"❌ Database initialization failed: {e2}")
+    # Startup: one version check, migrating only when the schema is behind. A failure
+    # aborts startup rather than serving on a half-migrated schema
+    await ensure_schema(async_engine)
     
+    await replica_router.start()
+    vote_aggregator.start()
+    feed_rescorer.start()
+    notification_listener.start()
+    user_change_listener.start()
+    await response_cache.start()
+    if METRICS_ENABLED:
+        loop_lag_monitor.start()
+    warm_task = None
+    if RESPONSE_CACHE_WARM_PAGES > 0:
+        warm_task = asyncio.create_task(question_routes.warm_question_listings(RESPONSE_CACHE_WARM_PAGES))
     yield
     # Shutdown
+    if warm_task is not None:
+        warm_task.cancel()
+        try:
+            await warm_task
+        except asyncio.CancelledError:
+            pass
+    await vote_aggregator.stop()
+    await feed_rescorer.stop()
+    await notification_listener.stop()
+    await user_change_listener.stop()
+    await response_cache.stop()
+    await loop_lag_monitor.stop()
+    await replica_router.stop()
+    password_executor.shutdown()
     await async_engine.dispose()
 
 app = FastAPI(
@@ -50,6 +72,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Read replicas: clients that just wrote read from the primary for a while (read-your-writes)
+if replica_router.enabled:
+    app.add_middleware(ReplicaStickinessMiddleware)
+
+# Per-request latency, SQL, pool wait and serialization metrics (GET /metrics)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(async_engine)
+    for replica in replica_router.replicas:
+        instrument_engine(replica.engine, pool_gauges=False)
+    # FastAPI encodes endpoint return values in fastapi.routing.serialize_response; timing
+    # it there covers every route without changing how they build responses
+    fastapi.routing.serialize_response = timed_serialization(fastapi.routing.serialize_response)
+
 # Global exception handler
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
@@ -59,13 +95,36 @@ async def http_exception_handler(request, exc):
             "status": exc.status_code,
             "message": exc.detail,
             "data": None
-        }
+        },
+        # Retry-After on 503s, WWW-Authenticate on 401s
+        headers=getattr(exc, "headers", None)
     )
 
-# Include routers
+# Foreign keys naming the author of a new row: failing one means the signed-in
+# user was deleted (by another worker) after their request was authenticated
+AUTHOR_FOREIGN_KEYS = ("questions_user_id_fkey", "answers_user_id_fkey")
+
+@app.exception_handler(IntegrityError)
+async def integrity_error_handler(request, exc):
+    constraint = getattr(getattr(exc.orig, "__cause__", None), "constraint_name", None) or str(exc.orig)
+    if not any(name in constraint for name in AUTHOR_FOREIGN_KEYS):
+        raise exc
+    return JSONResponse(
+        status_code=401,
+        content={
+            "status": 401,
+            "message": "User not found",
+            "data": None
+        },
+        headers={"WWW-Authenticate": "Bearer"}
+    )
+
+# Include routers (notifications first, so /api/users/{user_id} does not shadow them)
+app.include_router(notification_routes.router, prefix="/api/users/notifications", tags=["Notifications"])
 app.include_router(user_routes.router, prefix="/api/users", tags=["Users"])
 app.include_router(question_routes.router, prefix="/api/questions", tags=["Questions"])
 app.include_router(answer_routes.router, prefix="/api/answers", tags=["Answers"])
+app.include_router(admin_routes.router, prefix="/api/admin", tags=["Admin"])
 
 @app.get("/")
 def root():
@@ -89,6 +148,11 @@ def health_check():
         }
     }
 
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Metrics in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
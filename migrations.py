@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Schema Migrations Script
+This script brings the database schema up to date by applying, in order,
+the numbered migrations below that the schema_migrations table does not
+record yet. A PostgreSQL advisory lock lets one process migrate at a time;
+processes starting together wait for it and then find nothing left to do.
+
+Transactional migrations are applied and recorded in one transaction.
+The others run statement by statement (CREATE INDEX CONCURRENTLY cannot
+run in a transaction, and batched backfills should not), so they must be
+safe to run again after an interruption: IF NOT EXISTS everywhere, and
+create_index_concurrently for indexes.
+
+The first migration creates every table the models define, so on a new
+database the later ones find their columns and indexes already there.
+Changing the schema means adding a migration at the end, not editing
+one that has been applied.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import text, exc
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from models import Base, Notification
+from utils.database_helper import ASYNC_DATABASE_URL, DB_APPLICATION_NAME
+from repair_counters import (
+    backfill_search_vectors, repair_question_counters, repair_vote_scores, repair_tag_counts, repair_question_scores
+)
+
+load_dotenv()
+
+# Configuration
+# Migrations need a direct connection: session advisory locks do not survive PgBouncer transaction pooling
+MIGRATION_DATABASE_URL = os.getenv("MIGRATION_DATABASE_URL", ASYNC_DATABASE_URL)
+# Apply pending migrations when the API starts (otherwise run python migrations.py before deploying)
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "true").lower() == "true"
+# Advisory lock key held while migrating, and how often waiting processes try to take it
+MIGRATION_LOCK_KEY = 7_301_542_917
+MIGRATION_LOCK_POLL_SECONDS = float(os.getenv("MIGRATION_LOCK_POLL_SECONDS", 0.5))
+
+VERSION_TABLE = "schema_migrations"
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable[..., Awaitable[None]]
+    transactional: bool = True
+
+
+async def create_index_concurrently(conn, name: str, definition: str) -> None:
+    """CREATE INDEX CONCURRENTLY name definition, replacing an invalid index left by an interrupted build"""
+    invalid = await conn.scalar(
+        text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {"name": name}
+    )
+    if invalid:
+        await conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+    await conn.execute(text(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" {definition}'))
+
+
+async def create_tables(conn):
+    """Create the tables, types and indexes of the models that do not exist yet"""
+    await conn.run_sync(Base.metadata.create_all)
+
+
+async def add_user_role(conn):
+    """Add the role column (and its enum type) to users tables that predate it"""
+    await conn.execute(text("""
+        DO $$ BEGIN
+            CREATE TYPE user_role AS ENUM ('guest', 'user', 'admin');
+        EXCEPTION WHEN duplicate_object THEN NULL;
+        END $$
+    """))
+    await conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS role user_role NOT NULL DEFAULT 'user'"))
+
+
+PAGINATION_INDEXES = [
+    ("ix_questions_created_at_question_id", "ON questions (created_at, question_id)"),
+    ("ix_questions_user_id_created_at", "ON questions (user_id, created_at, question_id)"),
+    ("ix_answers_question_id_created_at", "ON answers (question_id, created_at, answer_id)"),
+    ("ix_answers_user_id_created_at", "ON answers (user_id, created_at, answer_id)"),
+]
+
+
+async def add_pagination_indexes(conn):
+    """Composite indexes backing keyset pagination on (created_at, id)"""
+    for name, definition in PAGINATION_INDEXES:
+        await create_index_concurrently(conn, name, definition)
+
+
+async def add_search_vector(conn):
+    """Full-text search column, backfilled before its GIN index is built"""
+    await conn.execute(text("ALTER TABLE questions ADD COLUMN IF NOT EXISTS search_vector tsvector"))
+    await backfill_search_vectors(conn.engine)
+    await create_index_concurrently(conn, "ix_questions_search_vector", "ON questions USING gin (search_vector)")
+
+
+async def add_token_version(conn):
+    """Per-user access token version"""
+    await conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version integer NOT NULL DEFAULT 0"))
+
+
+async def add_answer_counters(conn):
+    """Denormalized answer count and accepted answer pointer on questions"""
+    await conn.execute(text("ALTER TABLE questions ADD COLUMN IF NOT EXISTS answer_count integer NOT NULL DEFAULT 0"))
+    await conn.execute(text("ALTER TABLE questions ADD COLUMN IF NOT EXISTS accepted_answer_id uuid"))
+    exists = await conn.scalar(text("SELECT 1 FROM pg_constraint WHERE conname = 'fk_questions_accepted_answer_id'"))
+    if not exists:
+        # Added unvalidated, then validated without blocking writes
+        await conn.execute(text("""
+            ALTER TABLE questions ADD CONSTRAINT fk_questions_accepted_answer_id
+            FOREIGN KEY (accepted_answer_id) REFERENCES answers (answer_id) ON DELETE SET NULL NOT VALID
+        """))
+    await conn.execute(text("ALTER TABLE questions VALIDATE CONSTRAINT fk_questions_accepted_answer_id"))
+    await repair_question_counters(conn.engine)
+    await create_index_concurrently(
+        conn, "ix_questions_unanswered", "ON questions (created_at, question_id) WHERE answer_count = 0"
+    )
+
+
+async def add_vote_scores(conn):
+    """Vote score aggregates on questions and answers"""
+    await conn.execute(text("ALTER TABLE questions ADD COLUMN IF NOT EXISTS score integer NOT NULL DEFAULT 0"))
+    await conn.execute(text("ALTER TABLE answers ADD COLUMN IF NOT EXISTS score integer NOT NULL DEFAULT 0"))
+    await repair_vote_scores(conn.engine)
+    await create_index_concurrently(
+        conn, "ix_answers_question_id_score", "ON answers (question_id, score, created_at, answer_id)"
+    )
+
+
+async def add_question_tags(conn):
+    """Tag names copied to questions (tags and question_tags come from create_tables)"""
+    await conn.execute(text("ALTER TABLE questions ADD COLUMN IF NOT EXISTS tags varchar(35)[] NOT NULL DEFAULT '{}'"))
+    await repair_tag_counts(conn.engine)
+
+
+async def add_question_versions(conn):
+    """Version and modification time read endpoints derive validators from"""
+    await conn.execute(text("ALTER TABLE questions ADD COLUMN IF NOT EXISTS version integer NOT NULL DEFAULT 1"))
+    # now() is evaluated once for the ALTER, so existing rows share one modification time
+    await conn.execute(text(
+        "ALTER TABLE questions ADD COLUMN IF NOT EXISTS modified_at timestamp DEFAULT (now() AT TIME ZONE 'utc')"
+    ))
+    await conn.execute(text("ALTER TABLE questions ALTER COLUMN modified_at DROP DEFAULT"))
+
+
+async def add_feed_indexes(conn):
+    """Indexes behind the most voted and most answered feeds (question_scores comes from create_tables)"""
+    await create_index_concurrently(conn, "ix_questions_score", "ON questions (score, created_at, question_id)")
+    await create_index_concurrently(
+        conn, "ix_questions_answer_count", "ON questions (answer_count, created_at, question_id)"
+    )
+    await repair_question_scores(conn.engine)
+
+
+async def add_notifications(conn):
+    """Table persisting notification inboxes (and its notification_type enum)"""
+    await conn.run_sync(lambda sync_conn: Notification.__table__.create(sync_conn, checkfirst=True))
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "create_tables", create_tables),
+    Migration(2, "user_role", add_user_role),
+    Migration(3, "pagination_indexes", add_pagination_indexes, transactional=False),
+    Migration(4, "search_vector", add_search_vector, transactional=False),
+    Migration(5, "token_version", add_token_version),
+    Migration(6, "answer_counters", add_answer_counters, transactional=False),
+    Migration(7, "vote_scores", add_vote_scores, transactional=False),
+    Migration(8, "question_tags", add_question_tags, transactional=False),
+    Migration(9, "question_versions", add_question_versions),
+    Migration(10, "feed_indexes", add_feed_indexes, transactional=False),
+    Migration(11, "notifications", add_notifications),
+]
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def migration_engine():
+    """Engine for migrating: no pooling, and no statement timeout to cut index builds short"""
+    return create_async_engine(
+        MIGRATION_DATABASE_URL,
+        poolclass=NullPool,
+        connect_args={"server_settings": {"application_name": f"{DB_APPLICATION_NAME}-migrations"}},
+    )
+
+
+async def applied_versions(conn) -> List[int]:
+    """Versions recorded in the version table, none if it does not exist yet"""
+    if await conn.scalar(text("SELECT to_regclass(:table)"), {"table": VERSION_TABLE}) is None:
+        return []
+    result = await conn.execute(text(f"SELECT version FROM {VERSION_TABLE} ORDER BY version"))
+    return [row[0] for row in result]
+
+
+async def schema_version(engine) -> Optional[int]:
+    """Newest applied migration, None before the first one"""
+    async with engine.connect() as conn:
+        try:
+            return await conn.scalar(text(f"SELECT max(version) FROM {VERSION_TABLE}"))
+        except exc.ProgrammingError:
+            return None
+
+
+async def apply_migration(engine, migration: Migration) -> None:
+    """Apply and record one migration"""
+    started = time.perf_counter()
+    print(f"🔧 Applying migration {migration.version}: {migration.name}")
+
+    async def upgrade_and_record(conn):
+        await migration.upgrade(conn)
+        await conn.execute(
+            text(f"INSERT INTO {VERSION_TABLE} (version, name, duration_ms) VALUES (:version, :name, :duration_ms)"),
+            {"version": migration.version, "name": migration.name,
+             "duration_ms": int((time.perf_counter() - started) * 1000)}
+        )
+
+    if migration.transactional:
+        async with engine.begin() as conn:
+            await upgrade_and_record(conn)
+    else:
+        async with engine.connect() as conn:
+            await upgrade_and_record(await conn.execution_options(isolation_level="AUTOCOMMIT"))
+    duration_ms = int((time.perf_counter() - started) * 1000)
+    print(f"✅ Migration {migration.version} applied in {duration_ms} ms")
+
+
+async def acquire_migration_lock(conn) -> None:
+    """
+    Take the migration advisory lock for conn's session, polling while
+    another process holds it.
+
+    Waiting inside pg_advisory_lock would keep a statement, and its
+    snapshot, open; CREATE INDEX CONCURRENTLY in the migrating process waits
+    for every older snapshot, so the two would wait on each other forever.
+    """
+    waiting = False
+    while not await conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY}):
+        if not waiting:
+            print("⏳ Another process is migrating, waiting for it")
+            waiting = True
+        await asyncio.sleep(MIGRATION_LOCK_POLL_SECONDS)
+
+
+async def migrate(engine=None) -> int:
+    """Apply every pending migration under the advisory lock; returns how many were applied"""
+    engine = engine or migration_engine()
+    try:
+        async with engine.connect() as lock_conn:
+            lock_conn = await lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+            await acquire_migration_lock(lock_conn)
+            try:
+                await lock_conn.execute(text(f"""
+                    CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (
+                        version integer PRIMARY KEY,
+                        name varchar(255) NOT NULL,
+                        applied_at timestamp NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+                        duration_ms integer NOT NULL
+                    )
+                """))
+                applied = set(await applied_versions(lock_conn))
+                pending = [migration for migration in MIGRATIONS if migration.version not in applied]
+                for migration in pending:
+                    await apply_migration(engine, migration)
+            finally:
+                await lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    finally:
+        await engine.dispose()
+    return len(pending)
+
+
+async def ensure_schema(engine) -> None:
+    """Startup check: one query when the schema is current, migrations when it is behind; raises if it stays behind"""
+    version = await schema_version(engine)
+    if version == LATEST_VERSION:
+        print(f"✅ Database schema at version {version}")
+        return
+    if version is not None and version > LATEST_VERSION:
+        print(f"⚠️ Database schema at version {version}, newer than this code ({LATEST_VERSION})")
+        return
+    if not MIGRATE_ON_STARTUP:
+        raise RuntimeError(
+            f"Database schema at version {version or 0}, this code needs {LATEST_VERSION}: run python migrations.py"
+        )
+    applied = await migrate()
+    print(f"✅ Database schema at version {LATEST_VERSION} ({applied} migrations applied)")
+
+
+async def print_status() -> None:
+    """List the migrations and when each was applied"""
+    engine = migration_engine()
+    try:
+        async with engine.connect() as conn:
+            applied = {}
+            if await applied_versions(conn):
+                result = await conn.execute(text(f"SELECT version, applied_at, duration_ms FROM {VERSION_TABLE}"))
+                applied = {version: (applied_at, duration_ms) for version, applied_at, duration_ms in result}
+    finally:
+        await engine.dispose()
+    for migration in MIGRATIONS:
+        if migration.version in applied:
+            applied_at, duration_ms = applied[migration.version]
+            print(f"✅ {migration.version:>3} {migration.name:<24} "
+                  f"applied {applied_at:%Y-%m-%d %H:%M:%S} ({duration_ms} ms)")
+        else:
+            print(f"⏳ {migration.version:>3} {migration.name:<24} pending")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply pending StackIt schema migrations")
+    parser.add_argument("--status", action="store_true", help="List applied and pending migrations instead")
+    args = parser.parse_args()
+
+    if args.status:
+        asyncio.run(print_status())
+    else:
+        print("🔄 Migrating database schema...")
+        applied = asyncio.run(migrate())
+        print(f"✅ Schema at version {LATEST_VERSION} ({applied} migrations applied)")
@@ -1,11 +1,13 @@
 ### models.py
-from sqlalchemy import Column, String, DateTime, Enum, Boolean, Text, Integer, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Column, String, DateTime, Enum, Boolean, Text, Integer, BigInteger, SmallInteger, Float, ForeignKey, Index, Identity, text
+)
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR, ARRAY
+from sqlalchemy.orm import relationship, deferred
 import uuid
 from datetime import datetime
 from utils.database_helper import Base
-from consts import UserTypeEnum
+from consts import UserTypeEnum, NotificationTypeEnum
 
 class User(Base):
     __tablename__ = "users"
@@ -15,6 +17,8 @@ class User(Base):
     email = Column(String(255), nullable=False, unique=True)
     password = Column(String(255), nullable=False)
     role = Column(Enum(UserTypeEnum, name="user_role"), nullable=False, default=UserTypeEnum.user)
+    # Bumped whenever claims carried by access tokens (email, role) change
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow)
 
     questions = relationship("Question", back_populates="author")
@@ -29,9 +33,44 @@ class Question(Base):
     description = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=True)
+    # Weighted title/description document maintained by QuestionService
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
+    # Denormalized from answers, maintained by AnswerService (repair_counters.py rebuilds them)
+    answer_count = Column(Integer, nullable=False, default=0, server_default="0")
+    accepted_answer_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("answers.answer_id", ondelete="SET NULL", use_alter=True, name="fk_questions_accepted_answer_id"),
+        nullable=True
+    )
+    # Sum of votes, updated in coalesced batches by utils.vote_aggregator
+    score = Column(Integer, nullable=False, default=0, server_default="0")
+    # Tag names copied from question_tags so responses need no join
+    tags = Column(ARRAY(String(35)), nullable=False, default=list, server_default="{}")
+    # Bumped with modified_at whenever the question, its answers or their scores change;
+    # read endpoints derive ETag / Last-Modified from them
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    modified_at = Column(DateTime, default=datetime.utcnow)
 
     author = relationship("User", back_populates="questions")
-    answers = relationship("Answer", back_populates="question")
+    answers = relationship("Answer", back_populates="question", foreign_keys="Answer.question_id")
+    # Only loaded by the feed listings that sort on it
+    feed_score = relationship("QuestionScore", uselist=False, lazy="raise", passive_deletes=True)
+
+    @staticmethod
+    def bump_version() -> dict:
+        """UPDATE values marking a question (or its answers) as changed"""
+        return {"version": Question.version + 1, "modified_at": datetime.utcnow()}
+
+    # Composite indexes matching the (created_at, question_id) listing order,
+    # and the most voted / most answered feed orders
+    __table_args__ = (
+        Index("ix_questions_created_at_question_id", "created_at", "question_id"),
+        Index("ix_questions_user_id_created_at", "user_id", "created_at", "question_id"),
+        Index("ix_questions_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_questions_unanswered", "created_at", "question_id", postgresql_where=text("answer_count = 0")),
+        Index("ix_questions_score", "score", "created_at", "question_id"),
+        Index("ix_questions_answer_count", "answer_count", "created_at", "question_id"),
+    )
 
 class Answer(Base):
     __tablename__ = "answers"
@@ -41,7 +80,101 @@ class Answer(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
     content = Column(Text, nullable=False)
     is_accepted = Column(Boolean, default=False, nullable=False)
+    # Sum of votes, updated in coalesced batches by utils.vote_aggregator
+    score = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    question = relationship("Question", back_populates="answers")
+    question = relationship("Question", back_populates="answers", foreign_keys=[question_id])
     author = relationship("User", back_populates="answers")
+
+    # Composite indexes matching the answer listing orders (by date and by score)
+    __table_args__ = (
+        Index("ix_answers_question_id_created_at", "question_id", "created_at", "answer_id"),
+        Index("ix_answers_user_id_created_at", "user_id", "created_at", "answer_id"),
+        Index("ix_answers_question_id_score", "question_id", "score", "created_at", "answer_id"),
+    )
+
+class QuestionVote(Base):
+    __tablename__ = "question_votes"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    question_id = Column(UUID(as_uuid=True), ForeignKey("questions.question_id", ondelete="CASCADE"), primary_key=True)
+    value = Column(SmallInteger, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_question_votes_question_id", "question_id"),
+    )
+
+class AnswerVote(Base):
+    __tablename__ = "answer_votes"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    answer_id = Column(UUID(as_uuid=True), ForeignKey("answers.answer_id", ondelete="CASCADE"), primary_key=True)
+    value = Column(SmallInteger, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_answer_votes_answer_id", "answer_id"),
+    )
+
+class Tag(Base):
+    __tablename__ = "tags"
+
+    tag_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    name = Column(String(35), nullable=False, unique=True)
+    # Number of questions carrying the tag, maintained by QuestionService
+    usage_count = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Popular tags are read straight off this index
+    __table_args__ = (
+        Index("ix_tags_popular", text("usage_count DESC"), "name"),
+    )
+
+class QuestionTag(Base):
+    __tablename__ = "question_tags"
+
+    question_id = Column(UUID(as_uuid=True), ForeignKey("questions.question_id", ondelete="CASCADE"), primary_key=True)
+    tag_id = Column(UUID(as_uuid=True), ForeignKey("tags.tag_id", ondelete="CASCADE"), primary_key=True)
+    # Copied from the question so a tag's listing walks one index in listing order
+    question_created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_question_tags_tag_id_created_at", "tag_id", "question_created_at", "question_id"),
+    )
+
+class QuestionScore(Base):
+    __tablename__ = "question_scores"
+
+    question_id = Column(UUID(as_uuid=True), ForeignKey("questions.question_id", ondelete="CASCADE"), primary_key=True)
+    # Time-decayed ranking, recomputed on activity and by utils.feed_rescorer
+    hot_score = Column(Float, nullable=False, default=0, server_default="0")
+    # Last time the question was asked, edited, answered or had an answer accepted
+    last_activity_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    # One index per feed order, read newest or highest first
+    __table_args__ = (
+        Index("ix_question_scores_hot", "hot_score", "question_id"),
+        Index("ix_question_scores_active", "last_activity_at", "question_id"),
+    )
+
+class Notification(Base):
+    __tablename__ = "notifications"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    type = Column(Enum(NotificationTypeEnum, name="notification_type"), nullable=False)
+    title = Column(String(255), nullable=False)
+    message = Column(Text, nullable=False)
+    related_id = Column(UUID(as_uuid=True), nullable=True)
+    is_read = Column(Boolean, nullable=False, default=False, server_default="false")
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # Increasing across all inboxes; streams use it as the SSE event id to resume after
+    seq = Column(BigInteger, Identity(), nullable=False)
+
+    # A user's inbox, newest first, and its unread notifications
+    __table_args__ = (
+        Index("ix_notifications_user_id_seq", "user_id", "seq"),
+        Index("ix_notifications_unread", "user_id", postgresql_where=text("NOT is_read")),
+    )
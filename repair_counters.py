@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Repair Counters Script
+This script recomputes the denormalized answer counts and accepted answer
+pointers on questions from the answers table, the vote scores on
+questions and answers from the vote tables, and tag usage counts from
+question_tags. It also ranks questions missing from the question_scores
+feed table and recomputes every hot score. Run it after bulk data
+changes, or to backfill the columns on an existing database (migrations
+and imports call the steps, and backfill_search_vectors, directly). Votes still
+waiting in a running server's vote aggregator are added on top when it
+next flushes, so repair scores while the API is stopped.
+"""
+
+import asyncio
+from sqlalchemy import text
+from models import Question
+from utils.database_helper import async_engine
+from utils.ranking import refresh_hot_scores
+
+# Questions repaired per transaction, so row locks stay short
+REPAIR_BATCH_SIZE = 1000
+
+async def backfill_search_vectors(engine=None):
+    """Compute search_vector for questions missing it (created before full-text search, or bulk loaded), in batches"""
+    engine = engine or async_engine
+    total = 0
+    while True:
+        async with engine.begin() as conn:
+            result = await conn.execute(text("""
+                UPDATE questions
+                SET search_vector =
+                    setweight(to_tsvector('english'::regconfig, coalesce(title, '')), 'A') ||
+                    setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'B')
+                WHERE question_id IN (
+                    SELECT question_id FROM questions
+                    WHERE search_vector IS NULL
+                    LIMIT :batch_size
+                )
+            """), {"batch_size": REPAIR_BATCH_SIZE})
+        if result.rowcount == 0:
+            break
+        total += result.rowcount
+    print(f"✅ Backfilled search vectors for {total} questions")
+
+async def repair_question_counters(engine=None):
+    """Recompute answer_count and accepted_answer_id for every question, in batches"""
+    engine = engine or async_engine
+    repaired = 0
+    last_question_id = None
+    while True:
+        async with engine.begin() as conn:
+            result = await conn.execute(text("""
+                SELECT question_id FROM questions
+                WHERE CAST(:last_question_id AS uuid) IS NULL OR question_id > CAST(:last_question_id AS uuid)
+                ORDER BY question_id
+                LIMIT :batch_size
+            """), {"last_question_id": last_question_id, "batch_size": REPAIR_BATCH_SIZE})
+            question_ids = [row[0] for row in result]
+            if not question_ids:
+                break
+            last_question_id = str(question_ids[-1])
+
+            result = await conn.execute(text("""
+                UPDATE questions q
+                SET answer_count = counts.answer_count,
+                    accepted_answer_id = counts.accepted_answer_id
+                FROM (
+                    SELECT q2.question_id,
+                           count(a.answer_id) AS answer_count,
+                           (array_agg(a.answer_id ORDER BY a.created_at) FILTER (WHERE a.is_accepted))[1]
+                               AS accepted_answer_id
+                    FROM questions q2
+                    LEFT JOIN answers a ON a.question_id = q2.question_id
+                    WHERE q2.question_id = ANY(:question_ids)
+                    GROUP BY q2.question_id
+                ) counts
+                WHERE q.question_id = counts.question_id
+                  AND (q.answer_count IS DISTINCT FROM counts.answer_count
+                       OR q.accepted_answer_id IS DISTINCT FROM counts.accepted_answer_id)
+            """), {"question_ids": question_ids})
+            repaired += result.rowcount
+    print(f"✅ Repaired answer counters on {repaired} questions")
+
+# Per table: the vote table and the column linking votes to its rows
+SCORE_SOURCES = {
+    "questions": ("question_votes", "question_id"),
+    "answers": ("answer_votes", "answer_id"),
+}
+
+async def repair_vote_scores(engine=None):
+    """Recompute score on questions and answers from their votes, in batches"""
+    engine = engine or async_engine
+    for table, (vote_table, id_column) in SCORE_SOURCES.items():
+        repaired = 0
+        last_id = None
+        while True:
+            async with engine.begin() as conn:
+                result = await conn.execute(text(f"""
+                    SELECT {id_column} FROM {table}
+                    WHERE CAST(:last_id AS uuid) IS NULL OR {id_column} > CAST(:last_id AS uuid)
+                    ORDER BY {id_column}
+                    LIMIT :batch_size
+                """), {"last_id": last_id, "batch_size": REPAIR_BATCH_SIZE})
+                ids = [row[0] for row in result]
+                if not ids:
+                    break
+                last_id = str(ids[-1])
+
+                result = await conn.execute(text(f"""
+                    UPDATE {table} t
+                    SET score = scores.score
+                    FROM (
+                        SELECT t2.{id_column}, coalesce(sum(v.value), 0) AS score
+                        FROM {table} t2
+                        LEFT JOIN {vote_table} v ON v.{id_column} = t2.{id_column}
+                        WHERE t2.{id_column} = ANY(:ids)
+                        GROUP BY t2.{id_column}
+                    ) scores
+                    WHERE t.{id_column} = scores.{id_column} AND t.score IS DISTINCT FROM scores.score
+                """), {"ids": ids})
+                repaired += result.rowcount
+        print(f"✅ Repaired vote scores on {repaired} {table}")
+
+async def repair_tag_counts(engine=None):
+    """Recompute usage_count for every tag"""
+    engine = engine or async_engine
+    async with engine.begin() as conn:
+        result = await conn.execute(text("""
+            UPDATE tags t
+            SET usage_count = counts.usage_count
+            FROM (
+                SELECT t2.tag_id, count(qt.question_id) AS usage_count
+                FROM tags t2
+                LEFT JOIN question_tags qt ON qt.tag_id = t2.tag_id
+                GROUP BY t2.tag_id
+            ) counts
+            WHERE t.tag_id = counts.tag_id AND t.usage_count IS DISTINCT FROM counts.usage_count
+        """))
+    print(f"✅ Repaired usage counts on {result.rowcount} tags")
+
+async def repair_question_scores(engine=None):
+    """Add missing question_scores rows and recompute every hot score, in batches"""
+    engine = engine or async_engine
+    async with engine.begin() as conn:
+        # Last activity is approximated from edits and answers for questions ranked late
+        result = await conn.execute(text("""
+            INSERT INTO question_scores (question_id, hot_score, last_activity_at)
+            SELECT q.question_id, 0,
+                   greatest(q.created_at, q.updated_at, (SELECT max(a.created_at) FROM answers a
+                                                         WHERE a.question_id = q.question_id))
+            FROM questions q
+            ON CONFLICT (question_id) DO NOTHING
+        """))
+    print(f"✅ Ranked {result.rowcount} unranked questions")
+
+    rescored = 0
+    last_question_id = None
+    while True:
+        async with engine.begin() as conn:
+            result = await conn.execute(text("""
+                SELECT question_id FROM question_scores
+                WHERE CAST(:last_question_id AS uuid) IS NULL OR question_id > CAST(:last_question_id AS uuid)
+                ORDER BY question_id
+                LIMIT :batch_size
+            """), {"last_question_id": last_question_id, "batch_size": REPAIR_BATCH_SIZE})
+            question_ids = [row[0] for row in result]
+            if not question_ids:
+                break
+            last_question_id = str(question_ids[-1])
+
+            result = await conn.execute(refresh_hot_scores(Question.question_id.in_(question_ids)))
+            rescored += result.rowcount
+    print(f"✅ Recomputed hot scores on {rescored} questions")
+
+async def repair_counters():
+    """Repair every denormalized counter"""
+    await repair_question_counters()
+    await repair_vote_scores()
+    await repair_tag_counts()
+    await repair_question_scores()
+
+if __name__ == "__main__":
+    print("🔧 Repairing denormalized counters...")
+    asyncio.run(repair_counters())
+    print("✅ Counter repair completed!")
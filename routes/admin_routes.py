@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from utils.auth_helper import get_current_admin_user
+from utils.user_cache import CachedUser
+from utils.exception_handler import raise_exception
+from utils.export import ExportFramer, export_stream, decode_checkpoint, EXPORT_TABLES, EXPORT_FORMATS
+from utils.database_helper import async_engine, pool_settings
+from utils.metrics import pool_stats
+from utils.replicas import replica_router
+from schemas.response_schemas import create_response
+
+router = APIRouter()
+
+@router.get("/export")
+async def export_data(
+    tables: Optional[List[str]] = Query(None, description="Tables to export (repeat the parameter), all by default"),
+    compression: str = Query("none", pattern="^(none|gzip|zstd)$"),
+    after: Optional[str] = Query(None, description='Resume after a row, as "<type>:<id>" of the last line received'),
+    started_at: Optional[datetime] = Query(
+        None, description="When resuming, the X-Export-Started-At header of the interrupted export"
+    ),
+    current_user: CachedUser = Depends(get_current_admin_user)
+):
+    """
+    Stream users, questions and answers as NDJSON from one consistent snapshot (admin only).
+    Rows created after started_at (now, for a new export) are left out, so a resumed
+    export matches the interrupted one.
+    """
+    unknown = [table for table in tables or [] if table not in EXPORT_TABLES]
+    raise_exception(bool(unknown), f"Unknown tables: {', '.join(unknown)}")
+    if after:
+        try:
+            decode_checkpoint(after)
+        except ValueError:
+            raise_exception(True, "Invalid export checkpoint")
+        raise_exception(started_at is None, "Resuming an export needs its started_at")
+    if started_at is None:
+        started_at = datetime.utcnow()
+    elif started_at.tzinfo is not None:
+        # created_at is stored as naive UTC
+        started_at = started_at.astimezone(timezone.utc).replace(tzinfo=None)
+    try:
+        framer = ExportFramer(compression)
+    except RuntimeError as e:
+        raise_exception(True, str(e))
+
+    media_type, suffix = EXPORT_FORMATS[compression]
+    return StreamingResponse(
+        export_stream(framer, tables, after, started_at),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="stackit-export{suffix}"',
+            "X-Export-Started-At": started_at.isoformat()
+        }
+    )
+
+@router.get("/pool")
+async def get_pool_stats(current_user: CachedUser = Depends(get_current_admin_user)):
+    """This process's database pools: settings, live connections and waiters, wait times, replica health (admin only)"""
+    return create_response(data={
+        "settings": pool_settings(),
+        "stats": pool_stats(async_engine),
+        "replicas": replica_router.stats(),
+    })
@@ -1,22 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
-from utils.database_helper import get_async_db
-from utils.auth_helper import get_current_active_user
+from utils.database_helper import get_async_db, AsyncSessionLocal
+from utils.replicas import get_read_db
+from utils.auth_helper import get_current_principal, get_current_active_user, TokenPrincipal
+from utils.user_cache import CachedUser
 from database.answer_service import AnswerService
-from models import User
 from schemas.answer_schemas import AnswerCreate, AnswerUpdate, AnswerResponse, AnswerWithAuthor
 from schemas.response_schemas import create_response
+from database.vote_service import VoteService
+from schemas.vote_schemas import VoteCreate, VoteResult
+from utils.pagination import next_cursor
+from utils.serialization import schema_columns, row_items, render_list, list_response
+from models import Answer
+from utils.batch import validate_items, fetch_results
+from utils.exception_handler import raise_exception
+from schemas.batch_schemas import BatchCreate, BatchItemResult
+from consts import MAX_BATCH_ITEMS
+from utils.conditional import make_etag, is_not_modified, not_modified, set_validators
+from utils.response_cache import response_cache, CachedResponse, normalize_params, user_answers_tag
+from utils.broker import broker, question_topic
+from utils.sse import format_serialized_event, sse_response, HEARTBEAT, SSE_HEARTBEAT_SECONDS
+from database.question_service import QuestionService
 
 router = APIRouter()
 
+# List pages are read as plain rows of the response fields
+ANSWER_COLUMNS = schema_columns(Answer, AnswerResponse)
+
 @router.post("/")
 async def create_answer(
     answer_data: AnswerCreate,
     db: AsyncSession = Depends(get_async_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CachedUser = Depends(get_current_active_user)
 ):
     """Create a new answer"""
     answer_service = AnswerService(db)
@@ -28,42 +46,133 @@ async def create_answer(
         data=AnswerResponse.from_orm(answer)
     )
 
+@router.post("/batch")
+async def create_answers_batch(
+    batch: BatchCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CachedUser = Depends(get_current_active_user)
+):
+    """Create up to MAX_BATCH_ITEMS answers in one transaction, with a result per item"""
+    valid, results = validate_items(batch.items, AnswerCreate)
+    if valid:
+        answers = await AnswerService(db).create_answers([item for _, item in valid], current_user.user_id)
+        for (index, _), answer in zip(valid, answers):
+            results[index] = (
+                BatchItemResult(index=index, status=404, message="Question not found") if answer is None
+                else BatchItemResult(
+                    index=index, status=201, message="Answer created successfully", data=AnswerResponse.from_orm(answer)
+                )
+            )
+    created = sum(result.status == 201 for result in results.values())
+    
+    return create_response(
+        message=f"Created {created} of {len(batch.items)} answers",
+        data=[results[index] for index in range(len(batch.items))]
+    )
+
+@router.get("/batch")
+async def get_answers_batch(
+    ids: List[UUID] = Query(..., description="Answer ids (repeat the parameter)"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get up to MAX_BATCH_ITEMS answers with their authors in one query, with a result per id"""
+    raise_exception(len(ids) > MAX_BATCH_ITEMS, f"At most {MAX_BATCH_ITEMS} ids per request")
+    rows = await AnswerService(db).get_answers_with_authors(ids)
+    found = {
+        answer.answer_id: AnswerWithAuthor(**AnswerResponse.from_orm(answer).dict(), author_username=username)
+        for answer, username in rows
+    }
+    
+    return create_response(
+        data=fetch_results(ids, found, "Answer not found")
+    )
+
 @router.get("/question/{question_id}")
 async def get_answers_by_question(
     question_id: UUID,
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: AsyncSession = Depends(get_async_db)
+    after: Optional[str] = Query(None, description="Cursor from a previous page's next_cursor"),
+    sort: str = Query("oldest", pattern="^(oldest|score)$", description="oldest first, or highest score first"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get all answers for a specific question"""
-    answer_service = AnswerService(db)
-    answers = await answer_service.get_answers_by_question(question_id, skip=skip, limit=limit)
+    # Answer activity bumps the question's version, so it validates the whole list
+    validators = await QuestionService(db).get_question_validators(question_id)
+    if validators:
+        version, modified_at = validators
+        etag = make_etag("answers", question_id, version, request.url.query)
+        if is_not_modified(request, etag, modified_at):
+            return not_modified(etag, modified_at)
     
-    return create_response(
-        data=[AnswerResponse.from_orm(answer) for answer in answers]
+    answer_service = AnswerService(db)
+    answers = await answer_service.get_answers_by_question(
+        question_id, skip=skip, limit=limit, after=after, sort=sort, columns=ANSWER_COLUMNS
     )
+    cursor_attributes = ("score", "created_at", "answer_id") if sort == "score" else ("created_at", "answer_id")
+    
+    listing = list_response(answers, AnswerResponse, next_cursor(answers, limit, *cursor_attributes))
+    if validators:
+        set_validators(listing, etag, modified_at)
+    return listing
+
+@router.get("/question/{question_id}/stream")
+async def stream_answers_for_question(
+    question_id: UUID,
+    last_event_id: Optional[str] = Header(None)
+):
+    """
+    Server-Sent Events stream of answer activity on a question.
+
+    Events are answer_created, answer_updated, answer_accepted and
+    answer_deleted; a client that falls too far behind receives resync and
+    should re-fetch the answers. A reconnecting EventSource resumes after
+    its Last-Event-ID, or receives resync when events since then may have
+    been lost (the question went unwatched, or the id is from another worker).
+    """
+    # Checked in a short session so the open stream holds no pooled connection
+    async with AsyncSessionLocal() as db:
+        question = await QuestionService(db).get_question_by_id(question_id)
+    if not question:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Question not found"
+        )
+
+    async def events():
+        subscription = broker.subscribe(question_topic(question_id), last_event_id, SSE_HEARTBEAT_SECONDS)
+        async for messages in subscription:
+            if not messages:
+                yield HEARTBEAT
+                continue
+            yield "".join(
+                format_serialized_event(message.data, event=message.event, event_id=broker.event_id(message.seq))
+                for message in messages
+            )
+
+    return sse_response(events())
 
 @router.get("/my-answers")
 async def get_my_answers(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: AsyncSession = Depends(get_async_db),
-    current_user: User = Depends(get_current_active_user)
+    after: Optional[str] = Query(None, description="Cursor from a previous page's next_cursor"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get current user's answers"""
     answer_service = AnswerService(db)
     answers = await answer_service.get_answers_by_user(
-        current_user.user_id, skip=skip, limit=limit
+        current_user.user_id, skip=skip, limit=limit, after=after, columns=ANSWER_COLUMNS
     )
     
-    return create_response(
-        data=[AnswerResponse.from_orm(answer) for answer in answers]
-    )
+    return list_response(answers, AnswerResponse, next_cursor(answers, limit, "created_at", "answer_id"))
 
 @router.get("/{answer_id}")
 async def get_answer_by_id(
     answer_id: UUID,
-    db: AsyncSession = Depends(get_async_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get answer by ID with author information"""
     answer_service = AnswerService(db)
@@ -91,7 +200,7 @@ async def update_answer(
     answer_id: UUID,
     answer_data: AnswerUpdate,
     db: AsyncSession = Depends(get_async_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CachedUser = Depends(get_current_active_user)
 ):
     """Update answer (only by the author)"""
     answer_service = AnswerService(db)
@@ -108,7 +217,7 @@ async def update_answer(
 async def delete_answer(
     answer_id: UUID,
     db: AsyncSession = Depends(get_async_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CachedUser = Depends(get_current_active_user)
 ):
     """Delete an answer (only by the author)"""
     answer_service = AnswerService(db)
@@ -122,7 +231,7 @@ async def delete_answer(
 async def accept_answer(
     answer_id: UUID,
     db: AsyncSession = Depends(get_async_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CachedUser = Depends(get_current_active_user)
 ):
     """Mark an answer as accepted (only by question author)"""
     answer_service = AnswerService(db)
@@ -136,22 +245,34 @@ async def accept_answer(
 @router.get("/user/{user_id}")
 async def get_answers_by_user_id(
     user_id: UUID,
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = Query(None, description="Cursor from a previous page's next_cursor"),
     db: AsyncSession = Depends(get_async_db)
 ):
     """Get answers by user ID"""
-    answer_service = AnswerService(db)
-    answers = await answer_service.get_answers_by_user(user_id, skip=skip, limit=limit)
-    
-    return create_response(
-        data=[AnswerResponse.from_orm(answer) for answer in answers]
-    )
+    params = normalize_params(user_id=user_id, skip=skip, limit=limit, after=after)
+
+    async def render():
+        answers = await AnswerService(db).get_answers_by_user(
+            user_id, skip=skip, limit=limit, after=after, columns=ANSWER_COLUMNS
+        )
+        body = render_list(
+            row_items(answers, AnswerResponse), next_cursor(answers, limit, "created_at", "answer_id")
+        ).decode()
+        # Answers carry no version, so the body itself identifies the page
+        return CachedResponse(etag=make_etag(params, body), body=body)
+
+    listing = await response_cache.read_through("user_answers", [user_answers_tag(user_id)], params, render)
+    if is_not_modified(request, listing.etag):
+        return not_modified(listing.etag)
+    return listing.to_response()
 
 @router.get("/question/{question_id}/accepted")
 async def get_accepted_answer_for_question(
     question_id: UUID,
-    db: AsyncSession = Depends(get_async_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get the accepted answer for a question"""
     answer_service = AnswerService(db)
@@ -166,3 +287,49 @@ async def get_accepted_answer_for_question(
     return create_response(
         data=AnswerResponse.from_orm(answer)
     )
+
+@router.post("/{answer_id}/vote")
+async def vote_answer(
+    answer_id: UUID,
+    vote_data: VoteCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CachedUser = Depends(get_current_active_user)
+):
+    """Upvote or downvote an answer (one vote per user, direction can be changed)"""
+    vote_service = VoteService(db)
+    score = await vote_service.cast_vote("answer", answer_id, current_user.user_id, vote_data.vote_type)
+    
+    return create_response(
+        message="Vote recorded successfully",
+        data=VoteResult(item_id=answer_id, vote_type=vote_data.vote_type, score=score)
+    )
+
+@router.get("/{answer_id}/vote")
+async def get_my_answer_vote(
+    answer_id: UUID,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
+):
+    """Get the current user's vote on an answer"""
+    vote_service = VoteService(db)
+    vote_type = await vote_service.get_user_vote("answer", answer_id, current_user.user_id)
+    score = await vote_service.current_score("answer", answer_id)
+    
+    return create_response(
+        data=VoteResult(item_id=answer_id, vote_type=vote_type, score=score)
+    )
+
+@router.delete("/{answer_id}/vote")
+async def retract_answer_vote(
+    answer_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CachedUser = Depends(get_current_active_user)
+):
+    """Remove the current user's vote on an answer"""
+    vote_service = VoteService(db)
+    score = await vote_service.retract_vote("answer", answer_id, current_user.user_id)
+    
+    return create_response(
+        message="Vote removed successfully",
+        data=VoteResult(item_id=answer_id, score=score)
+    )
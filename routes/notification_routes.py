@@ -0,0 +1,137 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from uuid import UUID
+
+from database.notification_service import NotificationService
+from utils.auth_helper import get_current_principal, get_current_active_user, get_stream_principal, TokenPrincipal
+from utils.database_helper import get_async_db, AsyncSessionLocal
+from utils.replicas import get_read_db
+from utils.user_cache import CachedUser
+from utils.notifications import notification_hub, NOTIFICATION_INBOX_SIZE, NOTIFICATION_EVENT, UNREAD_EVENT
+from utils.sse import format_event, parse_last_event_id, sse_response, HEARTBEAT, SSE_HEARTBEAT_SECONDS
+from schemas.notification_schemas import NotificationResponse, UnreadCount
+from schemas.response_schemas import create_response
+
+router = APIRouter()
+
+# Registered without a trailing slash to match GET /api/users/notifications exactly
+@router.get("")
+async def get_notifications(
+    limit: int = Query(NOTIFICATION_INBOX_SIZE, ge=1, le=NOTIFICATION_INBOX_SIZE),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
+):
+    """Get the current user's notifications, newest first"""
+    notifications = await NotificationService(db).get_notifications(current_user.user_id, limit=limit)
+    
+    return create_response(
+        data=[NotificationResponse.from_orm(notification) for notification in notifications]
+    )
+
+@router.get("/unread-count")
+async def get_unread_count(
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
+):
+    """Get the number of unread notifications"""
+    return create_response(
+        data=UnreadCount(unread_count=await NotificationService(db).unread_count(current_user.user_id))
+    )
+
+@router.get("/stream")
+async def stream_notifications(
+    last_event_id: Optional[str] = Header(None),
+    current_user: TokenPrincipal = Depends(get_stream_principal)
+):
+    """
+    Server-Sent Events stream of the current user's notifications.
+
+    Sends the unread count on connect and whenever it changes. A
+    reconnecting EventSource resumes after its Last-Event-ID. Notifications
+    arrive from any worker through the hub; missed ones (on connect, or
+    after a resync) are read from the primary in a short session, so an
+    idle stream holds no pooled connection.
+    """
+    user_id = current_user.user_id
+    after_seq = parse_last_event_id(last_event_id)
+
+    def notification_event(data: dict) -> str:
+        data = dict(data)
+        return format_event(data, event="notification", event_id=data.pop("seq"))
+
+    async def catch_up(after_seq: Optional[int]):
+        """Unread count and notifications after after_seq (none when None), and the newest seq"""
+        async with AsyncSessionLocal() as db:
+            service = NotificationService(db)
+            unread = await service.unread_count(user_id)
+            if after_seq is None:
+                return unread, [], await service.last_seq(user_id)
+            missed = [service.event_data(notification)
+                      for notification in await service.get_notifications_after(user_id, after_seq)]
+        return unread, missed, missed[-1]["seq"] if missed else after_seq
+
+    async def events():
+        # Subscribed before reading the inbox, so nothing committed in between is lost
+        subscription = notification_hub.subscribe(user_id)
+        try:
+            unread, missed, seq = await catch_up(after_seq)
+            yield "".join(map(notification_event, missed)) + format_event({"unread_count": unread}, event="unread")
+            async for batch in subscription.events(SSE_HEARTBEAT_SECONDS):
+                if not batch:
+                    yield HEARTBEAT
+                    continue
+                chunks, unread = [], None
+                for event in batch:
+                    if event["kind"] == NOTIFICATION_EVENT:
+                        # Already sent when read from the inbox
+                        if event["notification"]["seq"] <= seq:
+                            continue
+                        seq = event["notification"]["seq"]
+                        chunks.append(notification_event(event["notification"]))
+                        unread = event["unread"]
+                    elif event["kind"] == UNREAD_EVENT:
+                        unread = event["unread"]
+                    else:
+                        unread, missed, seq = await catch_up(seq)
+                        chunks.extend(map(notification_event, missed))
+                if unread is not None:
+                    chunks.append(format_event({"unread_count": unread}, event="unread"))
+                if chunks:
+                    yield "".join(chunks)
+        finally:
+            subscription.close()
+
+    return sse_response(events())
+
+@router.patch("/read-all")
+async def mark_all_notifications_as_read(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CachedUser = Depends(get_current_active_user)
+):
+    """Mark all of the current user's notifications as read"""
+    await NotificationService(db).mark_all_read(current_user.user_id)
+    
+    return create_response(
+        message="All notifications marked as read"
+    )
+
+@router.patch("/{notification_id}/read")
+async def mark_notification_as_read(
+    notification_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CachedUser = Depends(get_current_active_user)
+):
+    """Mark a notification as read"""
+    notification = await NotificationService(db).mark_read(current_user.user_id, notification_id)
+    
+    if not notification:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Notification not found"
+        )
+    
+    return create_response(
+        message="Notification marked as read",
+        data=NotificationResponse.from_orm(notification)
+    )
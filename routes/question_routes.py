@@ -1,22 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from uuid import UUID
 
-from utils.database_helper import get_async_db
-from utils.auth_helper import get_current_active_user
-from database.question_service import QuestionService
-from models import User
-from schemas.question_schemas import QuestionCreate, QuestionUpdate, QuestionResponse, QuestionWithAuthor
+from utils.database_helper import get_async_db, AsyncSessionLocal
+from utils.replicas import get_read_db, read_session
+from utils.auth_helper import get_current_principal, get_current_active_user, get_current_admin_user, TokenPrincipal
+from utils.user_cache import CachedUser
+from database.question_service import QuestionService, feed_cursor_attributes, FEED_SORTS
+from database.tag_service import TagService
+from schemas.question_schemas import (
+    QuestionCreate, QuestionUpdate, QuestionResponse, QuestionWithAuthor, QuestionSearchResult, QuestionDetail
+)
+from schemas.answer_schemas import AnswerWithAuthor
 from schemas.response_schemas import create_response
+from database.vote_service import VoteService
+from schemas.vote_schemas import VoteCreate, VoteResult
+from utils.pagination import next_cursor, encode_cursor
+from utils.serialization import schema_columns, row_items, render_list, list_response
+from models import Question
+from utils.batch import validate_items, fetch_results
+from utils.exception_handler import raise_exception
+from schemas.batch_schemas import BatchCreate, BatchItemResult
+from consts import MAX_BATCH_ITEMS
+from utils.conditional import make_etag, is_not_modified, not_modified, set_validators
+from utils.response_cache import (
+    response_cache, CachedResponse, normalize_params, QUESTIONS_TAG, HOT_FEED_TAG, user_questions_tag,
+    RESPONSE_CACHE_WARM_PAGES
+)
 
 router = APIRouter()
 
+# List pages are read as plain rows of the response fields, plus the version for ETags
+QUESTION_COLUMNS = schema_columns(Question, QuestionResponse)
+QUESTION_VERSION_COLUMNS = schema_columns(Question, QuestionResponse, Question.version)
+
 @router.post("/")
 async def create_question(
     question_data: QuestionCreate,
     db: AsyncSession = Depends(get_async_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CachedUser = Depends(get_current_active_user)
 ):
     """Create a new question"""
     question_service = QuestionService(db)
@@ -28,49 +51,187 @@ async def create_question(
         data=QuestionResponse.from_orm(question)
     )
 
+@router.post("/batch")
+async def create_questions_batch(
+    batch: BatchCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CachedUser = Depends(get_current_active_user)
+):
+    """Create up to MAX_BATCH_ITEMS questions in one transaction, with a result per item"""
+    valid, results = validate_items(batch.items, QuestionCreate)
+    if valid:
+        questions = await QuestionService(db).create_questions([item for _, item in valid], current_user.user_id)
+        for (index, _), question in zip(valid, questions):
+            results[index] = BatchItemResult(
+                index=index, status=201, message="Question created successfully",
+                data=QuestionResponse.from_orm(question)
+            )
+    
+    return create_response(
+        message=f"Created {len(valid)} of {len(batch.items)} questions",
+        data=[results[index] for index in range(len(batch.items))]
+    )
+
+@router.get("/batch")
+async def get_questions_batch(
+    ids: List[UUID] = Query(..., description="Question ids (repeat the parameter)"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get up to MAX_BATCH_ITEMS questions with their authors in one query, with a result per id"""
+    raise_exception(len(ids) > MAX_BATCH_ITEMS, f"At most {MAX_BATCH_ITEMS} ids per request")
+    rows = await QuestionService(db).get_questions_with_authors(ids)
+    found = {
+        question.question_id: QuestionWithAuthor(**QuestionResponse.from_orm(question).dict(), author_username=username)
+        for question, username in rows
+    }
+    
+    return create_response(
+        data=fetch_results(ids, found, "Question not found")
+    )
+
 @router.get("/")
 async def get_all_questions(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    search: Optional[str] = Query(None, description="Search term for questions"),
+    after: Optional[str] = Query(None, description="Cursor from a previous page's next_cursor"),
+    search: Optional[str] = Query(
+        None,
+        description='Full-text search: words, "exact phrases", prefix*, -excluded, a OR b'
+    ),
+    unanswered: bool = Query(False, description="Only questions without answers"),
+    tags: Optional[List[str]] = Query(None, description="Only questions with these tags (repeat the parameter)"),
+    tags_match: str = Query("all", pattern="^(all|any)$", description="Require all of the tags, or any of them"),
+    sort: str = Query(
+        "newest",
+        pattern="^(newest|oldest|hot|active|unanswered|most_voted|most_answered)$",
+        description="Listing order (ignored by search, which orders by relevance)"
+    ),
     db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all questions with optional search"""
-    question_service = QuestionService(db)
+    """Get all questions with optional search and tag filters"""
+    tags = [tag.strip().lower() for tag in tags or [] if tag.strip()]
+    match_all_tags = tags_match == "all"
     
     if search:
-        questions = await question_service.search_questions(search, skip=skip, limit=limit)
-    else:
-        questions = await question_service.get_all_questions(skip=skip, limit=limit)
+        async with read_session(request) as read_db:
+            results = await QuestionService(read_db).search_questions(
+                search, skip=skip, limit=limit, after=after, tags=tags, match_all_tags=match_all_tags,
+                columns=QUESTION_COLUMNS
+            )
+        cursor = None
+        if len(results) == limit:
+            last = results[-1]
+            cursor = encode_cursor(last.rank, last.created_at, last.question_id)
+        
+        return list_response(results, QuestionSearchResult, cursor)
     
+    if sort == "unanswered":
+        unanswered, sort = True, "newest"
+    # Pages fill the response cache shared by every client, so they are rendered from the primary
+    listing = await read_question_listing(db, skip, limit, after, unanswered, tags, tags_match, sort)
+    if is_not_modified(request, listing.etag):
+        return not_modified(listing.etag)
+    return listing.to_response()
+
+async def read_question_listing(db: AsyncSession, skip: int = 0, limit: int = 100, after: Optional[str] = None,
+                                unanswered: bool = False, tags: Optional[List[str]] = None,
+                                tags_match: str = "all", sort: str = "newest") -> CachedResponse:
+    """Serialized page of GET /api/questions/ (without search), read through the response cache"""
+    params = normalize_params(
+        skip=skip, limit=limit, after=after, unanswered=unanswered, tags=tags, tags_match=tags_match, sort=sort
+    )
+
+    async def render():
+        questions = await QuestionService(db).get_all_questions(
+            skip=skip, limit=limit, after=after, unanswered=unanswered, tags=tags,
+            match_all_tags=tags_match == "all", sort=sort,
+            columns=schema_columns(Question, QuestionResponse, Question.version, *FEED_SORTS[sort][0])
+        )
+        return CachedResponse(
+            # The page's ids and versions identify it
+            etag=make_etag(params, *((question.question_id, question.version) for question in questions)),
+            body=render_list(
+                row_items(questions, QuestionResponse),
+                next_cursor(questions, limit, *feed_cursor_attributes(sort, rows=True))
+            ).decode()
+        )
+
+    cache_tags = [QUESTIONS_TAG, HOT_FEED_TAG] if sort == "hot" else [QUESTIONS_TAG]
+    return await response_cache.read_through("questions", cache_tags, params, render)
+
+async def warm_question_listings(pages: int = RESPONSE_CACHE_WARM_PAGES, limit: int = 100):
+    """Load the first pages of the question listing into the response cache"""
+    try:
+        async with AsyncSessionLocal() as db:
+            for page in range(pages):
+                await read_question_listing(db, skip=page * limit, limit=limit)
+    except Exception as e:
+        # Unwarmed pages are simply cached on their first request
+        print(f"⚠️ Warming question listings failed: {e}")
+        return
+    print(f"✅ Warmed {pages} question listing pages")
+
+@router.get("/tags/popular")
+async def get_popular_tags(
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get the most used tag names, most used first"""
+    tag_service = TagService(db)
+    tags = await tag_service.get_popular_tags(limit=limit)
+    
+    return create_response(
+        data=[tag.name for tag in tags]
+    )
+
+@router.get("/cache-stats")
+async def get_response_cache_stats(
+    current_user: CachedUser = Depends(get_current_admin_user)
+):
+    """Get listing response cache counters (admin only)"""
     return create_response(
-        data=[QuestionResponse.from_orm(question) for question in questions]
+        data=response_cache.stats()
     )
 
 @router.get("/my-questions")
 async def get_my_questions(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: AsyncSession = Depends(get_async_db),
-    current_user: User = Depends(get_current_active_user)
+    after: Optional[str] = Query(None, description="Cursor from a previous page's next_cursor"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get current user's questions"""
     question_service = QuestionService(db)
     questions = await question_service.get_questions_by_user(
-        current_user.user_id, skip=skip, limit=limit
+        current_user.user_id, skip=skip, limit=limit, after=after, columns=QUESTION_COLUMNS
     )
     
-    return create_response(
-        data=[QuestionResponse.from_orm(question) for question in questions]
-    )
+    return list_response(questions, QuestionResponse, next_cursor(questions, limit, "created_at", "question_id"))
 
 @router.get("/{question_id}")
 async def get_question_by_id(
     question_id: UUID,
-    db: AsyncSession = Depends(get_async_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get question by ID with author information"""
     question_service = QuestionService(db)
+    
+    # Revalidation needs only the version, not the question itself
+    validators = await question_service.get_question_validators(question_id)
+    if not validators:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Question not found"
+        )
+    version, modified_at = validators
+    etag = make_etag("question", question_id, version)
+    if is_not_modified(request, etag, modified_at):
+        return not_modified(etag, modified_at)
+    
     question_with_author = await question_service.get_question_with_author(question_id)
     
     if not question_with_author:
@@ -85,6 +246,56 @@ async def get_question_by_id(
         **question_data.dict(),
         author_username=question_with_author["author_username"]
     )
+    set_validators(response, etag, modified_at)
+    
+    return create_response(
+        data=response_data
+    )
+
+@router.get("/{question_id}/detail")
+async def get_question_detail(
+    question_id: UUID,
+    request: Request,
+    response: Response,
+    answers_skip: int = Query(0, ge=0),
+    answers_limit: int = Query(100, ge=1, le=1000),
+    answers_after: Optional[str] = Query(None, description="Cursor from a previous answers_next_cursor"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get question, author, a page of answers with authors and the accepted answer in one query"""
+    question_service = QuestionService(db)
+    
+    validators = await question_service.get_question_validators(question_id)
+    if not validators:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Question not found"
+        )
+    version, modified_at = validators
+    etag = make_etag("detail", question_id, version, request.url.query)
+    if is_not_modified(request, etag, modified_at):
+        return not_modified(etag, modified_at)
+    
+    detail = await question_service.get_question_detail(
+        question_id, answers_skip=answers_skip, answers_limit=answers_limit, answers_after=answers_after
+    )
+    
+    if not detail:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Question not found"
+        )
+    
+    answers = [AnswerWithAuthor(**answer) for answer in detail["answers"]]
+    accepted_answer = detail["accepted_answer"]
+    response_data = QuestionDetail(
+        **QuestionResponse.from_orm(detail["question"]).dict(),
+        author_username=detail["author_username"],
+        answers=answers,
+        accepted_answer=AnswerWithAuthor(**accepted_answer) if accepted_answer else None,
+        answers_next_cursor=next_cursor(answers, answers_limit, "created_at", "answer_id")
+    )
+    set_validators(response, etag, modified_at)
     
     return create_response(
         data=response_data
@@ -95,7 +306,7 @@ async def update_question(
     question_id: UUID,
     question_data: QuestionUpdate,
     db: AsyncSession = Depends(get_async_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CachedUser = Depends(get_current_active_user)
 ):
     """Update question (only by the author)"""
     question_service = QuestionService(db)
@@ -112,7 +323,7 @@ async def update_question(
 async def delete_question(
     question_id: UUID,
     db: AsyncSession = Depends(get_async_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CachedUser = Depends(get_current_active_user)
 ):
     """Delete question (only by the author)"""
     question_service = QuestionService(db)
@@ -125,14 +336,73 @@ async def delete_question(
 @router.get("/user/{user_id}")
 async def get_questions_by_user_id(
     user_id: UUID,
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = Query(None, description="Cursor from a previous page's next_cursor"),
     db: AsyncSession = Depends(get_async_db)
 ):
     """Get questions by user ID"""
-    question_service = QuestionService(db)
-    questions = await question_service.get_questions_by_user(user_id, skip=skip, limit=limit)
+    params = normalize_params(user_id=user_id, skip=skip, limit=limit, after=after)
+
+    async def render():
+        questions = await QuestionService(db).get_questions_by_user(
+            user_id, skip=skip, limit=limit, after=after, columns=QUESTION_VERSION_COLUMNS
+        )
+        return CachedResponse(
+            etag=make_etag(params, *((question.question_id, question.version) for question in questions)),
+            body=render_list(
+                row_items(questions, QuestionResponse), next_cursor(questions, limit, "created_at", "question_id")
+            ).decode()
+        )
+
+    listing = await response_cache.read_through("user_questions", [user_questions_tag(user_id)], params, render)
+    if is_not_modified(request, listing.etag):
+        return not_modified(listing.etag)
+    return listing.to_response()
+
+@router.post("/{question_id}/vote")
+async def vote_question(
+    question_id: UUID,
+    vote_data: VoteCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CachedUser = Depends(get_current_active_user)
+):
+    """Upvote or downvote a question (one vote per user, direction can be changed)"""
+    vote_service = VoteService(db)
+    score = await vote_service.cast_vote("question", question_id, current_user.user_id, vote_data.vote_type)
+    
+    return create_response(
+        message="Vote recorded successfully",
+        data=VoteResult(item_id=question_id, vote_type=vote_data.vote_type, score=score)
+    )
+
+@router.get("/{question_id}/vote")
+async def get_my_question_vote(
+    question_id: UUID,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
+):
+    """Get the current user's vote on a question"""
+    vote_service = VoteService(db)
+    vote_type = await vote_service.get_user_vote("question", question_id, current_user.user_id)
+    score = await vote_service.current_score("question", question_id)
+    
+    return create_response(
+        data=VoteResult(item_id=question_id, vote_type=vote_type, score=score)
+    )
+
+@router.delete("/{question_id}/vote")
+async def retract_question_vote(
+    question_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CachedUser = Depends(get_current_active_user)
+):
+    """Remove the current user's vote on a question"""
+    vote_service = VoteService(db)
+    score = await vote_service.retract_vote("question", question_id, current_user.user_id)
     
     return create_response(
-        data=[QuestionResponse.from_orm(question) for question in questions]
+        message="Vote removed successfully",
+        data=VoteResult(item_id=question_id, score=score)
     )
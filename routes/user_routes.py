@@ -1,17 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from uuid import UUID
 
 from utils.database_helper import get_async_db
-from utils.auth_helper import get_current_active_user, create_access_token
+from utils.replicas import get_read_db
+from utils.auth_helper import (
+    get_current_active_user, get_current_principal, get_current_db_user, get_current_admin_user,
+    create_user_access_token, TokenPrincipal
+)
+from utils.user_cache import user_cache, CachedUser
 from database.users import UserService
 from models import User
 from schemas.user_schemas import UserCreate, UserUpdate, UserResponse, UserLogin, Token
 from schemas.response_schemas import create_response
+from utils.serialization import schema_columns, list_response
+from utils.batch import fetch_results
+from utils.exception_handler import raise_exception
+from consts import MAX_BATCH_ITEMS
 
 router = APIRouter()
 
+# The user listing is read as plain rows of the response fields
+USER_COLUMNS = schema_columns(User, UserResponse)
+
 @router.post("/register")
 async def register_user(
     user_data: UserCreate,
@@ -45,7 +57,7 @@ async def login_user(
             detail="Incorrect email or password"
         )
     
-    access_token = create_access_token(data={"sub": user.email})
+    access_token = create_user_access_token(user)
     
     return create_response(
         message="Login successful",
@@ -61,26 +73,48 @@ async def get_current_user_info(
         data=UserResponse.from_orm(current_user)
     )
 
+@router.get("/cache-stats")
+async def get_user_cache_stats(
+    current_user: CachedUser = Depends(get_current_admin_user)
+):
+    """Get authenticated-user cache counters (admin only)"""
+    return create_response(
+        data=user_cache.stats()
+    )
+
 @router.get("/")
 async def get_all_users(
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_async_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get all users (admin only)"""
     user_service = UserService(db)
-    users = await user_service.get_all_users(skip=skip, limit=limit)
+    users = await user_service.get_all_users(skip=skip, limit=limit, columns=USER_COLUMNS)
+    
+    return list_response(users, UserResponse)
+
+@router.get("/batch")
+async def get_users_batch(
+    ids: List[UUID] = Query(..., description="User ids (repeat the parameter)"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
+):
+    """Get up to MAX_BATCH_ITEMS users in one query, with a result per id"""
+    raise_exception(len(ids) > MAX_BATCH_ITEMS, f"At most {MAX_BATCH_ITEMS} ids per request")
+    users = await UserService(db).get_users_by_ids(ids)
+    found = {user.user_id: UserResponse.from_orm(user) for user in users}
     
     return create_response(
-        data=[UserResponse.from_orm(user) for user in users]
+        data=fetch_results(ids, found, "User not found")
     )
 
 @router.get("/{user_id}")
 async def get_user_by_id(
     user_id: UUID,
-    db: AsyncSession = Depends(get_async_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get user by ID"""
     user_service = UserService(db)
@@ -101,7 +135,7 @@ async def update_user(
     user_id: UUID,
     user_data: UserUpdate,
     db: AsyncSession = Depends(get_async_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CachedUser = Depends(get_current_db_user)
 ):
     """Update user (only own profile or admin)"""
     # Check if user is updating their own profile or is admin
@@ -123,7 +157,7 @@ async def update_user(
 async def delete_user(
     user_id: UUID,
     db: AsyncSession = Depends(get_async_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CachedUser = Depends(get_current_db_user)
 ):
     """Delete user (admin only)"""
     if current_user.role != "admin":
@@ -22,6 +22,7 @@ class AnswerResponse(AnswerBase):
     question_id: UUID
     user_id: UUID
     is_accepted: bool
+    score: int = 0
     created_at: datetime
     
     class Config:
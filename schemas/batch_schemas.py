@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+from typing import Optional, Any, List, Dict
+from consts import MAX_BATCH_ITEMS
+
+# Batch Create Schema (each item is validated on its own, so one bad item fails alone)
+class BatchCreate(BaseModel):
+    items: List[Dict[str, Any]] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
+
+# Per-item result of a batch request, shaped like the response envelope
+class BatchItemResult(BaseModel):
+    index: int
+    status: int
+    message: str
+    data: Optional[Any] = None
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from uuid import UUID
+from consts import NotificationTypeEnum
+
+# Notification Response Schema
+class NotificationResponse(BaseModel):
+    id: UUID
+    user_id: UUID
+    type: NotificationTypeEnum
+    title: str
+    message: str
+    is_read: bool
+    created_at: datetime
+    related_id: Optional[UUID] = None
+    
+    class Config:
+        from_attributes = True
+
+# Unread Count Schema
+class UnreadCount(BaseModel):
+    unread_count: int
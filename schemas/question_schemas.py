@@ -1,7 +1,22 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from typing import Optional, List
 from datetime import datetime
 from uuid import UUID
+import re
+from schemas.answer_schemas import AnswerWithAuthor
+from consts import TAG_PATTERN, MAX_TAGS_PER_QUESTION
+
+def normalize_tags(tags: Optional[List[str]]) -> Optional[List[str]]:
+    """Lowercase, deduplicate and validate tag names, keeping their order"""
+    if tags is None:
+        return None
+    normalized = list(dict.fromkeys(tag.strip().lower() for tag in tags if tag.strip()))
+    if len(normalized) > MAX_TAGS_PER_QUESTION:
+        raise ValueError(f"A question can have at most {MAX_TAGS_PER_QUESTION} tags")
+    for tag in normalized:
+        if not re.match(TAG_PATTERN, tag):
+            raise ValueError(f"Invalid tag: {tag}")
+    return normalized
 
 # Base Question Schema
 class QuestionBase(BaseModel):
@@ -10,12 +25,17 @@ class QuestionBase(BaseModel):
 
 # Create Question Schema
 class QuestionCreate(QuestionBase):
-    pass
+    tags: List[str] = []
+
+    _normalize_tags = field_validator("tags")(normalize_tags)
 
 # Update Question Schema
 class QuestionUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
+    tags: Optional[List[str]] = None
+
+    _normalize_tags = field_validator("tags")(normalize_tags)
 
 # Question Response Schema
 class QuestionResponse(QuestionBase):
@@ -23,10 +43,26 @@ class QuestionResponse(QuestionBase):
     user_id: UUID
     created_at: datetime
     updated_at: Optional[datetime] = None
+    answer_count: int = 0
+    accepted_answer_id: Optional[UUID] = None
+    score: int = 0
+    tags: List[str] = []
     
     class Config:
         from_attributes = True
 
 # Question with Author Schema
 class QuestionWithAuthor(QuestionResponse):
-    author_username: str 
\ No newline at end of file
+    author_username: str 
+
+# Question Detail Schema (question, author, a page of answers and the accepted answer)
+class QuestionDetail(QuestionWithAuthor):
+    answers: List[AnswerWithAuthor]
+    accepted_answer: Optional[AnswerWithAuthor] = None
+    answers_next_cursor: Optional[str] = None
+
+# Question Search Result Schema
+class QuestionSearchResult(QuestionResponse):
+    rank: float
+    title_highlight: str
+    snippet: str
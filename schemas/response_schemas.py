@@ -3,11 +3,14 @@ from typing import Optional, Any, Generic, TypeVar
 
 T = TypeVar('T')
 
+DEFAULT_MESSAGE = "Operation successfully done"
+
 class APIResponse(BaseModel, Generic[T]):
     status: int
     message: str
     data: Optional[T] = None
 
-def create_response(status: int = 200, message: str = "Operation successfully done", data: Any = None):
+# Paginated listings add next_cursor to this envelope (utils.serialization.render_list)
+def create_response(status: int = 200, message: str = DEFAULT_MESSAGE, data: Any = None):
     """Helper function to create consistent API responses"""
     return APIResponse(status=status, message=message, data=data) 
\ No newline at end of file
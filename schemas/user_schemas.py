@@ -41,4 +41,7 @@ class Token(BaseModel):
 
 # Token Data Schema
 class TokenData(BaseModel):
-    email: Optional[str] = None 
\ No newline at end of file
+    email: Optional[str] = None
+    user_id: Optional[UUID] = None
+    role: Optional[UserTypeEnum] = None
+    token_version: Optional[int] = None 
\ No newline at end of file
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Optional
+from uuid import UUID
+from consts import VoteTypeEnum
+
+# Cast Vote Schema
+class VoteCreate(BaseModel):
+    vote_type: VoteTypeEnum
+
+# Vote Result Schema (the caller's vote and the item's score including unflushed votes)
+class VoteResult(BaseModel):
+    item_id: UUID
+    vote_type: Optional[VoteTypeEnum] = None
+    score: int
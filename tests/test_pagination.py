@@ -0,0 +1,45 @@
+import base64
+import json
+from datetime import datetime
+from uuid import UUID, uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from utils.pagination import encode_cursor, decode_cursor
+
+
+def raw_cursor(values) -> str:
+    """Cursor carrying arbitrary JSON, as a client could craft it"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def test_round_trip():
+    values = (3, datetime(2024, 1, 1, 12, 30), uuid4())
+    assert decode_cursor(encode_cursor(*values), int, datetime, UUID) == values
+
+
+def test_float_key_accepts_ints():
+    assert decode_cursor(encode_cursor(2, uuid4()), float, UUID)[0] == 2.0
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64 json",
+    raw_cursor({"a": 1}),
+    raw_cursor(["2024-01-01T00:00:00"]),
+    raw_cursor(["2024-01-01T00:00:00", [1, 2]]),
+    raw_cursor(["2024-01-01T00:00:00", 5]),
+    raw_cursor([[1], str(uuid4())]),
+    raw_cursor([None, str(uuid4())]),
+    raw_cursor(["yesterday", str(uuid4())]),
+])
+def test_malformed_cursor_is_a_bad_request(cursor):
+    with pytest.raises(HTTPException) as raised:
+        decode_cursor(cursor, datetime, UUID)
+    assert raised.value.status_code == 400
+
+
+@pytest.mark.parametrize("score", ["5", 1.5, True, None, [5]])
+def test_int_key_rejects_other_json_types(score):
+    with pytest.raises(HTTPException):
+        decode_cursor(raw_cursor([score, "2024-01-01T00:00:00", str(uuid4())]), int, datetime, UUID)
@@ -1,16 +1,24 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Union
+from uuid import UUID
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import HTTPException, status, Depends
+from fastapi import HTTPException, status, Depends, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import text
+import json
 import os
 from dotenv import load_dotenv
 
 from models import User
-from utils.database_helper import get_async_db
+from utils.database_helper import get_async_db, AsyncSessionLocal
+from utils.user_cache import user_cache, CachedUser, TokenVersionRegistry
+from utils.password_executor import password_executor
+from utils.pg_listener import ChannelListener
+from consts import UserTypeEnum
 from schemas.user_schemas import TokenData
 
 load_dotenv()
@@ -18,13 +26,50 @@ load_dotenv()
 # Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here-change-in-production")
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # Security scheme
 security = HTTPBearer()
+# Streams also accept ?token=, since EventSource cannot send an Authorization header
+optional_security = HTTPBearer(auto_error=False)
+
+# Token versions changed since the oldest live token was minted
+token_versions = TokenVersionRegistry(ttl_seconds=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+# Postgres channel carrying user changes (updates, deletions) to every worker
+USER_CHANGES_CHANNEL = "stackit_user_changes"
+
+async def announce_user_change(db: AsyncSession, user_id: UUID, token_version: Optional[int] = None,
+                               deleted: bool = False):
+    """
+    Tell every worker to drop its cached copy of a user, and record a new
+    token version or the deletion, once db's transaction commits
+    """
+    payload = json.dumps({"user_id": str(user_id), "token_version": token_version, "deleted": deleted})
+    await db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": USER_CHANGES_CHANNEL, "payload": payload})
+
+def apply_user_change(payload: str):
+    """Apply a user change announced by any worker to this one"""
+    change = json.loads(payload)
+    user_id = UUID(change["user_id"])
+    user_cache.invalidate_user(user_id)
+    if change["deleted"]:
+        token_versions.record_deleted(user_id)
+    elif change["token_version"] is not None:
+        token_versions.record(user_id, change["token_version"])
+
+# Changes sent while disconnected are lost, so the user cache starts over on reconnect
+user_change_listener = ChannelListener(USER_CHANGES_CHANNEL, apply_user_change, user_cache.clear)
+
+@dataclass(frozen=True)
+class TokenPrincipal:
+    """Identity taken from token claims alone, without touching the database"""
+    user_id: UUID
+    email: str
+    role: UserTypeEnum
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
@@ -34,6 +79,14 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password executor instead of the event loop"""
+    return await password_executor.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the password executor instead of the event loop"""
+    return await password_executor.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -46,6 +99,15 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def create_user_access_token(user) -> str:
+    """Create an access token carrying the claims routes authorize with"""
+    return create_access_token(data={
+        "sub": user.email,
+        "uid": str(user.user_id),
+        "role": UserTypeEnum(user.role).value,
+        "ver": user.token_version
+    })
+
 def verify_token(token: str) -> TokenData:
     """Verify and decode a JWT token"""
     try:
@@ -57,9 +119,14 @@ def verify_token(token: str) -> TokenData:
                 detail="Could not validate credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        token_data = TokenData(email=email)
+        token_data = TokenData(
+            email=email,
+            user_id=payload.get("uid"),
+            role=payload.get("role"),
+            token_version=payload.get("ver")
+        )
         return token_data
-    except JWTError:
+    except (JWTError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
@@ -69,11 +136,19 @@ def verify_token(token: str) -> TokenData:
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_async_db)
-) -> User:
-    """Get the current authenticated user"""
+) -> CachedUser:
+    """
+    Get the current authenticated user, served from the user cache when
+    possible: only while this worker hears other workers' user changes
+    """
     token = credentials.credentials
     token_data = verify_token(token)
     
+    if user_change_listener.connected:
+        cached_user = user_cache.get(token_data.email)
+        if cached_user is not None:
+            return cached_user
+    
     result = await db.execute(select(User).filter(User.email == token_data.email))
     user = result.scalar_one_or_none()
     
@@ -84,8 +159,110 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    return user
+    cached_user = CachedUser.from_user(user)
+    user_cache.set(token_data.email, cached_user)
+    return cached_user
+
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> Union[TokenPrincipal, CachedUser]:
+    """
+    Get the current user's id, email and role for read routes.
+
+    Tokens carrying uid/role/ver claims are trusted without a database round
+    trip unless this process knows the user's token version has moved on
+    (role or email change, deletion). Stale tokens are re-resolved by user
+    id so the current role applies; tokens without the claims fall back to
+    get_current_user. Version changes reach other workers asynchronously, so
+    writes authorize with get_current_active_user and admin checks with
+    get_current_db_user instead.
+    """
+    token_data = verify_token(credentials.credentials)
+    
+    if token_data.user_id is None or token_data.role is None or token_data.token_version is None:
+        return await get_current_user(credentials, db)
+    
+    if token_versions.is_current(token_data.user_id, token_data.token_version):
+        return TokenPrincipal(
+            user_id=token_data.user_id,
+            email=token_data.email,
+            role=token_data.role
+        )
+    
+    result = await db.execute(select(User).filter(User.user_id == token_data.user_id))
+    user = result.scalar_one_or_none()
+    
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    token_versions.record(user.user_id, user.token_version)
+    return CachedUser.from_user(user)
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_stream_principal(
+    token: Optional[str] = Query(None, description="Access token, for clients that cannot set headers"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> Union[TokenPrincipal, CachedUser]:
+    """
+    Authenticate a long-lived stream from the Authorization header or ?token=.
+
+    Any database lookup runs in its own short session, so an open stream does
+    not keep a pooled connection checked out.
+    """
+    if credentials is None:
+        if not token:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Not authenticated",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    
+    async with AsyncSessionLocal() as db:
+        return await get_current_principal(credentials, db)
+
+async def get_current_active_user(current_user: CachedUser = Depends(get_current_user)) -> CachedUser:
     """Get the current active user"""
+    return current_user
+
+async def get_current_db_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> CachedUser:
+    """
+    Get the current user from their row, never from the token or a cache.
+
+    For role checks: a demotion or deletion made through any worker applies
+    to the very next request.
+    """
+    token_data = verify_token(credentials.credentials)
+    if token_data.user_id is not None:
+        query = select(User).filter(User.user_id == token_data.user_id)
+    else:
+        query = select(User).filter(User.email == token_data.email)
+    result = await db.execute(query)
+    user = result.scalar_one_or_none()
+    
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    return CachedUser.from_user(user)
+
+async def get_current_admin_user(
+    current_user: CachedUser = Depends(get_current_db_user)
+) -> CachedUser:
+    """Get the current user, requiring the admin role"""
+    if current_user.role != UserTypeEnum.admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
     return current_user 
\ No newline at end of file
@@ -0,0 +1,44 @@
+from typing import Any, Dict, Iterable, List, Sequence, Tuple, Type
+
+from fastapi import status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from schemas.batch_schemas import BatchItemResult
+
+
+def matches_any(column, values: Iterable[Any]):
+    """column = ANY(:values) with the values bound as one array, so every batch size shares a statement"""
+    return column == any_(bindparam(f"{column.key}_values", list(values), type_=ARRAY(column.type)))
+
+
+def describe_validation_error(error: Exception) -> str:
+    """One-line reason for an item that failed validation"""
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+    return str(error)
+
+
+def validate_items(items: Sequence[Dict[str, Any]],
+                   schema: Type[BaseModel]) -> Tuple[List[Tuple[int, BaseModel]], Dict[int, BatchItemResult]]:
+    """Validate each batch item on its own: (index, model) for valid items and a result per invalid one"""
+    valid, failed = [], {}
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, schema.model_validate(item)))
+        except ValidationError as e:
+            failed[index] = BatchItemResult(
+                index=index, status=status.HTTP_422_UNPROCESSABLE_ENTITY, message=describe_validation_error(e)
+            )
+    return valid, failed
+
+
+def fetch_results(ids: Sequence[Any], found: Dict[Any, Any], not_found: str) -> List[BatchItemResult]:
+    """Per-id results of a batch fetch, in request order"""
+    return [
+        BatchItemResult(index=index, status=status.HTTP_200_OK, message="Operation successfully done", data=found[item_id])
+        if item_id in found else
+        BatchItemResult(index=index, status=status.HTTP_404_NOT_FOUND, message=not_found)
+        for index, item_id in enumerate(ids)
+    ]
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import os
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+from uuid import uuid4
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configuration
+BROKER_TOPIC_BUFFER_SIZE = int(os.getenv("BROKER_TOPIC_BUFFER_SIZE", 256))
+
+# Event sent to a subscriber that fell behind the topic's buffer
+RESYNC_EVENT = "resync"
+
+
+@dataclass(frozen=True)
+class Message:
+    """One published event, serialized once for every subscriber"""
+    seq: int
+    event: str
+    data: str
+
+
+class Topic:
+    """Ring buffer of a topic's recent messages and the subscribers reading it"""
+
+    __slots__ = ("buffer", "subscribers", "changed", "missing_until")
+
+    def __init__(self, size: int, missing_until: int):
+        self.buffer: Deque[Message] = deque(maxlen=size)
+        self.subscribers = 0
+        # Messages up to this seq may be missing: published before the topic had
+        # subscribers, or pushed out of the buffer. Sequence numbers are shared
+        # by all topics, so gaps between a topic's messages are not losses
+        self.missing_until = missing_until
+        # Created by the first waiting subscriber, set and dropped on the next publish
+        self.changed: Optional[asyncio.Event] = None
+
+
+class Broker:
+    """
+    Topic-based in-process pub/sub.
+
+    Publishing appends to the topic's ring buffer and wakes waiting
+    subscribers through one shared Event, so its cost does not grow with the
+    number of subscribers and never waits on any of them. Each subscriber
+    reads the buffer at its own pace; one that falls more than buffer_size
+    messages behind gets a resync event and skips to the newest message
+    instead of holding the publisher back. Topics exist only while someone
+    subscribes; publishing to a topic nobody watches is a dictionary miss.
+
+    Event ids are "<epoch>.<seq>", the epoch naming this broker instance, so
+    a Last-Event-ID from another worker or an earlier process is told apart
+    from one this broker issued. Resuming gets a resync first whenever
+    messages after the id may have been lost.
+    """
+
+    def __init__(self, buffer_size: int = BROKER_TOPIC_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self.epoch = uuid4().hex[:8]
+        self._topics: Dict[str, Topic] = {}
+        self._last_seq = 0
+        self.published = 0
+        self.resyncs = 0
+
+    def event_id(self, seq: int) -> str:
+        """SSE event id of a message"""
+        return f"{self.epoch}.{seq}"
+
+    def _parse_event_id(self, event_id: str) -> Optional[int]:
+        """seq of an event id this broker issued, or None for a foreign or malformed one"""
+        epoch, _, seq = event_id.partition(".")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        return seq if seq <= self._last_seq else None
+
+    def publish(self, topic: str, event: str, data: Any) -> None:
+        """Publish an event to a topic's current subscribers"""
+        # Counted even when nobody watches, so resuming subscribers can tell they missed it
+        self._last_seq += 1
+        subscribed = self._topics.get(topic)
+        if subscribed is None:
+            return
+        if len(subscribed.buffer) == subscribed.buffer.maxlen:
+            subscribed.missing_until = subscribed.buffer[0].seq
+        subscribed.buffer.append(Message(seq=self._last_seq, event=event, data=json.dumps(data, default=str)))
+        self.published += 1
+        if subscribed.changed is not None:
+            subscribed.changed.set()
+            subscribed.changed = None
+
+    async def subscribe(self, topic: str, last_event_id: Optional[str],
+                        timeout: float) -> AsyncIterator[List[Message]]:
+        """
+        Yield the topic's messages published after last_event_id as they arrive.
+
+        With last_event_id None only new messages are delivered. A resync comes
+        first when messages after it cannot all be delivered: the id is foreign,
+        or the topic was unwatched or overwritten since. An empty list is
+        yielded whenever timeout seconds pass without any, so the caller can
+        send a heartbeat.
+        """
+        subscribed = self._topics.get(topic)
+        if subscribed is None:
+            subscribed = self._topics[topic] = Topic(self.buffer_size, missing_until=self._last_seq)
+        subscribed.subscribers += 1
+        try:
+            if last_event_id is None:
+                after_seq = self._last_seq
+            else:
+                after_seq = self._parse_event_id(last_event_id)
+                if after_seq is None or subscribed.missing_until > after_seq:
+                    self.resyncs += 1
+                    after_seq = self._last_seq
+                    yield [Message(seq=after_seq, event=RESYNC_EVENT, data="{}")]
+            while True:
+                buffer = subscribed.buffer
+                if buffer and buffer[-1].seq > after_seq:
+                    if subscribed.missing_until > after_seq:
+                        # Messages were overwritten before this subscriber read them
+                        self.resyncs += 1
+                        after_seq = buffer[-1].seq
+                        yield [Message(seq=after_seq, event=RESYNC_EVENT, data="{}")]
+                        continue
+                    pending = [message for message in buffer if message.seq > after_seq]
+                    after_seq = pending[-1].seq
+                    yield pending
+                    continue
+                if subscribed.changed is None:
+                    subscribed.changed = asyncio.Event()
+                try:
+                    await asyncio.wait_for(subscribed.changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    yield []
+        finally:
+            subscribed.subscribers -= 1
+            if not subscribed.subscribers and self._topics.get(topic) is subscribed:
+                del self._topics[topic]
+
+    def stats(self) -> dict:
+        """Counters for sizing the broker"""
+        return {
+            "topics": len(self._topics),
+            "subscribers": sum(topic.subscribers for topic in self._topics.values()),
+            "buffer_size": self.buffer_size,
+            "published": self.published,
+            "resyncs": self.resyncs
+        }
+
+
+def question_topic(question_id) -> str:
+    """Topic carrying answer activity on a question"""
+    return f"question:{question_id}"
+
+
+broker = Broker()
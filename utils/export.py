@@ -0,0 +1,149 @@
+import json
+import os
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+from uuid import UUID
+
+from dotenv import load_dotenv
+from sqlalchemy.future import select
+
+from models import User, Question, Answer
+from utils.database_helper import async_engine
+
+load_dotenv()
+
+# Configuration
+# Rows fetched per round trip of the server-side cursor
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+# Bytes of output gathered before a chunk is sent
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Exported tables in dump order, each walked in primary key order
+EXPORT_TABLES = {
+    "users": User,
+    "questions": Question,
+    "answers": Answer,
+}
+# Secrets and derived columns are left out of dumps
+EXPORT_EXCLUDED_COLUMNS = {"password", "search_vector"}
+
+EXPORT_COMPRESSIONS = ("none", "gzip", "zstd")
+# Media type and file suffix per compression
+EXPORT_FORMATS = {
+    "none": ("application/x-ndjson", ".ndjson"),
+    "gzip": ("application/gzip", ".ndjson.gz"),
+    "zstd": ("application/zstd", ".ndjson.zst"),
+}
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Cannot export {type(value).__name__}")
+
+
+def encode_checkpoint(table: str, last_id: UUID) -> str:
+    """Checkpoint token naming the last exported row"""
+    return f"{table}:{last_id}"
+
+
+def decode_checkpoint(token: str) -> Tuple[str, UUID]:
+    """Split a checkpoint token back into (table, last id), raising ValueError when malformed"""
+    table, _, last_id = token.partition(":")
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Unknown table in checkpoint: {table!r}")
+    return table, UUID(last_id)
+
+
+def _primary_key(model):
+    return model.__table__.primary_key.columns[0]
+
+
+async def export_records(tables: Optional[List[str]] = None, checkpoint: Optional[str] = None,
+                         started_at: Optional[datetime] = None) -> AsyncIterator[Tuple[str, bytes]]:
+    """
+    Yield (checkpoint token, NDJSON line) for every exported row.
+
+    Every table is read in one REPEATABLE READ, read-only transaction, so the
+    dump is a consistent snapshot, through a server-side cursor fetching
+    EXPORT_BATCH_SIZE rows at a time, so memory stays flat however large the
+    tables are. A checkpoint resumes right after the row it names. A resumed
+    dump reads a newer snapshot, so every table is cut off at started_at, the
+    start of the first run: rows created since (like answers to questions the
+    first run never saw) are left out of both runs.
+    """
+    names = [name for name in EXPORT_TABLES if tables is None or name in tables]
+    resume_table, resume_id = decode_checkpoint(checkpoint) if checkpoint else (None, None)
+    if resume_table is not None:
+        names = names[names.index(resume_table):] if resume_table in names else []
+
+    async with async_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="REPEATABLE READ", postgresql_readonly=True)
+        async with conn.begin():
+            for name in names:
+                model = EXPORT_TABLES[name]
+                key = _primary_key(model)
+                columns = [column for column in model.__table__.columns if column.name not in EXPORT_EXCLUDED_COLUMNS]
+                query = select(*columns).order_by(key)
+                if started_at is not None:
+                    query = query.where(model.created_at <= started_at)
+                if name == resume_table:
+                    query = query.where(key > resume_id)
+                result = await conn.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+                async for row in result:
+                    data = row._asdict()
+                    line = json.dumps({"type": name, "data": data}, default=_json_default, separators=(",", ":"))
+                    yield encode_checkpoint(name, data[key.name]), line.encode() + b"\n"
+
+
+class ExportFramer:
+    """
+    Compresses export output into independently decodable frames.
+
+    gzip members and zstd frames may be concatenated, so ending a frame at
+    each checkpoint leaves a file that can be cut back to that point and
+    appended to when an interrupted export resumes.
+    """
+
+    def __init__(self, compression: str = "none"):
+        if compression not in EXPORT_COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression!r}")
+        if compression == "zstd":
+            try:
+                import zstandard
+            except ImportError:
+                raise RuntimeError("zstd exports need the zstandard package (pip install zstandard)")
+            self._new_compressor = lambda: zstandard.ZstdCompressor().compressobj()
+        elif compression == "gzip":
+            self._new_compressor = lambda: zlib.compressobj(wbits=31)
+        else:
+            self._new_compressor = None
+        self._compressor = self._new_compressor() if self._new_compressor else None
+
+    def write(self, data: bytes) -> bytes:
+        """Compress data, returning whatever output is ready"""
+        return self._compressor.compress(data) if self._compressor else data
+
+    def end_frame(self) -> bytes:
+        """Finish the current frame and start the next one"""
+        if not self._compressor:
+            return b""
+        tail = self._compressor.flush()
+        self._compressor = self._new_compressor()
+        return tail
+
+
+async def export_stream(framer: ExportFramer, tables: Optional[List[str]] = None, checkpoint: Optional[str] = None,
+                        started_at: Optional[datetime] = None) -> AsyncIterator[bytes]:
+    """Export as a stream of byte chunks framed by framer, for a streaming response"""
+    buffer = bytearray()
+    async for _, line in export_records(tables, checkpoint, started_at):
+        buffer += framer.write(line)
+        if len(buffer) >= EXPORT_CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += framer.end_frame()
+    yield bytes(buffer)
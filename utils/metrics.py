@@ -0,0 +1,370 @@
+import asyncio
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+load_dotenv()
+
+# Configuration
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# How often the event loop lag monitor wakes up
+LOOP_LAG_INTERVAL_SECONDS = float(os.getenv("LOOP_LAG_INTERVAL_SECONDS", 0.5))
+
+# Histogram buckets, in seconds or queries
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+@dataclass
+class RequestMetrics:
+    """What one request spent, accumulated while it runs"""
+    queries: int = 0
+    db_seconds: float = 0.0
+    pool_wait_seconds: float = 0.0
+    serialize_seconds: float = 0.0
+
+
+# Metrics of the request being handled; None outside requests (background tasks)
+current_request: ContextVar[Optional[RequestMetrics]] = ContextVar("current_request", default=None)
+
+
+class Counter:
+    """Prometheus counter with labels"""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in self._values.items():
+            lines.append(f"{self.name}{_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    """Prometheus histogram with labels; each series keeps per-bucket counts, a sum and a count"""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float], labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.labels = tuple(labels)
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def snapshot(self, *label_values: str) -> dict:
+        """Cumulative bucket counts, sum and count of one series"""
+        series = self._series.get(label_values) or [0] * (len(self.buckets) + 1) + [0.0]
+        buckets, cumulative = {}, 0
+        for bound, count in zip((*self.buckets, "+Inf"), series):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {"buckets": buckets, "sum": series[-1], "count": cumulative}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series):
+                cumulative += count
+                labels = _labels((*self.labels, "le"), (*label_values, str(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {series[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Prometheus gauge read from a callback when scraped"""
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], Dict[Tuple[str, ...], float]],
+                 labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.read = read
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        for label_values, value in self.read().items():
+            lines.append(f"{self.name}{_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+class MetricsRegistry:
+    """Every metric the API exports, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self.requests = Counter("stackit_http_requests_total", "HTTP requests", ("method", "route", "status"))
+        self.latency = Histogram(
+            "stackit_http_request_duration_seconds", "Time to the end of the response",
+            LATENCY_BUCKETS, ("method", "route")
+        )
+        self.queries = Histogram(
+            "stackit_db_queries_per_request", "SQL statements executed per request",
+            QUERY_COUNT_BUCKETS, ("method", "route")
+        )
+        self.db_time = Histogram(
+            "stackit_db_time_seconds", "Time spent executing SQL per request", LATENCY_BUCKETS, ("method", "route")
+        )
+        self.pool_wait = Histogram(
+            "stackit_db_pool_wait_seconds", "Time spent waiting for a pooled connection per request",
+            LATENCY_BUCKETS, ("method", "route")
+        )
+        self.serialize_time = Histogram(
+            "stackit_serialization_seconds", "Time spent encoding response bodies per request",
+            LATENCY_BUCKETS, ("method", "route")
+        )
+        self.statements = Counter("stackit_db_statements_total", "SQL statements executed, in or out of requests")
+        self.pool_checkout = Histogram(
+            "stackit_db_pool_checkout_seconds", "Time to check a connection out of a pool, in or out of requests",
+            LATENCY_BUCKETS, ("pool",)
+        )
+        self.pool_timeouts = Counter(
+            "stackit_db_pool_timeouts_total", "Checkouts that gave up waiting for a connection", ("pool",)
+        )
+        self.loop_lag = Histogram(
+            "stackit_event_loop_lag_seconds", "How late the event loop ran a timer", LATENCY_BUCKETS
+        )
+        self._metrics: list = [
+            self.requests, self.latency, self.queries, self.db_time, self.pool_wait, self.serialize_time,
+            self.statements, self.pool_checkout, self.pool_timeouts, self.loop_lag
+        ]
+
+    def add_gauge(self, gauge: Gauge) -> None:
+        self._metrics.append(gauge)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, request: RequestMetrics):
+        self.requests.inc(method, route, str(status))
+        self.latency.observe(seconds, method, route)
+        self.queries.observe(request.queries, method, route)
+        self.db_time.observe(request.db_seconds, method, route)
+        self.pool_wait.observe(request.pool_wait_seconds, method, route)
+        self.serialize_time.observe(request.serialize_seconds, method, route)
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Connection pool that times every checkout, counts the checkouts waiting
+    and the ones that time out, and charges the wait to the current request.
+    Wait times and timeouts are recorded under the pool's name, so the
+    primary's and each replica's pool are told apart.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waiting = 0
+        self.name = "primary"
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool, which keeps reporting under this name
+        pool = super().recreate()
+        pool.name = self.name
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            metrics.pool_timeouts.inc(self.name)
+            raise
+        finally:
+            self.waiting -= 1
+            elapsed = time.perf_counter() - started
+            metrics.pool_checkout.observe(elapsed, self.name)
+            request = current_request.get()
+            if request is not None:
+                request.pool_wait_seconds += elapsed
+
+
+def pool_stats(engine) -> dict:
+    """Live state of an engine's pool, and its checkout wait times and timeouts since startup"""
+    pool = getattr(engine, "sync_engine", engine).pool
+    name = getattr(pool, "name", None)
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "waiting": getattr(pool, "waiting", 0),
+        "timeouts": metrics.pool_timeouts.value(name) if name else 0,
+        "checkout_seconds": metrics.pool_checkout.snapshot(name) if name else None,
+    }
+
+
+def instrument_engine(engine, pool_gauges: bool = True) -> None:
+    """Count SQL statements and their time, per request, with event hooks on an (async) engine"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        metrics.statements.inc()
+        request = current_request.get()
+        if request is not None:
+            request.queries += 1
+            request.db_seconds += elapsed
+
+    if not pool_gauges:
+        return
+
+    def pool_connections():
+        pool = sync_engine.pool
+        return {
+            ("checked_out",): pool.checkedout(),
+            ("idle",): pool.checkedin(),
+            ("overflow",): max(pool.overflow(), 0),
+        }
+
+    metrics.add_gauge(Gauge("stackit_db_pool_connections", "Pooled connections by state", pool_connections, ("state",)))
+    metrics.add_gauge(Gauge(
+        "stackit_db_pool_waiting", "Checkouts waiting for a connection",
+        lambda: {(): getattr(sync_engine.pool, "waiting", 0)}
+    ))
+
+
+def timed_serialization(serialize):
+    """Wrap a serializer so its time is charged to the current request"""
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await serialize(*args, **kwargs)
+        finally:
+            request = current_request.get()
+            if request is not None:
+                request.serialize_seconds += time.perf_counter() - started
+    return wrapper
+
+
+def server_timing(request: RequestMetrics, total_seconds: float) -> str:
+    """Server-Timing header value: database, pool wait, serialization and total time so far"""
+    return (
+        f'db;dur={request.db_seconds * 1000:.1f};desc="{request.queries} queries", '
+        f"pool;dur={request.pool_wait_seconds * 1000:.1f}, "
+        f"ser;dur={request.serialize_seconds * 1000:.1f}, "
+        f"total;dur={total_seconds * 1000:.1f}"
+    )
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware measuring every HTTP request.
+
+    The request's RequestMetrics is bound to a context variable that the SQL
+    hooks, the pool and the serializer add to. A Server-Timing header is added
+    to the response, and the totals are recorded per route template (not per
+    path, to keep label values bounded) once the response has been sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = RequestMetrics()
+        token = current_request.set(request)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                timing = server_timing(request, time.perf_counter() - started)
+                message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request.reset(token)
+            route = scope.get("route")
+            metrics.observe_request(
+                scope["method"], getattr(route, "path", "unmatched"), status_code,
+                time.perf_counter() - started, request
+            )
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a periodic timer; lag means something blocked the loop"""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL_SECONDS):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last_lag = max(loop.time() - expected, 0.0)
+            self.max_lag = max(self.max_lag, self.last_lag)
+            metrics.loop_lag.observe(self.last_lag)
+
+    def start(self) -> None:
+        """Start monitoring in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop monitoring"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+loop_lag_monitor = LoopLagMonitor()
+metrics.add_gauge(Gauge(
+    "stackit_event_loop_lag_max_seconds", "Largest event loop lag seen", lambda: {(): loop_lag_monitor.max_lag}
+))
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import os
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from utils.pg_listener import ChannelListener
+
+load_dotenv()
+
+# Configuration
+# Notifications kept per user; older ones are dropped as new ones arrive
+NOTIFICATION_INBOX_SIZE = int(os.getenv("NOTIFICATION_INBOX_SIZE", 50))
+# Events buffered per user with an open stream in this worker, between reads
+NOTIFICATION_STREAM_BUFFER_SIZE = int(os.getenv("NOTIFICATION_STREAM_BUFFER_SIZE", 64))
+
+# Postgres channel carrying notification events to every worker
+NOTIFICATION_CHANNEL = "stackit_notifications"
+
+# Event kinds: a new notification (with the inbox's unread count), a changed unread
+# count, and, to a stream only, "events may have been missed, re-read the inbox"
+NOTIFICATION_EVENT = "notification"
+UNREAD_EVENT = "unread"
+RESYNC_EVENT = "resync"
+
+
+async def send_notification_event(db, kind: str, user_id: UUID, **data: Any) -> None:
+    """
+    Queue an event for every worker's streams of user_id on db's transaction.
+
+    Postgres delivers NOTIFY when the transaction commits and drops it on
+    rollback, so streams never hear of a notification that was not saved.
+    """
+    payload = json.dumps({"kind": kind, "user_id": str(user_id), **data}, default=str)
+    await db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": NOTIFICATION_CHANNEL, "payload": payload})
+
+
+class Inbox:
+    """Events for one user's open streams in this worker"""
+
+    __slots__ = ("events", "appended", "listeners", "changed")
+
+    def __init__(self, size: int):
+        # (position, event); positions count every event appended to this inbox
+        self.events: Deque[Tuple[int, dict]] = deque(maxlen=size)
+        self.appended = 0
+        self.listeners = 0
+        # Created by the first waiting stream, set and dropped on the next event
+        self.changed: Optional[asyncio.Event] = None
+
+
+class NotificationHub:
+    """
+    Per-worker delivery of notification events to open streams.
+
+    Notifications themselves live in the notifications table
+    (NotificationService); writers announce them with NOTIFY, and each
+    worker's notification_listener hands them to deliver(). Only users with an
+    open stream in this worker have an inbox here, holding the last
+    buffer_size events. Streams sharing an inbox wait on one Event instead of
+    a queue each, so an idle connection costs a suspended coroutine and
+    nothing per event. A stream that falls behind the buffer, or was open
+    while the listener reconnected, gets a resync event and re-reads the
+    inbox from the database.
+    """
+
+    def __init__(self, buffer_size: int = NOTIFICATION_STREAM_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self._inboxes: Dict[UUID, Inbox] = {}
+        self.delivered = 0
+        self.resyncs = 0
+
+    def deliver(self, event: dict) -> None:
+        """Hand an event to the user's open streams in this worker, if any"""
+        inbox = self._inboxes.get(UUID(event["user_id"]))
+        if inbox is None:
+            return
+        inbox.appended += 1
+        inbox.events.append((inbox.appended, event))
+        self.delivered += 1
+        if inbox.changed is not None:
+            inbox.changed.set()
+            inbox.changed = None
+
+    def resync_all(self) -> None:
+        """Tell every open stream that events may have been missed (after the listener reconnects)"""
+        for user_id in list(self._inboxes):
+            self.deliver({"kind": RESYNC_EVENT, "user_id": str(user_id)})
+
+    def subscribe(self, user_id: UUID) -> "Subscription":
+        """Start buffering a user's events for a stream; close the subscription when it ends"""
+        inbox = self._inboxes.get(user_id)
+        if inbox is None:
+            inbox = self._inboxes[user_id] = Inbox(self.buffer_size)
+        inbox.listeners += 1
+        return Subscription(self, user_id, inbox)
+
+    def _unsubscribe(self, user_id: UUID, inbox: Inbox) -> None:
+        inbox.listeners -= 1
+        if not inbox.listeners and self._inboxes.get(user_id) is inbox:
+            del self._inboxes[user_id]
+
+    def stats(self) -> dict:
+        """Counters for sizing the hub"""
+        return {
+            "inboxes": len(self._inboxes),
+            "buffer_size": self.buffer_size,
+            "listeners": sum(inbox.listeners for inbox in self._inboxes.values()),
+            "delivered": self.delivered,
+            "resyncs": self.resyncs
+        }
+
+
+class Subscription:
+    """One stream's position in its user's inbox"""
+
+    def __init__(self, hub: NotificationHub, user_id: UUID, inbox: Inbox):
+        self.hub = hub
+        self.user_id = user_id
+        self.inbox = inbox
+        # Only events delivered after subscribing are read
+        self.position = inbox.appended
+
+    async def events(self, timeout: float) -> AsyncIterator[List[dict]]:
+        """
+        Yield events as they arrive. An empty list is yielded whenever timeout
+        seconds pass without any, so the caller can send a heartbeat.
+        """
+        inbox = self.inbox
+        while True:
+            if inbox.appended > self.position:
+                oldest = inbox.events[0][0]
+                if oldest > self.position + 1:
+                    # Events were pushed out of the buffer before this stream read them
+                    self.hub.resyncs += 1
+                    self.position = inbox.appended
+                    yield [{"kind": RESYNC_EVENT, "user_id": str(self.user_id)}]
+                    continue
+                pending = [event for position, event in inbox.events if position > self.position]
+                self.position = inbox.appended
+                yield pending
+                continue
+            if inbox.changed is None:
+                inbox.changed = asyncio.Event()
+            try:
+                await asyncio.wait_for(inbox.changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                yield []
+
+    def close(self) -> None:
+        self.hub._unsubscribe(self.user_id, self.inbox)
+
+
+notification_hub = NotificationHub()
+# Receives every worker's events for the streams open in this one
+notification_listener = ChannelListener(
+    NOTIFICATION_CHANNEL, lambda payload: notification_hub.deliver(json.loads(payload)), notification_hub.resync_all
+)
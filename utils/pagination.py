@@ -0,0 +1,91 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import tuple_
+
+from utils.exception_handler import raise_exception
+
+
+def _encode_value(value: Any) -> Any:
+    """Convert a sort key value into something JSON can carry"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _decode_value(value: Any, value_type: type) -> Any:
+    """Convert a JSON value back into its sort key type, raising TypeError for the wrong JSON type"""
+    if value_type is datetime or value_type is UUID:
+        if not isinstance(value, str):
+            raise TypeError(f"expected a string for {value_type.__name__}")
+        return datetime.fromisoformat(value) if value_type is datetime else UUID(value)
+    # Numbers only (ints for int keys); bool is an int subclass but never a sort key
+    allowed = (int,) if value_type is int else (int, float)
+    if isinstance(value, bool) or not isinstance(value, allowed):
+        raise TypeError(f"expected a number for {value_type.__name__}")
+    return value_type(value)
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode the sort key of the last row of a page into an opaque cursor"""
+    payload = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *value_types: type) -> Tuple[Any, ...]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor (str): Opaque cursor received from a previous page.
+        *value_types (type): Expected type of each sort key value.
+
+    Raises HTTPException (400) if the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(value_types):
+            raise ValueError("cursor arity mismatch")
+        return tuple(_decode_value(value, value_type) for value, value_type in zip(values, value_types))
+    except (ValueError, TypeError):
+        raise_exception(True, "Invalid cursor")
+
+
+def _read_attribute(item: Any, path: str) -> Any:
+    """Read an attribute, following dotted paths into related objects (e.g. "feed_score.hot_score")"""
+    for name in path.split("."):
+        item = getattr(item, name)
+    return item
+
+
+def next_cursor(items: Sequence[Any], limit: int, *attributes: str) -> Optional[str]:
+    """Build the cursor for the page after items, or None when this was the last page"""
+    if len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(*(_read_attribute(last, attribute) for attribute in attributes))
+
+
+def paginate(query, sort_key: Sequence[Any], value_types: Sequence[type], skip: int = 0, limit: int = 100,
+             after: Optional[str] = None, descending: bool = True):
+    """
+    Order a select by sort_key and apply keyset or offset pagination.
+
+    When after is given the page starts right past that cursor's row, so every
+    page costs the same index range scan; otherwise skip/limit is used as before.
+    sort_key must end with a unique column so the ordering is total.
+    """
+    query = query.order_by(*(column.desc() if descending else column.asc() for column in sort_key))
+    if after:
+        values = decode_cursor(after, *value_types)
+        key = tuple_(*sort_key)
+        query = query.filter(key < values if descending else key > values)
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit)
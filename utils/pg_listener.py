@@ -0,0 +1,94 @@
+import asyncio
+import os
+from typing import Callable, Optional
+
+import asyncpg
+from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
+
+from utils.database_helper import ASYNC_DATABASE_URL
+
+load_dotenv()
+
+# Configuration
+# LISTEN needs a session of its own: a direct connection, not PgBouncer transaction pooling
+LISTEN_DATABASE_URL = os.getenv("LISTEN_DATABASE_URL", ASYNC_DATABASE_URL)
+LISTEN_RECONNECT_SECONDS = float(os.getenv("LISTEN_RECONNECT_SECONDS", 1))
+
+
+class ChannelListener:
+    """
+    LISTENs on one Postgres channel over a dedicated connection and passes
+    each payload to on_payload. After the connection drops it reconnects and
+    calls on_reconnect, since whatever was sent meanwhile was not received.
+    """
+
+    def __init__(self, channel: str, on_payload: Callable[[str], None], on_reconnect: Callable[[], None],
+                 url: str = LISTEN_DATABASE_URL, reconnect_seconds: float = LISTEN_RECONNECT_SECONDS):
+        self.channel = channel
+        self.on_payload = on_payload
+        self.on_reconnect = on_reconnect
+        # asyncpg takes the plain postgresql:// form of the SQLAlchemy URL
+        self.dsn = make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.reconnect_seconds = reconnect_seconds
+        self._connected = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    async def wait_connected(self, timeout: float) -> bool:
+        """Wait up to timeout seconds for the connection; returns whether it is up"""
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.connected
+
+    def _on_notification(self, connection, pid, channel, payload) -> None:
+        try:
+            self.on_payload(payload)
+        except (ValueError, KeyError) as e:
+            print(f"⚠️ Ignoring malformed event on {self.channel}: {e}")
+
+    async def _listen_once(self) -> None:
+        connection = await asyncpg.connect(self.dsn)
+        lost = asyncio.Event()
+        connection.add_termination_listener(lambda _: lost.set())
+        try:
+            await connection.add_listener(self.channel, self._on_notification)
+            self._connected.set()
+            await lost.wait()
+        finally:
+            self._connected.clear()
+            if not connection.is_closed():
+                await connection.close()
+
+    async def _run(self) -> None:
+        first = True
+        while True:
+            if not first:
+                self.on_reconnect()
+            first = False
+            try:
+                await self._listen_once()
+                print(f"⚠️ Listener on {self.channel} lost its connection, reconnecting")
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                print(f"⚠️ Listener on {self.channel} failed, reconnecting: {e}")
+            await asyncio.sleep(self.reconnect_seconds)
+
+    def start(self) -> None:
+        """Start listening in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop listening and close the connection"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,126 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import update, case, cast, func, tuple_, Float
+from sqlalchemy.future import select
+
+from models import Question, QuestionScore
+from utils.database_helper import async_engine
+from utils.response_cache import response_cache, HOT_FEED_TAG
+
+load_dotenv()
+
+# Configuration
+# Larger gravity makes hot questions fall off faster with age
+FEED_HOT_GRAVITY = float(os.getenv("FEED_HOT_GRAVITY", 1.8))
+FEED_RESCORE_INTERVAL_SECONDS = float(os.getenv("FEED_RESCORE_INTERVAL_SECONDS", 300))
+# Older questions have decayed to the bottom of the hot feed and are left alone
+FEED_RESCORE_WINDOW_DAYS = float(os.getenv("FEED_RESCORE_WINDOW_DAYS", 7))
+FEED_RESCORE_BATCH_SIZE = 1000
+
+# Engagement counted by the hot score, on top of the question's vote score
+ANSWER_WEIGHT = 2
+ACCEPTED_ANSWER_WEIGHT = 3
+
+
+def hot_score():
+    """
+    SQL expression for a question's hot score, over the questions columns.
+
+    Engagement (votes, answers, an accepted answer) divided by
+    (age in hours + 2) ^ gravity, so new activity lifts a question and
+    time alone lowers it.
+    """
+    engagement = (
+        1 + Question.score + ANSWER_WEIGHT * Question.answer_count
+        + case((Question.accepted_answer_id.isnot(None), ACCEPTED_ANSWER_WEIGHT), else_=0)
+    )
+    age_hours = cast(func.extract("epoch", func.timezone("utc", func.now()) - Question.created_at), Float) / 3600
+    return cast(engagement, Float) / func.power(age_hours + 2, FEED_HOT_GRAVITY)
+
+
+def refresh_hot_scores(*conditions):
+    """UPDATE recomputing hot_score for the question_scores rows matching conditions"""
+    return (
+        update(QuestionScore)
+        .where(QuestionScore.question_id == Question.question_id, *conditions)
+        .values(hot_score=hot_score())
+        .execution_options(synchronize_session=False)
+    )
+
+
+class FeedRescorer:
+    """
+    Periodically recomputes hot scores so they decay with age.
+
+    Activity already rescores its question as it happens; this pass only
+    applies the passing time, in batches over the questions asked within
+    the rescore window. Rows a concurrent write holds are skipped, since
+    that write rescores them itself.
+    """
+
+    def __init__(self, interval: float = FEED_RESCORE_INTERVAL_SECONDS,
+                 window_days: float = FEED_RESCORE_WINDOW_DAYS):
+        self.interval = interval
+        self.window_days = window_days
+        self._task: Optional[asyncio.Task] = None
+        self.passes = 0
+
+    async def rescore(self) -> int:
+        """Rescore every question inside the window, returning how many were updated"""
+        rescored = 0
+        last = (datetime.utcnow() - timedelta(days=self.window_days), None)
+        while True:
+            async with async_engine.begin() as conn:
+                position = Question.created_at >= last[0] if last[1] is None else (
+                    tuple_(Question.created_at, Question.question_id) > last
+                )
+                result = await conn.execute(
+                    select(Question.created_at, Question.question_id)
+                    .where(position)
+                    .order_by(Question.created_at, Question.question_id)
+                    .limit(FEED_RESCORE_BATCH_SIZE)
+                )
+                batch = result.all()
+                if not batch:
+                    break
+                last = tuple(batch[-1])
+                unlocked = (
+                    select(QuestionScore.question_id)
+                    .where(QuestionScore.question_id.in_([question_id for _, question_id in batch]))
+                    .with_for_update(skip_locked=True)
+                )
+                result = await conn.execute(refresh_hot_scores(QuestionScore.question_id.in_(unlocked)))
+                rescored += result.rowcount
+        self.passes += 1
+        await response_cache.invalidate(HOT_FEED_TAG)
+        return rescored
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.rescore()
+            except Exception as e:
+                print(f"⚠️ Hot score rescoring failed, will retry: {e}")
+
+    def start(self) -> None:
+        """Start rescoring periodically in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background rescoring"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+feed_rescorer = FeedRescorer()
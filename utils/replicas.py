@@ -0,0 +1,270 @@
+import asyncio
+import hashlib
+import os
+import random
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from fastapi import Request
+from sqlalchemy import text, exc
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from utils.database_helper import AsyncSessionLocal, create_database_engine
+from utils.metrics import metrics, pool_stats, Gauge
+
+load_dotenv()
+
+# Configuration
+# Comma separated asyncpg URLs of read replicas; none sends every read to the primary
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# After a write, the writer's reads go to the primary for this long, so they see it
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", 5))
+REPLICA_HEALTH_INTERVAL_SECONDS = float(os.getenv("REPLICA_HEALTH_INTERVAL_SECONDS", 5))
+REPLICA_HEALTH_TIMEOUT_SECONDS = float(os.getenv("REPLICA_HEALTH_TIMEOUT_SECONDS", 2))
+# Replicas replaying further behind than this are skipped
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 10))
+# Writers remembered per process for stickiness
+REPLICA_STICKY_MAX_CLIENTS = 100000
+
+# Cookie carrying the end of the sticky window (unix time), so any worker honours it
+STICKY_COOKIE = "stackit_primary_until"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Replay lag in seconds: 0 when caught up with what it received (or not a standby at all)
+REPLICA_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """Whether an error means the database could not be reached, rather than a failed statement"""
+    if isinstance(error, (OSError, exc.InterfaceError)):
+        return True
+    return isinstance(error, exc.DBAPIError) and error.connection_invalidated
+
+
+class Replica:
+    """A read replica's engine and its last known health"""
+
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.engine = create_database_engine(url, pool_name=name)
+        self.sessionmaker = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        # Unused until the first health check passes
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.in_flight = 0
+        self.reads = 0
+
+    async def check(self) -> None:
+        """Measure replay lag; unreachable or lagging replicas are taken out of rotation"""
+        try:
+            async with self.engine.connect() as conn:
+                lag = await asyncio.wait_for(conn.scalar(REPLICA_LAG_QUERY), REPLICA_HEALTH_TIMEOUT_SECONDS)
+        except Exception as e:
+            if self.healthy:
+                print(f"⚠️ Read replica {self.name} unavailable: {e}")
+            self.healthy, self.lag_seconds, self.last_error = False, None, str(e) or type(e).__name__
+            return
+        self.lag_seconds = float(lag)
+        healthy = self.lag_seconds <= REPLICA_MAX_LAG_SECONDS
+        if healthy and not self.healthy:
+            print(f"✅ Read replica {self.name} in rotation")
+        self.healthy = healthy
+        self.last_error = None if healthy else f"replay lag {self.lag_seconds:.1f}s"
+
+    def fail(self, error: BaseException) -> None:
+        """Take the replica out of rotation until the next health check passes"""
+        print(f"⚠️ Read replica {self.name} failed a request: {error}")
+        self.healthy, self.last_error = False, str(error) or type(error).__name__
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "last_error": self.last_error,
+            "in_flight": self.in_flight,
+            "reads": self.reads,
+            "pool": pool_stats(self.engine),
+        }
+
+
+class ReplicaRouter:
+    """
+    Picks the session for read-only requests.
+
+    Reads go to the healthy replica with the fewest requests in flight (ties
+    broken at random), and to the primary when none is healthy. Clients that
+    just wrote are pinned to the primary for REPLICA_STICKY_SECONDS, so they
+    read their own writes: by their Authorization header in this process, and
+    by a cookie across processes. A background task re-checks every replica's
+    reachability and replay lag.
+    """
+
+    def __init__(self, urls: List[str], sticky_seconds: float = REPLICA_STICKY_SECONDS,
+                 interval: float = REPLICA_HEALTH_INTERVAL_SECONDS):
+        self.replicas = [Replica(f"replica-{number}", url) for number, url in enumerate(urls)]
+        self.sticky_seconds = sticky_seconds
+        self.interval = interval
+        self.primary_reads = 0
+        self._writers: "OrderedDict[str, float]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self) -> Optional[Replica]:
+        """Least busy healthy replica, or None for the primary"""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return min(healthy, key=lambda replica: (replica.in_flight, random.random()))
+
+    @staticmethod
+    def _client_key(authorization: Optional[str]) -> Optional[str]:
+        return hashlib.sha1(authorization.encode()).hexdigest() if authorization else None
+
+    def record_write(self, authorization: Optional[str]) -> float:
+        """Pin the writer to the primary; returns the end of the window as unix time"""
+        key = self._client_key(authorization)
+        if key is not None:
+            self._writers[key] = time.monotonic() + self.sticky_seconds
+            self._writers.move_to_end(key)
+            while len(self._writers) > REPLICA_STICKY_MAX_CLIENTS:
+                self._writers.popitem(last=False)
+        return time.time() + self.sticky_seconds
+
+    def reads_primary(self, request: Request) -> bool:
+        """Whether the request comes from a client inside its sticky window"""
+        key = self._client_key(request.headers.get("authorization"))
+        if key is not None and self._writers.get(key, 0) > time.monotonic():
+            return True
+        try:
+            return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(replica.check() for replica in self.replicas))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check_all()
+
+    async def start(self) -> None:
+        """Check the replicas once, then keep checking them in the background"""
+        if self.enabled and self._task is None:
+            await self.check_all()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the health checks and close the replicas' connections"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self) -> dict:
+        return {
+            "sticky_seconds": self.sticky_seconds,
+            "primary_reads": self.primary_reads,
+            "replicas": [replica.stats() for replica in self.replicas],
+        }
+
+
+replica_router = ReplicaRouter(DATABASE_REPLICA_URLS)
+metrics.add_gauge(Gauge(
+    "stackit_db_replica_healthy", "Whether a read replica is in rotation",
+    lambda: {(replica.name,): int(replica.healthy) for replica in replica_router.replicas}, ("replica",)
+))
+metrics.add_gauge(Gauge(
+    "stackit_db_replica_lag_seconds", "Replay lag of a read replica at its last health check",
+    lambda: {(replica.name,): replica.lag_seconds or 0.0 for replica in replica_router.replicas}, ("replica",)
+))
+
+
+@asynccontextmanager
+async def read_session(request: Request):
+    """
+    Session for reads: a replica, or the primary for recent writers and when
+    none is healthy. The replica connection is taken up front, so a replica
+    that cannot be reached is taken out of rotation and the request still
+    reads from the primary.
+    """
+    replica = None if replica_router.reads_primary(request) else replica_router.choose()
+    if replica is not None:
+        replica.in_flight += 1
+        try:
+            async with replica.sessionmaker() as session:
+                try:
+                    await session.connection()
+                except Exception as e:
+                    if not is_connection_error(e):
+                        raise
+                    replica.fail(e)
+                else:
+                    replica.reads += 1
+                    try:
+                        yield session
+                    except Exception as e:
+                        if is_connection_error(e):
+                            replica.fail(e)
+                        raise
+                    return
+        finally:
+            replica.in_flight -= 1
+
+    replica_router.primary_reads += 1
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+# Dependency for read-only FastAPI routes (async)
+async def get_read_db(request: Request):
+    async with read_session(request) as session:
+        yield session
+
+
+class ReplicaStickinessMiddleware:
+    """
+    ASGI middleware pinning clients to the primary after a successful write
+    (any request but GET/HEAD/OPTIONS answered below 400), in this process and
+    through a cookie for the others.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        authorization = next(
+            (value.decode("latin-1") for name, value in scope["headers"] if name == b"authorization"), None
+        )
+
+        async def send_with_stickiness(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = replica_router.record_write(authorization)
+                cookie = (f"{STICKY_COOKIE}={until:.3f}; Max-Age={int(replica_router.sticky_seconds) + 1}; "
+                          f"Path=/; HttpOnly; SameSite=Lax")
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_with_stickiness)
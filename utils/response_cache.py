@@ -0,0 +1,283 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlencode
+from uuid import UUID, uuid4
+
+from dotenv import load_dotenv
+from fastapi import Response
+from sqlalchemy import text
+
+from utils.conditional import set_validators
+from utils.database_helper import async_engine
+from utils.pg_listener import ChannelListener
+
+load_dotenv()
+
+# Configuration
+# RESPONSE_CACHE_BACKEND is memory (bodies per process, invalidations broadcast to every worker
+# through Postgres), redis (shared, needs `pip install redis`) or none
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL", "redis://localhost:6379/0")
+RESPONSE_CACHE_MAX_SIZE = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", 1000))
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 300))
+RESPONSE_CACHE_WARM_PAGES = int(os.getenv("RESPONSE_CACHE_WARM_PAGES", 0))
+
+# Invalidation tags. Every key also carries ALL_TAG, so invalidate(ALL_TAG) drops everything.
+ALL_TAG = "all"
+QUESTIONS_TAG = "questions"
+# Hot feed pages also go stale as hot scores decay, without any write
+HOT_FEED_TAG = "questions:hot"
+
+# Postgres channel carrying memory backends' invalidations to every worker
+INVALIDATION_CHANNEL = "stackit_cache_invalidations"
+
+
+def user_questions_tag(user_id: UUID) -> str:
+    """Tag of a user's question listing"""
+    return f"user:{user_id}:questions"
+
+
+def user_answers_tag(user_id: UUID) -> str:
+    """Tag of a user's answer listing"""
+    return f"user:{user_id}:answers"
+
+
+def normalize_params(**params: Any) -> str:
+    """Canonical query string: sorted names, list values sorted, unset values dropped"""
+    items = []
+    for name, value in sorted(params.items()):
+        if value is None or value == []:
+            continue
+        if isinstance(value, (list, tuple)):
+            items.extend((name, str(item)) for item in sorted(value))
+        else:
+            items.append((name, str(value).lower() if isinstance(value, bool) else str(value)))
+    return urlencode(items)
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A serialized JSON response and its ETag"""
+    etag: str
+    body: str
+
+    def encode(self) -> bytes:
+        return f"{self.etag}\n{self.body}".encode()
+
+    @classmethod
+    def decode(cls, value: bytes) -> "CachedResponse":
+        etag, body = value.decode().split("\n", 1)
+        return cls(etag=etag, body=body)
+
+    def to_response(self) -> Response:
+        """JSON response carrying the cached body and validators"""
+        response = Response(content=self.body, media_type="application/json")
+        set_validators(response, self.etag)
+        return response
+
+
+class MemoryBackend:
+    """
+    Per-process LRU store with per-entry expiry; generation counters are never evicted.
+
+    Bodies stay in this worker, but invalidations reach every worker: bump()
+    NOTIFYs the tags and each worker's listener bumps them locally. Until the
+    listener is connected every lookup misses, and after it reconnects
+    everything cached is dropped, since invalidations sent meanwhile were lost.
+    """
+
+    def __init__(self, max_size: int = RESPONSE_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self.evictions = 0
+        # Tells this worker's own invalidations apart when they come back through Postgres
+        self.origin = uuid4().hex
+        self.listener = ChannelListener(INVALIDATION_CHANNEL, self._receive, self._drop_all)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if not self.listener.connected:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        if self.max_size <= 0 or not self.listener.connected:
+            return
+        self._entries.pop(key, None)
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def generations(self, tags: List[str]) -> List[int]:
+        return [self._generations.get(tag, 0) for tag in tags]
+
+    def _bump_local(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    async def bump(self, tags: Iterable[str]) -> None:
+        tags = list(tags)
+        self._bump_local(tags)
+        payload = json.dumps({"origin": self.origin, "tags": tags})
+        async with async_engine.begin() as conn:
+            await conn.execute(
+                text("SELECT pg_notify(:channel, :payload)"), {"channel": INVALIDATION_CHANNEL, "payload": payload}
+            )
+
+    def _receive(self, payload: str) -> None:
+        message = json.loads(payload)
+        if message["origin"] != self.origin:
+            self._bump_local(message["tags"])
+
+    def _drop_all(self) -> None:
+        self._entries.clear()
+        self._bump_local([ALL_TAG])
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Store shared by every worker in a Redis (or Redis-compatible) server; it evicts on its own policy"""
+
+    def __init__(self, url: str = RESPONSE_CACHE_URL):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis needs the redis package (pip install redis)")
+        self._redis = redis.from_url(url)
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._redis.get(key)
+
+    async def set(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        await self._redis.set(key, value, ex=ttl_seconds)
+
+    async def generations(self, tags: List[str]) -> List[int]:
+        values = await self._redis.mget([f"gen:{tag}" for tag in tags])
+        return [int(value or 0) for value in values]
+
+    async def bump(self, tags: Iterable[str]) -> None:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(f"gen:{tag}")
+            await pipe.execute()
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class ResponseCache:
+    """
+    Read-through cache of serialized listing responses.
+
+    Keys combine the route, the normalized query parameters and the current
+    generation of each tag the response depends on. Writers invalidate by
+    bumping tag generations, which makes every older key unreachable at
+    once; stale entries then age out through LRU eviction or the TTL. The
+    generations are read before the database, so a response loaded while a
+    write commits is stored under the key that write already retired.
+    Backend errors are counted and treated as misses.
+    """
+
+    def __init__(self, backend=None, ttl_seconds: int = RESPONSE_CACHE_TTL_SECONDS):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    async def read_through(self, route: str, tags: List[str], params: str,
+                           render: Callable[[], Awaitable[CachedResponse]]) -> CachedResponse:
+        """Return the cached response for route and params, rendering and storing it on a miss"""
+        if self.backend is None:
+            return await render()
+        tags = [ALL_TAG, *tags]
+        try:
+            generations = await self.backend.generations(tags)
+            key = f"resp:{route}:{'.'.join(map(str, generations))}:{params}"
+            value = await self.backend.get(key)
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ Response cache read failed: {e}")
+            return await render()
+        if value is not None:
+            self.hits += 1
+            return CachedResponse.decode(value)
+        self.misses += 1
+        entry = await render()
+        try:
+            await self.backend.set(key, entry.encode(), self.ttl_seconds)
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ Response cache write failed: {e}")
+        return entry
+
+    async def invalidate(self, *tags: str) -> None:
+        """Retire every cached response depending on any of tags"""
+        if self.backend is None or not tags:
+            return
+        try:
+            await self.backend.bump(set(tags))
+            self.invalidations += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ Response cache invalidation failed: {e}")
+
+    async def start(self, timeout: float = 5) -> None:
+        """
+        Start receiving other workers' invalidations, for backends that need
+        it, waiting up to timeout seconds for the listener to connect
+        """
+        listener = getattr(self.backend, "listener", None)
+        if listener is not None:
+            listener.start()
+            if not await listener.wait_connected(timeout):
+                print("⚠️ Response cache bypassed until its invalidation listener connects")
+
+    async def stop(self) -> None:
+        listener = getattr(self.backend, "listener", None)
+        if listener is not None:
+            await listener.stop()
+
+    def stats(self) -> dict:
+        """Counters for sizing the cache"""
+        lookups = self.hits + self.misses
+        return {
+            "backend": RESPONSE_CACHE_BACKEND if self.backend is not None else "none",
+            "size": self.backend.size() if self.backend is not None else 0,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.backend.evictions if self.backend is not None else 0,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+
+def create_backend(name: str = RESPONSE_CACHE_BACKEND):
+    """Backend named by RESPONSE_CACHE_BACKEND, or None to disable caching"""
+    if name == "memory":
+        return MemoryBackend()
+    if name == "redis":
+        return RedisBackend()
+    return None
+
+
+response_cache = ResponseCache(create_backend())
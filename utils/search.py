@@ -0,0 +1,104 @@
+import re
+from typing import List, Optional
+
+from sqlalchemy import func, literal_column
+
+# Text search configuration used for both indexing and querying
+SEARCH_CONFIG = "english"
+_CONFIG = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+
+# ts_headline options for highlighted snippets of matching text
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2"
+TITLE_HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, HighlightAll=true"
+
+_TOKEN_PATTERN = re.compile(r'-?"[^"]*"?|\S+')
+
+
+def build_search_vector(title, description):
+    """
+    SQL expression for a question's search document.
+
+    Title lexemes get weight A and description lexemes weight B so that
+    ts_rank scores a title hit above the same hit in the body. Arguments may
+    be plain values or column expressions.
+    """
+    title_vector = func.setweight(func.to_tsvector(_CONFIG, func.coalesce(title, "")), literal_column("'A'"))
+    description_vector = func.setweight(
+        func.to_tsvector(_CONFIG, func.coalesce(description, "")), literal_column("'B'")
+    )
+    return title_vector.op("||")(description_vector)
+
+
+def _quote(word: str) -> str:
+    """Quote a word as a tsquery operand so operator characters are taken literally"""
+    return "'" + word.replace("\\", "\\\\").replace("'", "''") + "'"
+
+
+def parse_search_query(search_term: str) -> Optional[str]:
+    """
+    Translate user search input into to_tsquery syntax.
+
+    Supported syntax:
+        word        every plain word must match (AND)
+        "a b c"     phrase, words must be adjacent and in order
+        word*       prefix match
+        -word       exclude questions containing the word
+        a OR b      either side may match
+
+    Returns None when the input contains nothing searchable.
+    """
+    clauses: List[str] = []
+    pending_or = False
+
+    for token in _TOKEN_PATTERN.findall(search_term):
+        if token == "OR":
+            pending_or = bool(clauses)
+            continue
+
+        negate = token.startswith("-") and len(token) > 1
+        if negate:
+            token = token[1:]
+
+        if token.startswith('"'):
+            words = re.findall(r"\w+", token)
+            if not words:
+                continue
+            operand = " <-> ".join(_quote(word) for word in words)
+            if len(words) > 1:
+                operand = f"({operand})"
+        else:
+            prefix = token.endswith("*")
+            words = re.findall(r"\w+", token)
+            if not words:
+                continue
+            operand = " <-> ".join(_quote(word) for word in words)
+            if prefix:
+                operand += ":*"
+            elif len(words) > 1:
+                operand = f"({operand})"
+
+        if negate:
+            operand = f"!{operand}"
+
+        if pending_or:
+            clauses[-1] = f"{clauses[-1]} | {operand}"
+        else:
+            clauses.append(operand)
+        pending_or = False
+
+    if not clauses:
+        return None
+    return " & ".join(f"({clause})" if " | " in clause else clause for clause in clauses)
+
+
+def build_search_query(search_term: str):
+    """SQL tsquery expression for search input, or None when nothing is searchable"""
+    parsed = parse_search_query(search_term)
+    if parsed is None:
+        return None
+    return func.to_tsquery(_CONFIG, parsed)
+
+
+def highlight(document, query, options: str = HEADLINE_OPTIONS):
+    """SQL expression marking the query's matches inside document"""
+    return func.ts_headline(_CONFIG, document, query, options)
@@ -0,0 +1,49 @@
+import json
+import os
+from typing import Any, AsyncIterator, Optional
+
+from dotenv import load_dotenv
+from fastapi.responses import StreamingResponse
+
+load_dotenv()
+
+# Configuration
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", 15))
+
+# Keep proxies from caching or buffering the stream
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+# Comment line that keeps idle connections open through proxies
+HEARTBEAT = ": ping\n\n"
+
+
+def format_event(data: Any, event: Optional[str] = None, event_id: Optional[Any] = None) -> str:
+    """Serialize one Server-Sent Event with a JSON data line"""
+    return format_serialized_event(json.dumps(data, default=str), event, event_id)
+
+
+def format_serialized_event(data: str, event: Optional[str] = None, event_id: Optional[Any] = None) -> str:
+    """Format one Server-Sent Event whose data is already a single-line JSON string"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {data}")
+    return "\n".join(lines) + "\n\n"
+
+
+def parse_last_event_id(value: Optional[str]) -> Optional[int]:
+    """The numeric Last-Event-ID a reconnecting EventSource sends, or None"""
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    """Stream already formatted events as text/event-stream"""
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
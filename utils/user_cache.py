@@ -0,0 +1,159 @@
+import os
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
+from uuid import UUID
+
+from dotenv import load_dotenv
+
+from consts import UserTypeEnum
+
+load_dotenv()
+
+# Configuration
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", 10000))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", 60))
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """Immutable snapshot of the user columns routes read from the current user"""
+    user_id: UUID
+    username: str
+    email: str
+    role: UserTypeEnum
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user) -> "CachedUser":
+        """Build a snapshot from a User row"""
+        return cls(
+            user_id=user.user_id,
+            username=user.username,
+            email=user.email,
+            role=user.role,
+            created_at=user.created_at
+        )
+
+
+class UserCache:
+    """
+    Bounded TTL + LRU cache of authenticated users keyed by token subject.
+
+    Entries expire after ttl_seconds and the least recently used entry is
+    evicted once max_size is reached. UserService invalidates a user's entries
+    explicitly on update and delete, and announces the change so every other
+    worker invalidates them too (utils.auth_helper.user_change_listener).
+    """
+
+    def __init__(self, max_size: int = USER_CACHE_MAX_SIZE, ttl_seconds: float = USER_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, CachedUser]]" = OrderedDict()
+        self._subjects_by_user: Dict[UUID, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, subject: str) -> Optional[CachedUser]:
+        """Return the cached user for a token subject, or None on miss or expiry"""
+        entry = self._entries.get(subject)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            self._remove(subject)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(subject)
+        self.hits += 1
+        return user
+
+    def set(self, subject: str, user: CachedUser) -> None:
+        """Cache a user snapshot under its token subject"""
+        if self.max_size <= 0:
+            return
+        if subject in self._entries:
+            self._remove(subject)
+        self._entries[subject] = (time.monotonic() + self.ttl_seconds, user)
+        self._subjects_by_user.setdefault(user.user_id, set()).add(subject)
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate_user(self, user_id: UUID) -> None:
+        """Drop every cached entry belonging to a user"""
+        for subject in list(self._subjects_by_user.get(user_id, ())):
+            self._remove(subject)
+
+    def clear(self) -> None:
+        """Drop all entries, keeping the counters"""
+        self._entries.clear()
+        self._subjects_by_user.clear()
+
+    def stats(self) -> dict:
+        """Counters for sizing the cache"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+    def _remove(self, subject: str) -> None:
+        _, user = self._entries.pop(subject)
+        subjects = self._subjects_by_user.get(user.user_id)
+        if subjects is not None:
+            subjects.discard(subject)
+            if not subjects:
+                del self._subjects_by_user[user.user_id]
+
+
+class TokenVersionRegistry:
+    """
+    Minimum valid token version per user, as last changed by any worker.
+
+    Stateless tokens carry the user's token_version at login. When a user's
+    role or email changes, or the user is deleted, every worker records the
+    new version here as it hears of the change, so tokens minted before it
+    are recognised as stale without a database lookup. Records are kept for ttl_seconds (the
+    token lifetime), after which every older token has expired anyway.
+    """
+
+    DELETED = sys.maxsize
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._versions: "OrderedDict[UUID, Tuple[float, int]]" = OrderedDict()
+
+    def record(self, user_id: UUID, version: int) -> None:
+        """Tokens for user_id older than version are stale from now on"""
+        now = time.monotonic()
+        self._versions.pop(user_id, None)
+        self._versions[user_id] = (now, version)
+        while self._versions:
+            recorded_at, _ = next(iter(self._versions.values()))
+            if now - recorded_at < self.ttl_seconds:
+                break
+            self._versions.popitem(last=False)
+
+    def record_deleted(self, user_id: UUID) -> None:
+        """Every token for user_id is stale from now on"""
+        self.record(user_id, self.DELETED)
+
+    def is_current(self, user_id: UUID, version: int) -> bool:
+        """Whether a token minted at version is still current as far as this process knows"""
+        entry = self._versions.get(user_id)
+        return entry is None or version >= entry[1]
+
+
+user_cache = UserCache()
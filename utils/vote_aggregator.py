@@ -0,0 +1,141 @@
+import asyncio
+import os
+from collections import defaultdict
+from typing import Dict, Optional
+from uuid import UUID
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from models import Question
+from utils.database_helper import async_engine
+from utils.ranking import refresh_hot_scores
+from utils.response_cache import response_cache, QUESTIONS_TAG, user_questions_tag, user_answers_tag
+
+load_dotenv()
+
+# Configuration
+VOTE_FLUSH_INTERVAL_SECONDS = float(os.getenv("VOTE_FLUSH_INTERVAL_SECONDS", 1.0))
+
+# One statement per table applies every pending delta; ids are sorted so
+# concurrent flushes from several workers lock rows in the same order.
+# Questions whose score, or whose answers' scores, changed get a new version;
+# the authors returned locate the cached listings the new scores show up in.
+FLUSH_STATEMENTS = {
+    "question": text("""
+        UPDATE questions
+        SET score = questions.score + deltas.delta,
+            version = questions.version + 1,
+            modified_at = now() AT TIME ZONE 'utc'
+        FROM unnest(CAST(:ids AS uuid[]), CAST(:deltas AS integer[])) AS deltas(item_id, delta)
+        WHERE questions.question_id = deltas.item_id
+        RETURNING questions.user_id
+    """),
+    "answer": text("""
+        WITH scored AS (
+            UPDATE answers SET score = answers.score + deltas.delta
+            FROM unnest(CAST(:ids AS uuid[]), CAST(:deltas AS integer[])) AS deltas(item_id, delta)
+            WHERE answers.answer_id = deltas.item_id
+            RETURNING answers.question_id, answers.user_id
+        ), bumped AS (
+            UPDATE questions
+            SET version = questions.version + 1,
+                modified_at = now() AT TIME ZONE 'utc'
+            WHERE questions.question_id IN (SELECT question_id FROM scored)
+        )
+        SELECT user_id FROM scored
+    """),
+}
+
+
+class VoteAggregator:
+    """
+    Coalesces score changes in memory and applies them in batches.
+
+    Individual votes are stored durably by VoteService; only the score
+    aggregate on questions/answers is deferred. Thousands of votes on a hot
+    item collapse into one UPDATE per flush instead of each vote queueing on
+    that item's row lock. Deltas still pending when a flush fails are kept
+    for the next one; repair_counters.py recomputes scores from the votes.
+    """
+
+    def __init__(self, flush_interval: float = VOTE_FLUSH_INTERVAL_SECONDS):
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, Dict[UUID, int]] = {kind: defaultdict(int) for kind in FLUSH_STATEMENTS}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self.flushes = 0
+        self.flushed_rows = 0
+
+    def add(self, kind: str, item_id: UUID, delta: int) -> None:
+        """Record a score change for a question or answer"""
+        if delta:
+            self._pending[kind][item_id] += delta
+
+    def pending(self, kind: str, item_id: UUID) -> int:
+        """Score change recorded for an item but not yet written"""
+        return self._pending[kind].get(item_id, 0)
+
+    def _restore(self, kind: str, batch) -> None:
+        for item_id, delta in batch:
+            self._pending[kind][item_id] += delta
+
+    async def flush(self) -> None:
+        """Write every pending delta"""
+        for kind, statement in FLUSH_STATEMENTS.items():
+            pending = self._pending[kind]
+            if not pending:
+                continue
+            self._pending[kind] = defaultdict(int)
+            batch = sorted((item_id, delta) for item_id, delta in pending.items() if delta)
+            if not batch:
+                continue
+            try:
+                async with async_engine.begin() as conn:
+                    result = await conn.execute(statement, {
+                        "ids": [item_id for item_id, _ in batch],
+                        "deltas": [delta for _, delta in batch]
+                    })
+                    author_ids = set(result.scalars().all())
+                    if kind == "question":
+                        # Votes move questions in the hot feed too
+                        await conn.execute(refresh_hot_scores(Question.question_id.in_([item_id for item_id, _ in batch])))
+            except Exception as e:
+                self._restore(kind, batch)
+                print(f"⚠️ Vote flush failed, will retry: {e}")
+                continue
+            except BaseException:
+                # Cancelled mid-write: the transaction rolled back, so the deltas are still owed
+                self._restore(kind, batch)
+                raise
+            self.flushes += 1
+            self.flushed_rows += len(batch)
+            if kind == "question":
+                await response_cache.invalidate(QUESTIONS_TAG, *map(user_questions_tag, author_ids))
+            else:
+                await response_cache.invalidate(*map(user_answers_tag, author_ids))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.flush_interval)
+                return
+            except asyncio.TimeoutError:
+                await self.flush()
+
+    def start(self) -> None:
+        """Start flushing periodically in the background"""
+        if self._task is None:
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background flush, letting one in progress finish, and write what is left"""
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+
+vote_aggregator = VoteAggregator()